@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import queue
+import threading
+import requests
+from metrics import stage
+
+# ==========================================
+# 🔔 TELEGRAM ALERTS
+# ==========================================
+# Scans never talk to Telegram themselves. They hand their alerts to the
+# AlertDispatcher, which runs on its own thread and:
+#   - drops alerts already sent for the same (symbol, signal, bar), so
+#     rescans and reruns stay quiet until a new bar produces the signal again
+#   - folds one scan's alerts into digest messages under Telegram's size limit
+#   - keeps at least min_interval between messages and honours 429 retry_after
+# Headless runs read TELEGRAM_TOKEN / TELEGRAM_CHAT_ID; the app fills this from
+# st.secrets. TELEGRAM_API points the sender at a local stand-in for tests.
+
+TELEGRAM = {"token": os.environ.get("TELEGRAM_TOKEN"), "chat_id": os.environ.get("TELEGRAM_CHAT_ID"),
+            "api": os.environ.get("TELEGRAM_API", "https://api.telegram.org")}
+DEFAULT_SENT_PATH = os.path.join(".market_cache", "alerts_sent.json")
+MAX_MESSAGE = 3500  # Telegram rejects > 4096 chars
+
+def configure_telegram(token, chat_id, api=None):
+    TELEGRAM["token"] = token; TELEGRAM["chat_id"] = chat_id
+    if api: TELEGRAM["api"] = api
+
+def _post(message, timeout=10):
+    """-> (ok, retry_after seconds or None). Raises on network errors."""
+    bot_token = TELEGRAM["token"]; chat_id = TELEGRAM["chat_id"]
+    if not bot_token or not chat_id: return True, None
+    url = f"{TELEGRAM['api']}/bot{bot_token}/sendMessage"
+    params = {"chat_id": chat_id, "text": message, "parse_mode": "Markdown"}
+    with stage("telegram.send") as h:
+        r = requests.get(url, params=params, timeout=timeout)
+        h.bytes += len(r.content)
+    if r.status_code == 429:
+        try: return False, float(r.json()["parameters"]["retry_after"])
+        except Exception: return False, 5.0
+    return r.ok, None
+
+def alert_key(a):
+    return f"{a['symbol']}|{a['signal']}|{a['bar']}"
+
+def digest(alerts, max_len=MAX_MESSAGE):
+    """Alerts -> as few (message, alerts in it) as fit under max_len."""
+    if len(alerts) == 1: return [(alerts[0]["text"], alerts)]
+    msgs = []; cur = f"🔔 {len(alerts)} alerts"; part = []
+    for a in alerts:
+        if len(cur) + len(a["text"]) + 2 > max_len:
+            msgs.append((cur, part)); cur = a["text"]; part = [a]
+        else: cur += "\n\n" + a["text"]; part.append(a)
+    msgs.append((cur, part))
+    return msgs
+
+
+class AlertDispatcher:
+    def __init__(self, send=None, min_interval=1.1, max_retries=3, sent_path=None, keep_days=3, clock=time.time, sleep=time.sleep):
+        self.send = send or _post
+        self.min_interval = min_interval; self.max_retries = max_retries
+        self.sent_path = sent_path if sent_path is not None else DEFAULT_SENT_PATH
+        self.keep = keep_days * 86400
+        self.clock = clock; self.sleep = sleep
+        self._queue = queue.Queue(); self._lock = threading.Lock()
+        self._thread = None; self._last_send = 0.0
+        self._sent = self._load()  # key -> time first queued
+
+    def _load(self):
+        try:
+            with open(self.sent_path) as fh: return json.load(fh)
+        except Exception: return {}
+
+    def _save(self):
+        if not self.sent_path: return
+        now = self.clock()
+        with self._lock:
+            for k in [k for k, t in self._sent.items() if now - t > self.keep]: del self._sent[k]
+            data = dict(self._sent)
+        try:
+            d = os.path.dirname(self.sent_path)
+            if d: os.makedirs(d, exist_ok=True)
+            tmp = self.sent_path + ".tmp"
+            with open(tmp, "w") as fh: json.dump(data, fh)
+            os.replace(tmp, self.sent_path)
+        except Exception: pass
+
+    def submit(self, alerts):
+        """Queue one scan's alerts ({symbol, signal, bar, text}); returns how many were new."""
+        now = self.clock(); fresh = []
+        with self._lock:
+            for a in alerts:
+                k = alert_key(a)
+                if k in self._sent: continue
+                self._sent[k] = now; fresh.append(a)
+            if fresh:
+                self._queue.put(fresh)
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._loop, name="alert-dispatch", daemon=True)
+                    self._thread.start()
+        return len(fresh)
+
+    def flush(self, timeout=30.0):
+        """Wait until every queued alert was sent (or dropped). For CLI runs before exit."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline: time.sleep(0.05)
+        return not self._queue.unfinished_tasks
+
+    def _deliver(self, text):
+        for _ in range(self.max_retries):
+            wait = self._last_send + self.min_interval - self.clock()
+            if wait > 0: self.sleep(wait)
+            try: ok, retry_after = self.send(text)
+            except Exception: ok, retry_after = False, None
+            self._last_send = self.clock()
+            if ok: return True
+            self.sleep(retry_after if retry_after else self.min_interval)
+        return False
+
+    def _loop(self):
+        while True:
+            try: batch = self._queue.get(timeout=60)
+            except queue.Empty:
+                # Exit only under the lock submit() holds, so a batch queued meanwhile starts a new thread
+                with self._lock:
+                    if self._queue.empty():
+                        self._thread = None; return
+                continue
+            try:
+                failed = [a for m, part in digest(batch) if not self._deliver(m) for a in part]
+                if failed:
+                    # Let a later scan try again rather than losing the alert for the whole bar
+                    with self._lock:
+                        for a in failed: self._sent.pop(alert_key(a), None)
+                self._save()
+            finally: self._queue.task_done()
+
+
+_dispatcher = None
+
+def get_dispatcher():
+    global _dispatcher
+    if _dispatcher is None: _dispatcher = AlertDispatcher()
+    return _dispatcher
@@ -0,0 +1,233 @@
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from indicators import build_panel, sma, rsi, atr, adx, supertrend, psar
+
+# ==========================================
+# 🧪 SIGNAL BACKTESTER
+# ==========================================
+# Evaluates the scanner's F_* definitions on EVERY bar of every symbol in one
+# vectorized pass (same formulas as analyze_stock_hybrid, just without the
+# .iloc[-1]), then trades each signal bar with the scanner's own levels:
+# entry at the bar's close, SL = 2x ATR, TGT = 4x ATR (mirrored for the bearish
+# signals), exit at the close after `max_hold` bars if neither is touched.
+# If SL and TGT are both inside one bar, SL is assumed. Fills gap to the
+# bar's open when it opens beyond a level. Each signal bar is its own
+# trade; results are reported in R (1R = the 2x ATR risk).
+#   - the 1y Golden range uses a trailing window of up to 250 bars
+#   - PE/ROE are today's fundamentals: F_Fund/F_Double/F_Jackpot have lookahead
+#   - F_Day_Buy/F_Day_Sell/F_2PM need 15m bars: run with --interval 15m
+
+DAILY_SIGNALS = ["F_Jackpot", "F_CE_100", "F_CE_80", "F_PE_100", "F_PE_80", "F_Swing", "F_Double", "F_Tech", "F_Fund",
+                 "F_Trend", "F_Support", "F_Resistance", "F_Golden", "F_SAR", "Alert_Trigger"]
+INTRADAY_SIGNALS = ["F_Day_Buy", "F_Day_Sell", "F_2PM"]
+SHORT_SIGNALS = {"F_PE_100", "F_PE_80", "F_Resistance", "F_Day_Sell"}
+YEAR_BARS = 250
+_NAT = np.iinfo(np.int64).min
+
+
+def _shift(x, n):
+    out = np.full_like(x, np.nan)
+    if n > 0: out[:, n:] = x[:, :-n]
+    return out
+
+def _rolling(x, window, fn):
+    """Trailing window reduction along time for a (n, T) array (NaN where the window is not full)."""
+    out = np.full_like(x, np.nan)
+    if x.shape[1] >= window:
+        w = np.lib.stride_tricks.sliding_window_view(x, window, axis=1)
+        out[:, window - 1:] = fn(w, axis=2)
+    return out
+
+def _time_panel(frames, symbols, T):
+    """Right-aligned bar timestamps (ns, wall clock of the frame's own tz) matching build_panel."""
+    ts = np.full((len(symbols), T), _NAT, dtype=np.int64)
+    for r, s in enumerate(symbols):
+        idx = frames[s].index[-T:]
+        if idx.tz is not None: idx = idx.tz_localize(None)
+        ts[r, T - len(idx):] = idx.values.astype("datetime64[ns]").astype(np.int64)
+    return ts
+
+def weekly_trend_panel(frames, symbols, T):
+    """Per bar: weekly close > SMA20 of weekly closes, with the current week still forming (as the live scan sees it)."""
+    out = np.zeros((len(symbols), T), dtype=bool)
+    for r, s in enumerate(symbols):
+        c = frames[s]['Close'].iloc[-T:]
+        idx = c.index.tz_localize(None) if c.index.tz is not None else c.index
+        week = idx.to_period("W-SUN")  # weeks start Monday, as in timeframes.to_weekly
+        wk_close = c.groupby(week).last()
+        prev19 = wk_close.rolling(19).sum().shift(1)  # the 19 completed weeks before each week
+        sma20 = (prev19.reindex(week).to_numpy() + c.to_numpy()) / 20
+        with np.errstate(invalid="ignore"): out[r, T - len(c):] = c.to_numpy() > sma20
+    return out
+
+def daily_signals(panel, weekly_up, pe, roe):
+    o, h, l, c, v = (panel[f] for f in ("Open", "High", "Low", "Close", "Volume"))
+    st_dir, _ = supertrend(h, l, c, length=7, multiplier=3)
+    sar, _ = psar(h, l, c)
+    sma200 = sma(c, 200); rsi_d = rsi(c, 14); adx_d = np.nan_to_num(adx(h, l, c, 14), nan=0.0)
+    vol_avg = sma(v, 10)
+    # The live scan takes the range over whatever <= 1y of history it has
+    max_h = pd.DataFrame(h.T).rolling(YEAR_BARS, min_periods=1).max().to_numpy().T
+    min_l = pd.DataFrame(l.T).rolling(YEAR_BARS, min_periods=1).min().to_numpy().T
+    pe = pe[:, None]; roe = roe[:, None]
+    with np.errstate(invalid="ignore"):
+        golden = max_h - (max_h - min_l) * 0.618
+        vol_blast = v > vol_avg * 1.5
+        is_fund = (0 < pe) & (pe < 60) & (roe > 0.12)
+        is_tech = (c > sma200) & (rsi_d > 55)
+        lp1 = _shift(l, 1); hp1 = _shift(h, 1)
+        sig = {
+            "F_Jackpot": is_fund & is_tech & vol_blast & weekly_up & (rsi_d < 70),
+            "F_CE_100": (st_dir == 1) & (rsi_d > 60) & (adx_d > 25) & weekly_up,
+            "F_PE_100": (st_dir == -1) & (rsi_d < 40) & (adx_d > 25),
+            "F_Tech": c > sma200, "F_Trend": c > _shift(c, 19), "F_Fund": ((0 < pe) & (pe < 60)) & np.ones_like(c, dtype=bool),
+            # argrelextrema(order=5) on the frame ending at t: bar t-1 is a pivot when it beats the 5 bars before it and bar t
+            "F_Support": (lp1 < l) & (lp1 < _rolling(_shift(l, 2), 5, np.min)),
+            "F_Resistance": (hp1 > h) & (hp1 > _rolling(_shift(h, 2), 5, np.max)),
+            "F_Golden": (np.abs(c - golden) <= c * 0.015) & (c > o),
+            "F_SAR": c > sar, "Alert_Trigger": vol_blast,
+        }
+        sig["F_CE_80"] = (st_dir == 1) & (rsi_d > 55) & ~sig["F_CE_100"]
+        sig["F_PE_80"] = (st_dir == -1) & (rsi_d < 45) & ~sig["F_PE_100"]
+        sig["F_Double"] = sig["F_Fund"] & sig["F_Tech"]
+        sig["F_Swing"] = np.zeros_like(c, dtype=bool)  # never set by the scanner
+    # The scanner needs 50 daily bars before it evaluates anything
+    warm = np.cumsum(~np.isnan(c), axis=1) >= 50
+    return {k: s & warm for k, s in sig.items()}
+
+def intraday_signals(panel, ts):
+    h, l, c, v = (panel[f] for f in ("High", "Low", "Close", "Volume"))
+    st_dir, _ = supertrend(h, l, c, length=7, multiplier=3)
+    # Session VWAP: cumulative typical-price volume, reset on each new date
+    day = np.where(ts == _NAT, -1, ts // 86_400_000_000_000)
+    new = np.ones_like(day, dtype=bool); new[:, 1:] = day[:, 1:] != day[:, :-1]
+    pv = np.nan_to_num(v * (h + l + c) / 3.0); vol = np.nan_to_num(v)
+    cpv = np.cumsum(pv, axis=1); cv = np.cumsum(vol, axis=1)
+    start = np.maximum.accumulate(np.where(new, np.arange(day.shape[1]), 0), axis=1)
+    base_pv = np.where(start > 0, np.take_along_axis(cpv, np.maximum(start - 1, 0), axis=1), 0.0)
+    base_v = np.where(start > 0, np.take_along_axis(cv, np.maximum(start - 1, 0), axis=1), 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sv = cv - base_v
+        vwap = np.where(sv > 0, (cpv - base_pv) / sv, c)
+        vol_avg10 = _rolling(np.nan_to_num(v), 10, np.mean)
+        minute = (ts // 60_000_000_000) % 1440
+        after_130 = minute >= 13 * 60 + 30
+        sig = {
+            "F_Day_Buy": (c > vwap) & (st_dir == 1), "F_Day_Sell": (c < vwap) & (st_dir == -1),
+            "F_2PM": after_130 & (_shift(c, 1) < _shift(vwap, 1)) & (c > vwap) & (v > vol_avg10 * 1.5),
+        }
+    warm = np.cumsum(~np.isnan(c), axis=1) > 20
+    return {k: s & warm for k, s in sig.items()}
+
+
+# --- TRADE SIMULATION ---
+def simulate(panel, atr_arr, direction, sl_mult=2.0, tgt_mult=4.0, max_hold=20):
+    """Trade every bar in one direction: (R multiple, return %, outcome) per bar; NaN R where no trade fits."""
+    o, h, l, c = (panel[f] for f in ("Open", "High", "Low", "Close"))
+    n, T = c.shape
+    d = 1.0 if direction == "long" else -1.0
+    risk = sl_mult * atr_arr
+    sl = c - d * risk; tg = c + d * tgt_mult * atr_arr
+    outcome = np.zeros((n, T), dtype=np.int8)  # 1 target, -1 stop, 2 timeout
+    exit_px = np.full((n, T), np.nan)
+    for k in range(1, max_hold + 1):
+        ok = np.full((n, T), np.nan); hk = ok.copy(); lk = ok.copy(); ck = ok.copy()
+        ok[:, :T - k] = o[:, k:]; hk[:, :T - k] = h[:, k:]; lk[:, :T - k] = l[:, k:]; ck[:, :T - k] = c[:, k:]
+        open_ = outcome == 0
+        with np.errstate(invalid="ignore"):
+            if d > 0: hit_sl = lk <= sl; hit_tg = hk >= tg; fill_sl = np.fmin(sl, ok); fill_tg = np.fmax(tg, ok)
+            else: hit_sl = hk >= sl; hit_tg = lk <= tg; fill_sl = np.fmax(sl, ok); fill_tg = np.fmin(tg, ok)
+        stop = open_ & hit_sl; target = open_ & hit_tg & ~hit_sl
+        outcome[stop] = -1; exit_px[stop] = fill_sl[stop]
+        outcome[target] = 1; exit_px[target] = fill_tg[target]
+        if k == max_hold:
+            timeout = (outcome == 0) & ~np.isnan(ck)
+            outcome[timeout] = 2; exit_px[timeout] = ck[timeout]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        valid = (outcome != 0) & (risk > 0) & ~np.isnan(c)
+        r_mult = np.where(valid, d * (exit_px - c) / risk, np.nan)
+        ret = np.where(valid, d * (exit_px - c) / c * 100, np.nan)
+    return r_mult, ret, outcome
+
+def _max_drawdown(r_sorted):
+    if not len(r_sorted): return 0.0
+    equity = np.cumsum(r_sorted)
+    return float(np.max(np.maximum.accumulate(np.concatenate([[0.0], equity]))[1:] - equity))
+
+def summarize(signals, sims, ts):
+    rows = []
+    for name, mask in signals.items():
+        r_mult, ret, outcome = sims["short" if name in SHORT_SIGNALS else "long"]
+        m = mask & ~np.isnan(r_mult)
+        r = r_mult[m]; order = np.argsort(ts[m], kind="stable")
+        n = int(m.sum())
+        rows.append({
+            "Signal": name, "Side": "short" if name in SHORT_SIGNALS else "long", "Trades": n,
+            "Hit_Rate": float((outcome[m] == 1).mean()) if n else np.nan,
+            "Stop_Rate": float((outcome[m] == -1).mean()) if n else np.nan,
+            "Expectancy_R": float(r.mean()) if n else np.nan,
+            "Avg_Return_%": float(ret[m].mean()) if n else np.nan,
+            "Max_DD_R": _max_drawdown(r[order]),
+        })
+    return pd.DataFrame(rows).set_index("Signal")
+
+def signal_panel(frames, info=None, interval="1d"):
+    """{symbol: OHLCV} -> (symbols, panel, ts, {signal: (n, T) bool}): every signal on every bar."""
+    frames = {s: df for s, df in frames.items() if df is not None and len(df) > 1}
+    symbols, panel = build_panel(frames)
+    if not symbols: return symbols, panel, None, {}
+    T = panel["Close"].shape[1]
+    ts = _time_panel(frames, symbols, T)
+    if interval == "1d":
+        info = info or {}
+        pe = np.array([float((info.get(s) or {}).get('trailingPE', 100) or 100) for s in symbols])
+        roe = np.array([float((info.get(s) or {}).get('returnOnEquity', 0) or 0) for s in symbols])
+        signals = daily_signals(panel, weekly_trend_panel(frames, symbols, T), pe, roe)
+    else: signals = intraday_signals(panel, ts)
+    return symbols, panel, ts, signals
+
+def backtest_frames(frames, info=None, interval="1d", sl_mult=2.0, tgt_mult=4.0, max_hold=20):
+    """{symbol: OHLCV} -> per-signal report. All symbols are evaluated together."""
+    symbols, panel, ts, signals = signal_panel(frames, info, interval)
+    if not symbols: return pd.DataFrame()
+    atr_arr = np.nan_to_num(atr(panel["High"], panel["Low"], panel["Close"], 14), nan=0.0)
+    sims = {side: simulate(panel, atr_arr, side, sl_mult, tgt_mult, max_hold) for side in ("long", "short")}
+    return summarize(signals, sims, ts)
+
+def run_backtest(symbols, period="5y", interval="1d", provider=None, **kw):
+    from data_provider import get_provider
+    p = provider or get_provider()
+    frames = p.history(list(dict.fromkeys(symbols)), period=period, interval=interval)
+    info = None
+    if interval == "1d":
+        if getattr(p, "offline", False): info = p.info(list(frames))
+        else:
+            from fundamentals import get_store
+            info = get_store().info(list(frames), fetch_missing=False)
+    return backtest_frames(frames, info, interval, **kw)
+
+
+# --- CLI ---
+# python backtest.py --list all --period 5y
+# MARKET_AI_FIXTURES=fixtures/ python backtest.py --interval 15m --period 60d
+def main(argv=None):
+    from scanner_core import STOCK_LISTS
+    ap = argparse.ArgumentParser(description="Backtest the scanner's signals over history.")
+    ap.add_argument("--list", choices=sorted(STOCK_LISTS), default="all")
+    ap.add_argument("--period", default="5y")
+    ap.add_argument("--interval", choices=["1d", "15m"], default="1d")
+    ap.add_argument("--max-hold", type=int, default=20, help="bars before a trade exits at the close")
+    ap.add_argument("--out", help="write the report as CSV")
+    args = ap.parse_args(argv)
+    t0 = time.perf_counter()
+    report = run_backtest(STOCK_LISTS[args.list], args.period, args.interval, max_hold=args.max_hold)
+    print(report.round(3).to_string())
+    print(f"\n{len(STOCK_LISTS[args.list])} symbols in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    if args.out: report.to_csv(args.out)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
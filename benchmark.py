@@ -0,0 +1,154 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# ⏲️ SCANNER BENCHMARKS (offline)
+# ==========================================
+# python benchmark.py                          -> 100 / 330 / 2000 symbols
+# python benchmark.py --sizes 330 --save bench/base.json
+# python benchmark.py --sizes 330 --baseline bench/base.json
+#
+# Every symbol gets a deterministic synthetic series (seeded by its position):
+# 1y of business-day daily bars and 5 sessions of 15m bars on a fixed calendar,
+# served by SyntheticProvider so nothing touches the network or the caches.
+# Each stage of the scan hot path is timed on its own (best of --repeat runs).
+
+END = pd.Timestamp("2026-10-16")
+DAILY_BARS = 250
+INTRA_DAYS = 5
+STAGES = ["fetch", "indicators", "pivots", "index_signal", "flags", "results", "charts"]
+
+
+def synthetic_ohlcv(index, seed, vol=0.02):
+    rng = np.random.default_rng(seed)
+    m = len(index)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, vol, m)))
+    high = close * (1 + rng.uniform(0, vol, m)); low = close * (1 - rng.uniform(0, vol, m))
+    open_ = low + (high - low) * rng.uniform(0, 1, m)
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close,
+                         "Volume": rng.uniform(1e5, 1e6, m).round()}, index=index)
+
+
+class SyntheticProvider:
+    """Offline provider with the history()/info() interface of data_provider's providers."""
+
+    offline = True
+
+    def __init__(self, n_symbols):
+        self.symbols = [f"SYN{i:04d}.NS" for i in range(n_symbols)]
+        self._seed = {s: i for i, s in enumerate(self.symbols)}
+        self.daily_index = pd.bdate_range(end=END, periods=DAILY_BARS)
+        days = pd.bdate_range(end=END, periods=INTRA_DAYS)
+        self.intra_index = pd.DatetimeIndex([d + pd.Timedelta(minutes=555 + 15 * k) for d in days for k in range(25)]).tz_localize("Asia/Kolkata")
+        self._frames = {}
+
+    def _frame(self, s, interval):
+        key = (s, interval)
+        if key not in self._frames:
+            idx = self.daily_index if interval == "1d" else self.intra_index
+            self._frames[key] = synthetic_ohlcv(idx, self._seed[s] * 2 + (interval != "1d"), 0.02 if interval == "1d" else 0.004)
+        return self._frames[key]
+
+    def history(self, symbols, period="1y", interval="1d", start=None):
+        return {s: self._frame(s, interval).copy() for s in dict.fromkeys(symbols) if s in self._seed}
+
+    def info(self, symbols):
+        out = {}
+        for s in symbols:
+            rng = np.random.default_rng(10_000 + self._seed[s])
+            out[s] = {"trailingPE": float(rng.uniform(5, 80)), "returnOnEquity": float(rng.uniform(0, 0.3))}
+        return out
+
+
+def _timed(fn):
+    t0 = time.perf_counter(); out = fn()
+    return time.perf_counter() - t0, out
+
+def run_stages(n_symbols, chart_samples=20):
+    """One pass over every stage for a universe of n_symbols: {stage: seconds}."""
+    import streaming
+    from data_provider import prefetch_bundles
+    from indicators import daily_feature_table
+    from levels import LevelStore
+    from scanner_core import analyze_stock_hybrid, get_index_signal, result_rows
+    from scan_results import ScanResultTable, FrameCache
+    from charts import chart_data, build_figure, OverlayCache
+
+    provider = SyntheticProvider(n_symbols); symbols = provider.symbols
+    # Fresh intraday state in a scratch file: every run measures the cold path
+    streaming._registry = streaming.StreamRegistry(os.path.join(tempfile.mkdtemp(), "state.json"))
+    t = {}
+    t["fetch"], bundles = _timed(lambda: prefetch_bundles(symbols, provider=provider))
+    frames = {s: b["daily"] for s, b in bundles.items()}
+    t["indicators"], feats = _timed(lambda: daily_feature_table(frames))
+    levels = LevelStore()  # cold: every symbol's pivots and zones are built from scratch
+    t["pivots"], _ = _timed(lambda: [levels.pivots(s, df) for s, df in frames.items()])
+    t["index_signal"], _ = _timed(lambda: [get_index_signal(bundles[s]["intra"]) for s in symbols])
+    t["flags"], results = _timed(lambda: [r for r in (analyze_stock_hybrid(s, bundles[s], feats.loc[s]) for s in symbols) if r])
+    t["results"], _ = _timed(lambda: (ScanResultTable.from_results(results, frame_cache=FrameCache()), result_rows(results)))
+    cache = OverlayCache(); sample = symbols[:chart_samples]
+    t["charts"], _ = _timed(lambda: [build_figure(chart_data(s, frames[s], cache=cache), s) for s in sample])
+    return t
+
+def run_suite(sizes, repeat=3, chart_samples=20):
+    out = {}
+    for n in sizes:
+        runs = [run_stages(n, chart_samples) for _ in range(repeat)]
+        out[str(n)] = {st: min(r[st] for r in runs) for st in STAGES}
+        out[str(n)]["total"] = sum(out[str(n)][st] for st in STAGES)
+    return out
+
+def compare(current, baseline, tolerance=0.2, min_delta=0.005):
+    """Rows of (size, stage, base, now, ratio, regressed). Sub-min_delta slowdowns are noise, not regressions."""
+    rows = []
+    for n, stages in current.items():
+        for st, now in stages.items():
+            base = baseline.get(n, {}).get(st)
+            if base is None: continue
+            ratio = now / base if base > 0 else np.nan
+            rows.append((n, st, base, now, ratio, bool(ratio > 1 + tolerance and now - base > min_delta)))
+    return rows
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Time the scanner stages on synthetic offline data.")
+    ap.add_argument("--sizes", default="100,330,2000", help="comma-separated universe sizes")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per size; the best time is kept")
+    ap.add_argument("--charts", type=int, default=20, help="symbols to build charts for")
+    ap.add_argument("--save", help="write timings as JSON (e.g. a new baseline)")
+    ap.add_argument("--baseline", help="JSON from an earlier --save to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="slowdown ratio above 1 counted as a regression")
+    ap.add_argument("--min-ms", type=float, default=5.0, help="ignore slowdowns smaller than this")
+    args = ap.parse_args(argv)
+
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    timings = run_suite(sizes, args.repeat, args.charts)
+    table = pd.DataFrame(timings).T[STAGES + ["total"]]
+    table.index.name = "symbols"
+    print((table * 1000).round(1).to_string(), "\n(ms, best of %d)" % args.repeat)
+
+    if args.save:
+        d = os.path.dirname(args.save)
+        if d: os.makedirs(d, exist_ok=True)
+        meta = {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+                "machine": platform.machine(), "cpus": os.cpu_count(), "at": time.strftime("%Y-%m-%d %H:%M:%S")}
+        with open(args.save, "w") as fh: json.dump({"meta": meta, "timings": timings}, fh, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as fh: base = json.load(fh)["timings"]
+        rows = compare(timings, base, args.tolerance, args.min_ms / 1000)
+        print()
+        for n, st, b, now, ratio, bad in rows:
+            print(f"{n:>6} {st:<13} {b * 1000:9.1f} -> {now * 1000:9.1f} ms  x{ratio:5.2f}{'  REGRESSION' if bad else ''}")
+        if any(r[5] for r in rows): return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
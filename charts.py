@@ -0,0 +1,121 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import plotly.graph_objects as go
+from indicators import sma, atr, psar
+from levels import find_pivots
+
+# ==========================================
+# 📈 CHART PIPELINE
+# ==========================================
+# plot_chart used to recompute every overlay per render and stringify the
+# source frame's index in place. Here:
+#   - overlays (SMA 20/50/200, PSAR, ATR, pivots) come from the numpy engine
+#     and are memoised per frame version in OVERLAY_CACHE, shared by sessions
+#   - the source DataFrame is only read, never modified
+#   - series longer than max_points are reduced with LTTB on Close; each kept
+#     candle aggregates the bars it stands for, so wicks are preserved, and
+#     pivot bars are always kept
+#   - line and marker overlays are WebGL (Scattergl) traces
+
+MAX_POINTS = 600
+
+
+class OverlayCache:
+    def __init__(self, max_items=256):
+        self.max_items = max_items
+        self._data = OrderedDict(); self._lock = threading.Lock()
+
+    def get(self, key, build):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key); return self._data[key]
+        val = build()
+        with self._lock:
+            self._data[key] = val
+            while len(self._data) > self.max_items: self._data.popitem(last=False)
+        return val
+
+OVERLAY_CACHE = OverlayCache()
+
+def frame_key(symbol, df):
+    """Identifies one version of a frame: a new/updated bar gives a new key."""
+    return (symbol, len(df), df.index[0], df.index[-1], float(df['Close'].iloc[-1]))
+
+def compute_overlays(df):
+    h, l, c = (df[f].to_numpy(dtype=float)[None, :] for f in ("High", "Low", "Close"))
+    sar, _ = psar(h, l, c)
+    return {
+        "sma20": sma(c, 20)[0], "sma50": sma(c, 50)[0], "sma200": sma(c, 200)[0], "sar": sar[0],
+        "atr": float(atr(h, l, c, 14)[0, -1]),
+        "min_idx": find_pivots(l[0], np.arange(l.shape[1]), 5, np.less),
+        "max_idx": find_pivots(h[0], np.arange(h.shape[1]), 5, np.greater),
+    }
+
+def lttb(y, n_out, keep=()):
+    """Largest-Triangle-Three-Buckets: indices of ~n_out points that keep the shape of y.
+
+    Indices in `keep` are always added (pivots stay visible)."""
+    n = len(y)
+    if n <= n_out or n_out < 3: return np.arange(n)
+    x = np.arange(n, dtype=float); y = np.nan_to_num(np.asarray(y, dtype=float), nan=np.nanmean(y))
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    out = [0]; a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        nlo, nhi = edges[b + 1], (edges[b + 2] if b + 2 < len(edges) else n)
+        ax, ay = x[a], y[a]
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + int(area.argmax()); out.append(a)
+    out.append(n - 1)
+    return np.union1d(np.asarray(out), np.asarray([k for k in keep if 0 <= k < n], dtype=int))
+
+def chart_data(symbol, df, is_daily=True, atr_mult=2.0, min_idx=None, max_idx=None, max_points=MAX_POINTS, cache=OVERLAY_CACHE):
+    ov = cache.get(frame_key(symbol, df), lambda: compute_overlays(df))
+    if min_idx is None: min_idx, max_idx = ov["min_idx"], ov["max_idx"]
+    n = len(df)
+    min_idx = np.asarray([i for i in min_idx if i < n], dtype=int)
+    max_idx = np.asarray([i for i in max_idx if i < n], dtype=int)
+
+    o, h, l, c = (df[f].to_numpy(dtype=float) for f in ("Open", "High", "Low", "Close"))
+    keep = lttb(c, max_points, keep=np.concatenate([min_idx, max_idx]))
+    # Each kept bar stands for the bars since the previous kept one
+    starts = np.concatenate([[0], keep[:-1] + 1])
+    labels = df.index.strftime('%Y-%m-%d' if is_daily else '%d-%m %H:%M')  # new Index; df untouched
+    current_price = c[-1]; atr_val = ov["atr"]
+    sl = current_price - atr_val * atr_mult if np.isfinite(atr_val) else 0
+    tgt = current_price + atr_val * atr_mult * 2 if np.isfinite(atr_val) else 0
+    return {
+        "x": np.asarray(labels)[keep],
+        "open": o[starts], "high": np.maximum.reduceat(h, starts), "low": np.minimum.reduceat(l, starts), "close": c[keep],
+        "sma20": ov["sma20"][keep], "sma50": ov["sma50"][keep], "sma200": ov["sma200"][keep], "sar": ov["sar"][keep],
+        "support": (np.asarray(labels)[min_idx], l[min_idx]), "resistance": (np.asarray(labels)[max_idx], h[max_idx]),
+        "max_h": float(np.nanmax(h)), "min_l": float(np.nanmin(l)), "sl": sl, "tgt": tgt,
+        "n_bars": n, "n_points": len(keep),
+    }
+
+def build_figure(cd, title):
+    fig = go.Figure()
+    fig.add_trace(go.Candlestick(x=cd["x"], open=cd["open"], high=cd["high"], low=cd["low"], close=cd["close"], name='Price'))
+    fig.add_trace(go.Scattergl(x=cd["x"], y=cd["sma20"], mode='lines', line=dict(color='#3b82f6', width=1.5), name='SMA 20'))
+    fig.add_trace(go.Scattergl(x=cd["x"], y=cd["sma50"], mode='lines', line=dict(color='orange', width=1.5), name='SMA 50'))
+    fig.add_trace(go.Scattergl(x=cd["x"], y=cd["sma200"], mode='lines', line=dict(color='purple', width=1.5), name='SMA 200'))
+    fig.add_trace(go.Scattergl(x=cd["x"], y=cd["sar"], mode='markers', marker=dict(color='black', size=4), name='SAR'))
+
+    # --- FIBONACCI GOLDEN LINES ---
+    max_h = cd["max_h"]; diff = max_h - cd["min_l"]
+    if diff > 0:
+        fig.add_hline(y=max_h - (diff * 0.618), line_dash="dot", line_color="#EAB308", annotation_text="GOLDEN 61.8%")
+        fig.add_hline(y=max_h - (diff * 0.5), line_dash="dot", line_color="#EAB308", annotation_text="GOLDEN 50%")
+    if cd["sl"] > 0: fig.add_hline(y=cd["sl"], line_dash="dash", line_color="red", annotation_text=f"SL: {cd['sl']:.1f}")
+    if cd["tgt"] > 0: fig.add_hline(y=cd["tgt"], line_dash="dash", line_color="green", annotation_text=f"TGT: {cd['tgt']:.1f}")
+
+    sx, sy = cd["support"]
+    if len(sx): fig.add_trace(go.Scattergl(x=sx, y=sy, mode='markers', marker=dict(symbol='triangle-up', size=10, color='green'), name='Support'))
+    rx, ry = cd["resistance"]
+    if len(rx): fig.add_trace(go.Scattergl(x=rx, y=ry, mode='markers', marker=dict(symbol='triangle-down', size=10, color='red'), name='Resistance'))
+
+    fig.update_layout(title=title, xaxis_rangeslider_visible=False, height=400, margin=dict(l=10, r=10, t=50, b=10), template="plotly_white",
+                      xaxis={'type': 'category', 'categoryorder': 'array', 'categoryarray': cd["x"]})
+    return fig
@@ -0,0 +1,80 @@
+import os
+import hmac
+import time
+import hashlib
+import threading
+from metrics import stage
+
+# ==========================================
+# 🔐 CREDENTIAL INDEX
+# ==========================================
+# The admin sheet is read into a dict keyed by username holding a salted
+# password hash, Status, Sheet_URL and Device_ID, so a burst of logins is
+# dict lookups instead of full sheet reads. A login is only ever decided on
+# rows at most `min_refresh` seconds old, so a user the admin just BLOCKED
+# (or a new Device_ID) takes effect within that window. Refreshes are
+# single-flight: logins arriving during a read wait for it instead of
+# starting their own.
+
+def _hash(salt, password):
+    return hashlib.sha256(salt + str(password).strip().encode()).digest()
+
+
+class CredentialIndex:
+    def __init__(self, load, min_refresh=30.0, clock=time.monotonic):
+        self.load = load  # () -> admin DataFrame (Username, Password, Status, Sheet_URL[, Device_ID])
+        self.min_refresh = min_refresh; self.clock = clock
+        self._users = {}; self._loaded_at = None
+        self._lock = threading.Lock(); self._refresh_lock = threading.Lock()
+
+    @staticmethod
+    def build(admin_df):
+        users = {}
+        for _, row in admin_df.iterrows():
+            salt = os.urandom(16)
+            users.setdefault(str(row['Username']).strip(), []).append({
+                "salt": salt, "hash": _hash(salt, row['Password']),
+                "status": str(row['Status']).strip(),
+                "sheet_url": row['Sheet_URL'],
+                "device_id": str(row.get('Device_ID', '')),
+            })
+        return users
+
+    def refresh(self, max_age=None):
+        """Re-read the sheet; with max_age, skip it if another caller refreshed while we waited."""
+        with self._refresh_lock:
+            if max_age is not None and self._age() <= max_age: return len(self._users)
+            with stage("sheets.admin_read"): users = self.build(self.load())
+            with self._lock:
+                self._users = users; self._loaded_at = self.clock()
+            return len(users)
+
+    def _age(self):
+        return float("inf") if self._loaded_at is None else self.clock() - self._loaded_at
+
+    def _match(self, u, p):
+        with self._lock: entries = self._users.get(str(u).strip(), [])
+        for e in entries:
+            if hmac.compare_digest(e["hash"], _hash(e["salt"], p)): return e
+        return None
+
+    def lookup(self, u, p):
+        """Entry dict for a matching username/password (from rows at most min_refresh old), or None."""
+        if self._age() > self.min_refresh: self.refresh(max_age=self.min_refresh)
+        return self._match(u, p)
+
+    def verify(self, u, p):
+        """Same contract as the old verify_user: (ok, sheet_url | "BLOCKED" | "INVALID", device_id)."""
+        e = self.lookup(u, p)
+        if e is None: return False, "INVALID", None
+        if e["status"] != "Active": return False, "BLOCKED", None
+        return True, e["sheet_url"], e["device_id"]
+
+
+_index = None
+
+def get_credential_index(load):
+    global _index
+    if _index is None: _index = CredentialIndex(load)
+    else: _index.load = load
+    return _index
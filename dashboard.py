@@ -0,0 +1,77 @@
+import time
+import threading
+
+# ==========================================
+# 📊 MARKET DASHBOARD SNAPSHOT
+# ==========================================
+# Global mood, the five index cards (with their chart frames) and the sector
+# heatmap are computed together into one snapshot dict by a background
+# thread every `interval` seconds. Every session renders the page header from
+# the latest snapshot. Only the very first read in a fresh process waits for
+# a compute. The refresher stops when nobody has read for `idle_stop` seconds
+# and restarts on the next read.
+
+INDICES = [("Nifty 50", "^NSEI", "Nifty"), ("Sensex", "^BSESN", "Sensex"), ("Bank Nifty", "^NSEBANK", "BankNifty"),
+           ("Fin Nifty", "NIFTY_FIN_SERVICE.NS", "FinNifty"), ("Bankex", "^BSEBANK", "Bankex")]
+
+def compute_dashboard():
+    from data_provider import get_provider
+    from scanner_core import analyze_market_index, get_smart_sectors, get_market_mood_strip
+    from throttle import collect
+    tickers = [t for _, t, _ in INDICES]
+    # Two bulk downloads for all five indices instead of two per index
+    provider = get_provider()
+    with collect() as status:
+        daily = provider.history(tickers, period="1y", interval="1d")
+        intra = provider.history(tickers, period="5d", interval="15m")
+        indices = {t: analyze_market_index(t, daily.get(t), intra.get(t)) for t in tickers}
+        mood = get_market_mood_strip(); sectors = get_smart_sectors()
+    return {"mood": mood, "indices": indices, "sectors": sectors, "fetch": status, "at": time.time()}
+
+
+class DashboardService:
+    def __init__(self, interval=60.0, compute=None, idle_stop=600.0, clock=time.monotonic):
+        self.interval = interval; self.idle_stop = idle_stop
+        self.compute = compute or compute_dashboard
+        self.clock = clock
+        self._snap = None; self._snap_at = None; self._last_read = 0.0
+        self._lock = threading.Lock(); self._ready = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        snap = self.compute()
+        with self._lock: self._snap = snap; self._snap_at = self.clock()
+        self._ready.set()
+        return snap
+
+    def snapshot(self, wait=True, timeout=60.0):
+        """Latest snapshot (never blocks once one exists); None before the first compute if wait=False."""
+        with self._lock:
+            self._last_read = self.clock(); snap = self._snap
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="dashboard-refresh", daemon=True)
+                self._thread.start()
+        if snap is None and wait:
+            # Cold process: every session waits on the refresher's first compute
+            self._ready.wait(timeout)
+            with self._lock: snap = self._snap
+        return snap
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                if self.clock() - self._last_read > self.idle_stop:
+                    self._thread = None; return
+                due = self._snap_at is None or self.clock() - self._snap_at >= self.interval
+            if due:
+                try: self.refresh()
+                except Exception: pass  # keep serving the previous snapshot
+            time.sleep(min(self.interval, 5.0))
+
+
+_service = None
+
+def get_dashboard():
+    global _service
+    if _service is None: _service = DashboardService()
+    return _service
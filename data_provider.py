@@ -0,0 +1,229 @@
+import os
+import json
+import logging
+import threading
+import pandas as pd
+from startup import lazy_module
+from concurrent.futures import ThreadPoolExecutor
+from metrics import stage, fail
+from throttle import Throttled, CircuitOpen, get_endpoint, is_throttle, is_throttle_text, is_transient, report
+
+yf = lazy_module("yfinance")  # imported on the first real download
+
+# ==========================================
+# 📡 MARKET DATA PROVIDERS
+# ==========================================
+# Every provider answers the same two calls:
+#   history(symbols, period, interval) -> {symbol: OHLCV DataFrame}
+#   info(symbols)                      -> {symbol: dict}
+# so the scanner never cares whether data comes from Yahoo or from disk.
+
+OHLCV_COLS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Calendar lookback per period. "Nd" periods mean N *trading* days (as on Yahoo),
+# so their lookback is generous and trim_period() cuts the exact sessions.
+_PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=6), "2d": pd.DateOffset(days=8), "5d": pd.DateOffset(days=14),
+    "1mo": pd.DateOffset(months=1), "3mo": pd.DateOffset(months=3), "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1), "2y": pd.DateOffset(years=2), "5y": pd.DateOffset(years=5),
+}
+
+def trim_period(df, period):
+    if df is None or df.empty: return df
+    if period.endswith("d") and period[:-1].isdigit():
+        days = df.index.normalize()
+        keep = days.unique()[-int(period[:-1]):]
+        return df[days.isin(keep)]
+    off = _PERIOD_OFFSETS.get(period)
+    return df[df.index > df.index[-1] - off] if off is not None else df
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _clean(df):
+    if df is None or df.empty: return pd.DataFrame(columns=OHLCV_COLS)
+    df = df[[c for c in OHLCV_COLS if c in df.columns]].dropna(how="all")
+    return df[~df.index.duplicated(keep="last")].sort_index()
+
+
+# --- YAHOO THROTTLING ---
+# yf.download() logs per-ticker failures (429s included) instead of raising, so
+# rate-limit log lines are noted per thread and turned into Throttled below.
+_yahoo_log = threading.local()
+
+class _RateLimitLog(logging.Handler):
+    def emit(self, rec):
+        if is_throttle_text(rec.getMessage()): _yahoo_log.throttled = True
+
+logging.getLogger("yfinance").addHandler(_RateLimitLog(logging.WARNING))
+
+def _watched(fn, *args, **kwargs):
+    """(fn(...), whether yfinance logged a rate limit meanwhile on this thread)"""
+    _yahoo_log.throttled = False
+    out = fn(*args, **kwargs)
+    return out, getattr(_yahoo_log, "throttled", False)
+
+def _reason(exc):
+    if isinstance(exc, CircuitOpen): return "circuit open"
+    if is_throttle(exc): return "throttled"
+    return "error" if is_transient(exc) else "no data"  # e.g. an unknown/delisted symbol
+
+def yahoo_call(endpoint, fn, *args, **kwargs):
+    """fn(...) through the endpoint's scheduler; an empty answer with a logged rate limit counts as a throttle."""
+    def attempt():
+        out, throttled = _watched(fn, *args, **kwargs)
+        if throttled and (out is None or len(out) == 0): raise Throttled(f"{endpoint}: rate limited")
+        return out
+    return get_endpoint(endpoint).call(attempt)
+
+
+class YahooProvider:
+    """Bulk yfinance downloads: one multi-ticker request per chunk, chunks in a bounded pool.
+
+    Requests go through the "history"/"info" endpoints of throttle.py (rate budget, adaptive
+    concurrency, jittered retries, circuit breaker). client stands in for yfinance in tests.
+    """
+
+    def __init__(self, chunk_size=40, max_workers=8, client=None):
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers  # upper bound; the endpoint's adaptive limit decides how many run
+        self.client = client or yf
+
+    def _fetch(self, symbols, interval, span):
+        with stage(f"yahoo.history.{interval}") as h:
+            raw = self.client.download(tickers=symbols, interval=interval, group_by="ticker",
+                                       auto_adjust=True, threads=False, progress=False, **span)
+            if raw is not None: h.bytes += int(raw.memory_usage(deep=False).sum())
+        out = {}
+        if raw is None or raw.empty: return out
+        if isinstance(raw.columns, pd.MultiIndex):
+            for sym in symbols:
+                if sym in raw.columns.get_level_values(0):
+                    out[sym] = _clean(raw[sym])
+        elif len(symbols) == 1:
+            out[symbols[0]] = _clean(raw)
+        return {s: df for s, df in out.items() if not df.empty}
+
+    def _download(self, chunk, period, interval, start=None):
+        """({symbol: frame}, {symbol: reason}) for one chunk; retries ask again only for what is still missing."""
+        span = {"start": start} if start is not None else {"period": period}
+        out, todo = {}, list(chunk)
+        def attempt():
+            got, throttled = _watched(self._fetch, todo, interval, span)
+            out.update(got)
+            todo[:] = [s for s in todo if s not in out]
+            if throttled and todo: raise Throttled(f"{len(todo)} of {len(chunk)} symbols rate limited")
+        err = None
+        try: get_endpoint("history").call(attempt)
+        except Exception as e: err = e
+        missing = {s: "no data" if err is None else _reason(err) for s in chunk if s not in out}
+        for sym in missing: fail(f"yahoo.history.{interval}", sym, err)
+        return out, missing
+
+    def history(self, symbols, period="1y", interval="1d", start=None):
+        symbols = list(dict.fromkeys(symbols))
+        frames, missing = {}, {}
+        if not symbols: return frames
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            jobs = [pool.submit(self._download, c, period, interval, start) for c in _chunks(symbols, self.chunk_size)]
+            for job in jobs:
+                got, miss = job.result()
+                frames.update(got); missing.update(miss)
+        report(f"history.{interval}", symbols, missing)
+        return frames
+
+    def _one_info(self, symbol):
+        def fetch():
+            with stage("yahoo.info", symbol): return self.client.Ticker(symbol).info or {}
+        try: return yahoo_call("info", fetch), None
+        except Exception as e:
+            fail("yahoo.info", symbol, e); return {}, _reason(e)
+
+    def info(self, symbols):
+        symbols = list(dict.fromkeys(symbols))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            got = dict(zip(symbols, pool.map(self._one_info, symbols)))
+        report("info", symbols, {s: r for s, (_, r) in got.items() if r})
+        return {s: i for s, (i, _) in got.items()}
+
+
+class FixtureProvider:
+    """Offline stand-in. Reads <root>/<interval>/<SYMBOL>.csv and <root>/info/<SYMBOL>.json."""
+
+    offline = True
+
+    def __init__(self, root):
+        self.root = root
+
+    def _load(self, symbol, period, interval, start=None):
+        path = os.path.join(self.root, interval, f"{symbol}.csv")
+        if not os.path.exists(path): return None
+        df = _clean(pd.read_csv(path, index_col=0, parse_dates=True))
+        if df.empty: return df
+        if start is not None:
+            start = pd.Timestamp(start)
+            if df.index.tz is None and start.tz is not None: start = start.tz_convert(None)
+            elif df.index.tz is not None and start.tz is None: start = start.tz_localize(df.index.tz)
+            return df[df.index >= start]
+        return trim_period(df, period)
+
+    def history(self, symbols, period="1y", interval="1d", start=None):
+        frames = {}
+        for s in dict.fromkeys(symbols):
+            df = self._load(s, period, interval, start)
+            if df is not None and not df.empty: frames[s] = df
+        return frames
+
+    def info(self, symbols):
+        out = {}
+        for s in dict.fromkeys(symbols):
+            path = os.path.join(self.root, "info", f"{s}.json")
+            try:
+                with open(path) as fh: out[s] = json.load(fh)
+            except Exception: out[s] = {}
+        return out
+
+
+# --- ACTIVE PROVIDER ---
+# MARKET_AI_FIXTURES=<dir> switches the whole app to the offline fixture provider.
+# Yahoo data goes through the on-disk bar cache unless MARKET_AI_CACHE=off.
+_provider = None
+
+def get_provider():
+    global _provider
+    if _provider is None:
+        root = os.environ.get("MARKET_AI_FIXTURES")
+        if root: _provider = FixtureProvider(root)
+        elif os.environ.get("MARKET_AI_CACHE", "on").lower() in ("off", "0", "false"): _provider = YahooProvider()
+        else:
+            from ohlcv_cache import CachedProvider
+            _provider = CachedProvider(YahooProvider())
+    return _provider
+
+def set_provider(provider):
+    global _provider
+    _provider = provider
+
+
+def get_history(symbol, period="1y", interval="1d"):
+    df = get_provider().history([symbol], period=period, interval=interval).get(symbol)
+    return df if df is not None else pd.DataFrame(columns=OHLCV_COLS)
+
+
+# --- SCAN PREFETCH ---
+def prefetch_bundles(symbols, provider=None):
+    """Fetch everything the analyzer needs for a ticker list in bulk: {symbol: bundle}."""
+    p = provider or get_provider()
+    symbols = list(dict.fromkeys(symbols))
+    daily = p.history(symbols, period="1y", interval="1d")
+    intra = p.history(symbols, period="5d", interval="15m")
+    have = [s for s in symbols if s in daily]
+    if getattr(p, "offline", False): info = p.info(have)
+    else:
+        # Fundamentals come from the local store (TTL in days), not a stock.info call per scan
+        from fundamentals import get_store
+        info = get_store().info(have)
+    return {
+        s: {"daily": daily[s], "intra": intra.get(s), "info": info.get(s, {})}
+        for s in symbols if s in daily
+    }
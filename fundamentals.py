@@ -0,0 +1,206 @@
+import os
+import sys
+import json
+import time
+import queue
+import sqlite3
+import argparse
+import threading
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from metrics import stage
+
+# ==========================================
+# 💎 FUNDAMENTALS STORE
+# ==========================================
+# Fundamentals move quarterly, so they live in a local SQLite store with
+# per-symbol TTLs in days instead of being refetched on every scan/rerun.
+#   info   -> the few stock.info fields the F_Fund / F_Jackpot checks read
+#   result -> the "Result Magic" YoY classification text
+# Readers never wait on the network for a stale row: they get the stored value
+# and the symbol is queued for the background refresher. Only symbols never
+# seen before are fetched inline (once) when asked with fetch_missing=True.
+# Only successful fetches are stored. A failed one keeps the old value and
+# comes due again after RETRY_SECONDS instead of caching a blank for the TTL.
+
+INFO_FIELDS = ["trailingPE", "forwardPE", "returnOnEquity", "marketCap", "sector"]
+DEFAULT_STORE_PATH = os.path.join(".market_cache", "fundamentals.sqlite")
+DAY = 86400
+RETRY_SECONDS = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fundamentals (
+    symbol TEXT PRIMARY KEY,
+    info TEXT, info_at REAL,
+    result TEXT, result_at REAL
+);
+"""
+
+# Fetchers leave out (info) or return None for (result) symbols they could not fetch
+def _default_info_fetch(symbols):
+    from data_provider import get_provider
+    from throttle import collect
+    with collect() as status: info = get_provider().info(symbols)
+    failed = status.symbols()  # throttled, circuit open or network error: not an answer
+    return {s: i for s, i in info.items() if s not in failed}
+
+def _default_result_fetch(symbol):
+    from scanner_core import predict_results
+    return predict_results(symbol)
+
+
+class FundamentalsStore:
+    def __init__(self, path=None, info_ttl_days=3, result_ttl_days=7, info_fetch=None, result_fetch=None, max_workers=4,
+                 retry_seconds=RETRY_SECONDS):
+        self.path = path or os.environ.get("MARKET_AI_FUNDAMENTALS_PATH", DEFAULT_STORE_PATH)
+        d = os.path.dirname(self.path)
+        if d: os.makedirs(d, exist_ok=True)
+        self.info_ttl = info_ttl_days * DAY
+        self.result_ttl = result_ttl_days * DAY
+        self.info_fetch = info_fetch or _default_info_fetch
+        self.result_fetch = result_fetch or _default_result_fetch
+        self.max_workers = max_workers
+        self.retry_seconds = retry_seconds
+        self._queue = queue.Queue(); self._queued = set(); self._lock = threading.Lock()
+        self._worker = None
+        with closing(self._connect()) as con, con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _rows(self, symbols):
+        out = {}
+        with closing(self._connect()) as con, con:
+            for s in symbols:
+                r = con.execute("SELECT info, info_at, result, result_at FROM fundamentals WHERE symbol=?", (s,)).fetchone()
+                if r: out[s] = r
+        return out
+
+    # --- READS (instant) ---
+    def info(self, symbols, fetch_missing=True):
+        symbols = list(dict.fromkeys(symbols))
+        rows = self._rows(symbols); now = time.time()
+        out = {}; missing = []; stale = []
+        for s in symbols:
+            r = rows.get(s)
+            if r is not None and r[0] is None and now - (r[1] or 0) <= self.info_ttl: continue  # failed lately, retry pending
+            if r is None or r[0] is None: missing.append(s); continue
+            out[s] = json.loads(r[0])
+            if now - (r[1] or 0) > self.info_ttl: stale.append(s)
+        if missing and fetch_missing: out.update(self.refresh_info(missing))
+        elif missing: stale += missing
+        self.request(stale, "info")
+        return out
+
+    def results(self, symbols):
+        """Stored YoY texts; missing/stale symbols are queued, never fetched inline."""
+        symbols = list(dict.fromkeys(symbols))
+        rows = self._rows(symbols); now = time.time()
+        out = {}; todo = []
+        for s in symbols:
+            r = rows.get(s)
+            if r is not None and r[2] is None and now - (r[3] or 0) <= self.result_ttl: continue
+            if r is None or r[2] is None: todo.append(s); continue
+            out[s] = r[2]
+            if now - (r[3] or 0) > self.result_ttl: todo.append(s)
+        self.request(todo, "result")
+        return out
+
+    # --- BATCH REFRESH ---
+    def _retry_later(self, con, symbol, kind, ttl, now):
+        """Failed fetch: keep the stored value, due again in retry_seconds."""
+        con.execute(f"INSERT INTO fundamentals (symbol, {kind}_at) VALUES (?,?) "
+                    f"ON CONFLICT(symbol) DO UPDATE SET {kind}_at=excluded.{kind}_at",
+                    (symbol, now - ttl + self.retry_seconds))
+
+    def refresh_info(self, symbols):
+        if not symbols: return {}
+        with stage("fundamentals.info"): fetched = self.info_fetch(symbols)
+        now = time.time(); out = {}
+        with closing(self._connect()) as con, con:
+            for s in symbols:
+                info = fetched.get(s)
+                if info is None:
+                    self._retry_later(con, s, "info", self.info_ttl, now); continue
+                out[s] = {k: info[k] for k in INFO_FIELDS if k in info}
+                con.execute("INSERT INTO fundamentals (symbol, info, info_at) VALUES (?,?,?) "
+                            "ON CONFLICT(symbol) DO UPDATE SET info=excluded.info, info_at=excluded.info_at",
+                            (s, json.dumps(out[s]), now))
+        return out
+
+    def refresh_results(self, symbols):
+        if not symbols: return {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            with stage("fundamentals.results"): texts = dict(zip(symbols, pool.map(self.result_fetch, symbols)))
+        now = time.time()
+        with closing(self._connect()) as con, con:
+            for s, txt in texts.items():
+                if txt is None:
+                    self._retry_later(con, s, "result", self.result_ttl, now); continue
+                con.execute("INSERT INTO fundamentals (symbol, result, result_at) VALUES (?,?,?) "
+                            "ON CONFLICT(symbol) DO UPDATE SET result=excluded.result, result_at=excluded.result_at",
+                            (s, txt, now))
+        return {s: t for s, t in texts.items() if t is not None}
+
+    # --- BACKGROUND REFRESHER ---
+    def request(self, symbols, kind):
+        with self._lock:
+            for s in symbols:
+                if (s, kind) not in self._queued:
+                    self._queued.add((s, kind)); self._queue.put((s, kind))
+        if symbols: self.start_background()
+
+    def start_background(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._drain, name="fundamentals-refresh", daemon=True)
+                self._worker.start()
+
+    def _drain(self, batch_size=25):
+        while True:
+            try: first = self._queue.get(timeout=30)
+            except queue.Empty: return
+            batch = [first]
+            while len(batch) < batch_size:
+                try: batch.append(self._queue.get_nowait())
+                except queue.Empty: break
+            for kind in ("info", "result"):
+                syms = [s for s, k in batch if k == kind]
+                try:
+                    if kind == "info": self.refresh_info(syms)
+                    else: self.refresh_results(syms)
+                except Exception: pass
+            with self._lock:
+                self._queued.difference_update(batch)
+
+
+_store = None
+
+def get_store():
+    global _store
+    if _store is None: _store = FundamentalsStore()
+    return _store
+
+
+# --- SCHEDULED BATCH JOB ---
+# python fundamentals.py --list all          (e.g. nightly from cron)
+def main(argv=None):
+    from scanner_core import STOCK_LISTS
+    ap = argparse.ArgumentParser(description="Refresh the local fundamentals store.")
+    ap.add_argument("--list", choices=sorted(STOCK_LISTS), default="all")
+    ap.add_argument("--only-stale", action="store_true", help="skip rows still inside their TTL")
+    args = ap.parse_args(argv)
+    store = get_store(); symbols = STOCK_LISTS[args.list]
+    if args.only_stale:
+        rows = store._rows(symbols); now = time.time()
+        info_syms = [s for s in symbols if s not in rows or now - (rows[s][1] or 0) > store.info_ttl]
+        res_syms = [s for s in symbols if s not in rows or now - (rows[s][3] or 0) > store.result_ttl]
+    else: info_syms = res_syms = symbols
+    store.refresh_info(info_syms); store.refresh_results(res_syms)
+    print(f"Refreshed info for {len(info_syms)} and results for {len(res_syms)} symbols", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# ⚡ VECTORIZED INDICATOR ENGINE
+# ==========================================
+# Works on a (n_symbols, n_bars) panel: every symbol's history is right-aligned
+# so column -1 is each symbol's latest bar, with NaN padding on the left for
+# shorter histories. Formulas follow pandas_ta defaults (RMA smoothing for
+# RSI/ATR/ADX, Supertrend 7x3, PSAR 0.02/0.2) so the F_* flags stay the same.
+# Recursive indicators (RMA, Supertrend, PSAR) loop over time only; each
+# step is one numpy op across the whole universe.
+
+PANEL_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+def build_panel(frames, n_bars=None):
+    """{symbol: OHLCV DataFrame} -> (symbols, {field: 2D array})."""
+    symbols = [s for s, df in frames.items() if df is not None and not df.empty]
+    if n_bars is None: n_bars = max((len(frames[s]) for s in symbols), default=0)
+    panel = {f: np.full((len(symbols), n_bars), np.nan) for f in PANEL_FIELDS}
+    for r, s in enumerate(symbols):
+        df = frames[s].iloc[-n_bars:]
+        k = len(df)
+        if k == 0: continue
+        for f in PANEL_FIELDS:
+            panel[f][r, n_bars - k:] = df[f].to_numpy(dtype=float)
+    return symbols, panel
+
+def _shift(x, n=1):
+    out = np.full_like(x, np.nan)
+    if n < x.shape[1]: out[:, n:] = x[:, :-n]
+    return out
+
+# --- PRIMITIVES ---
+def sma(x, length):
+    valid = ~np.isnan(x)
+    c = np.cumsum(np.where(valid, x, 0.0), axis=1)
+    n = np.cumsum(valid, axis=1)
+    c = np.concatenate([np.zeros((x.shape[0], 1)), c], axis=1)
+    n = np.concatenate([np.zeros((x.shape[0], 1)), n], axis=1)
+    out = np.full_like(x, np.nan)
+    if x.shape[1] >= length:
+        s = c[:, length:] - c[:, :-length]
+        full = (n[:, length:] - n[:, :-length]) == length
+        out[:, length - 1:] = np.where(full, s / length, np.nan)
+    return out
+
+def rma(x, length):
+    # pandas ewm(alpha=1/length, min_periods=length, adjust=True) as used by pandas_ta
+    decay = 1.0 - 1.0 / length
+    num = np.zeros(x.shape[0]); den = np.zeros(x.shape[0]); cnt = np.zeros(x.shape[0])
+    out = np.full_like(x, np.nan)
+    for t in range(x.shape[1]):
+        v = x[:, t]; ok = ~np.isnan(v)
+        num = num * decay + np.where(ok, v, 0.0)
+        den = den * decay + ok
+        cnt = cnt + ok
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[:, t] = np.where(cnt >= length, num / den, np.nan)
+    return out
+
+def ema(x, length):
+    # pandas_ta ema: SMA seed over the first `length` bars, then adjust=False recursion
+    alpha = 2.0 / (length + 1)
+    out = np.full_like(x, np.nan)
+    prev = np.full(x.shape[0], np.nan); cnt = np.zeros(x.shape[0]); acc = np.zeros(x.shape[0])
+    for t in range(x.shape[1]):
+        v = x[:, t]; ok = ~np.isnan(v)
+        cnt = cnt + ok; acc = acc + np.where(ok, v, 0.0)
+        seed = ok & (cnt == length)
+        step = ok & (cnt > length)
+        prev = np.where(seed, acc / length, prev)
+        prev = np.where(step, alpha * v + (1 - alpha) * prev, prev)
+        out[:, t] = np.where(cnt >= length, prev, np.nan)
+    return out
+
+def rsi(close, length=14):
+    d = close - _shift(close)
+    pos = np.where(d > 0, d, np.where(np.isnan(d), np.nan, 0.0))
+    neg = np.where(d < 0, -d, np.where(np.isnan(d), np.nan, 0.0))
+    pa = rma(pos, length); na = rma(neg, length)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return 100.0 * pa / (pa + na)
+
+def true_range(high, low, close):
+    pc = _shift(close)
+    tr = np.fmax(np.fmax(high - low, np.abs(high - pc)), np.abs(pc - low))
+    tr[:, 0] = np.nan
+    return np.where(np.isnan(pc), np.nan, tr)
+
+def atr(high, low, close, length=14):
+    return rma(true_range(high, low, close), length)
+
+def adx(high, low, close, length=14):
+    up = high - _shift(high); dn = _shift(low) - low
+    pos = np.where(np.isnan(up) | np.isnan(dn), np.nan, np.where((up > dn) & (up > 0), up, 0.0))
+    neg = np.where(np.isnan(up) | np.isnan(dn), np.nan, np.where((dn > up) & (dn > 0), dn, 0.0))
+    a = atr(high, low, close, length)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dmp = 100.0 * rma(pos, length) / a
+        dmn = 100.0 * rma(neg, length) / a
+        dx = 100.0 * np.abs(dmp - dmn) / (dmp + dmn)
+    return rma(dx, length)
+
+def supertrend(high, low, close, length=7, multiplier=3.0):
+    """Returns (direction, trend line); direction is +1 / -1 per bar."""
+    hl2 = (high + low) / 2.0
+    a = atr(high, low, close, length)
+    upper = hl2 + multiplier * a
+    lower = hl2 - multiplier * a
+    n, T = close.shape
+    direction = np.ones((n, T))
+    for t in range(1, T):
+        c = close[:, t]; up_p = upper[:, t - 1]; lo_p = lower[:, t - 1]
+        brk_up = c > up_p; brk_dn = c < lo_p
+        d = np.where(brk_up, 1.0, np.where(brk_dn, -1.0, direction[:, t - 1]))
+        hold = ~brk_up & ~brk_dn
+        lower[:, t] = np.where(hold & (d > 0) & (lower[:, t] < lo_p), lo_p, lower[:, t])
+        upper[:, t] = np.where(hold & (d < 0) & (upper[:, t] > up_p), up_p, upper[:, t])
+        direction[:, t] = d
+    trend = np.where(direction > 0, lower, upper)
+    return direction, trend
+
+def psar(high, low, close, af0=0.02, af_step=0.02, max_af=0.2):
+    """Returns (sar, falling) per bar; falling=True means the SAR sits above price."""
+    n, T = close.shape
+    sar_out = np.full((n, T), np.nan); falling_out = np.zeros((n, T), dtype=bool)
+    valid = ~np.isnan(close)
+    start = np.where(valid.any(axis=1), valid.argmax(axis=1), T)
+    rows = np.arange(n)
+    s1 = np.minimum(start + 1, T - 1); s0 = np.minimum(start, T - 1)
+    # Initial trend from the first two bars' directional movement
+    up0 = high[rows, s1] - high[rows, s0]; dn0 = low[rows, s0] - low[rows, s1]
+    falling = (dn0 > up0) & (dn0 > 0)
+    sar = close[rows, s0].copy()
+    ep = np.where(falling, low[rows, s0], high[rows, s0])
+    af = np.full(n, af0)
+    for t in range(1, T):
+        act = t > start
+        if not act.any(): continue
+        h = high[:, t]; l = low[:, t]
+        hp1 = high[:, t - 1]; lp1 = low[:, t - 1]
+        # pandas_ta reads high.iloc[row - 2] from row 1 on: on the first step that is the series' last bar
+        hp2 = np.where(t - 2 >= start, high[:, max(t - 2, 0)], high[:, -1])
+        lp2 = np.where(t - 2 >= start, low[:, max(t - 2, 0)], low[:, -1])
+        nxt = sar + af * (ep - sar)
+        reverse = np.where(falling, h > nxt, l < nxt)
+        new_ext = np.where(falling, l < ep, h > ep)
+        ep_n = np.where(new_ext, np.where(falling, l, h), ep)
+        af_n = np.where(new_ext, np.minimum(af + af_step, max_af), af)
+        nxt = np.where(falling, np.fmax(np.fmax(hp1, hp2), nxt), np.fmin(np.fmin(lp1, lp2), nxt))
+        # Reversal: SAR jumps to the extreme point and the acceleration resets
+        nxt = np.where(reverse, ep_n, nxt)
+        fall_n = np.where(reverse, ~falling, falling)
+        ep_n = np.where(reverse, np.where(fall_n, l, h), ep_n)
+        af_n = np.where(reverse, af0, af_n)
+        sar = np.where(act, nxt, sar); ep = np.where(act, ep_n, ep)
+        af = np.where(act, af_n, af); falling = np.where(act, fall_n, falling)
+        sar_out[:, t] = np.where(act, sar, np.nan)
+        falling_out[:, t] = falling & act
+    return sar_out, falling_out
+
+
+# --- FEATURE MATRIX ---
+def compute_indicators(panel):
+    """Full (n_symbols, n_bars) indicator arrays for a daily panel."""
+    o, h, l, c, v = (panel[f] for f in PANEL_FIELDS)
+    st_dir, _ = supertrend(h, l, c, length=7, multiplier=3)
+    sar, _ = psar(h, l, c)
+    return {
+        "close": c, "open": o, "high": h, "low": l, "volume": v,
+        "sma20": sma(c, 20), "sma200": sma(c, 200), "rsi": rsi(c, 14),
+        "vol_avg": sma(v, 10), "adx": adx(h, l, c, 14), "atr": atr(h, l, c, 14),
+        "st_dir": st_dir, "sar": sar,
+    }
+
+def latest_features(symbols, ind):
+    """Last-bar feature matrix (one row per symbol) read by the F_* flag logic."""
+    c = ind["close"]
+    with np.errstate(invalid="ignore"):
+        feats = {
+            "close": c[:, -1], "prev_close": c[:, -2], "close_20": c[:, -20], "open": ind["open"][:, -1],
+            "sma20": ind["sma20"][:, -1], "sma200": ind["sma200"][:, -1], "rsi": ind["rsi"][:, -1],
+            "volume": ind["volume"][:, -1], "vol_avg": ind["vol_avg"][:, -1],
+            "adx": np.nan_to_num(ind["adx"][:, -1], nan=0.0), "atr": np.nan_to_num(ind["atr"][:, -1], nan=0.0),
+            "st_dir": ind["st_dir"][:, -1], "sar": ind["sar"][:, -1],
+            "high_max": np.nanmax(ind["high"], axis=1), "low_min": np.nanmin(ind["low"], axis=1),
+        }
+    return pd.DataFrame(feats, index=symbols)
+
+def daily_feature_table(frames):
+    symbols, panel = build_panel(frames)
+    if not symbols: return pd.DataFrame()
+    return latest_features(symbols, compute_indicators(panel))
@@ -0,0 +1,242 @@
+import os
+import time
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+import pandas as pd
+from metrics import stage
+
+# ==========================================
+# 📒 TRADE LEDGER (local source of truth)
+# ==========================================
+# Every trade is one row appended to `events` inside a single IMMEDIATE
+# transaction that also updates the materialised `positions` / `accounts`
+# rows, so two sessions trading the same account can never lose an update.
+# An account is keyed by its Google Sheet URL. The sheet becomes a mirror:
+# SheetsSyncer pushes the latest state of every dirty account in the
+# background, coalescing any number of trades into one write per worksheet.
+# An account only exists once it was seeded from its sheet: trades on an
+# unseeded account are refused (NotSeeded) and only seeded accounts are ever
+# pushed, so a failed sheet read can never overwrite the real sheet.
+
+DEFAULT_LEDGER_PATH = os.path.join(".market_cache", "ledger.sqlite")
+START_CASH = 1000000.0
+HOLDING_COLS = ['Symbol', 'Buy_Price', 'Qty', 'Category', 'Date']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account TEXT NOT NULL, ts REAL NOT NULL, kind TEXT NOT NULL,
+    symbol TEXT, qty INTEGER, price REAL, category TEXT, cash_after REAL
+);
+CREATE TABLE IF NOT EXISTS positions (
+    account TEXT NOT NULL, symbol TEXT NOT NULL,
+    qty INTEGER NOT NULL, buy_price REAL NOT NULL, category TEXT, date TEXT,
+    PRIMARY KEY (account, symbol)
+);
+CREATE TABLE IF NOT EXISTS accounts (
+    account TEXT PRIMARY KEY, cash REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0, synced_version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS events_account_kind ON events (account, kind);
+"""
+_SEEDED = "EXISTS (SELECT 1 FROM events e WHERE e.account = accounts.account AND e.kind = 'seed')"
+
+
+class NotSeeded(RuntimeError):
+    """The account was never imported from its sheet, so its real state is unknown."""
+
+
+class Ledger:
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("MARKET_AI_LEDGER_PATH", DEFAULT_LEDGER_PATH)
+        d = os.path.dirname(self.path)
+        if d: os.makedirs(d, exist_ok=True)
+        with closing(self._connect()) as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(_SCHEMA)
+
+    def _connect(self):
+        # isolation_level=None: transactions are opened explicitly with BEGIN IMMEDIATE
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _txn(self, fn):
+        con = self._connect()
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            try: out = fn(con)
+            except Exception:
+                con.execute("ROLLBACK"); raise
+            con.execute("COMMIT")
+            return out
+        finally: con.close()
+
+    @staticmethod
+    def _event(con, account, kind, symbol=None, qty=None, price=None, category=None, cash_after=None):
+        con.execute("INSERT INTO events (account, ts, kind, symbol, qty, price, category, cash_after) VALUES (?,?,?,?,?,?,?,?)",
+                    (account, time.time(), kind, symbol, qty, price, category, cash_after))
+        con.execute("UPDATE accounts SET version = version + 1 WHERE account=?", (account,))
+
+    @staticmethod
+    def _cash(con, account):
+        r = con.execute(f"SELECT cash FROM accounts WHERE account=? AND {_SEEDED}", (account,)).fetchone()
+        if r is None: raise NotSeeded(account)
+        return r[0]
+
+    # --- READS ---
+    def has_account(self, account):
+        """True once the account was seeded from its sheet."""
+        with closing(self._connect()) as con:
+            return con.execute(f"SELECT 1 FROM accounts WHERE account=? AND {_SEEDED}", (account,)).fetchone() is not None
+
+    @staticmethod
+    def _read(con, account):
+        r = con.execute("SELECT cash, version FROM accounts WHERE account=?", (account,)).fetchone()
+        rows = con.execute("SELECT symbol, qty, buy_price, category, date FROM positions WHERE account=? ORDER BY rowid",
+                           (account,)).fetchall()
+        h_dict = {s: {'qty': int(q), 'buy_price': float(p), 'category': str(c), 'date': str(d)} for s, q, p, c, d in rows}
+        return (r[1] if r else 0), {"balance": float(r[0]) if r else START_CASH, "holdings": h_dict}
+
+    def portfolio(self, account):
+        """Same shape as load_data_from_sheets(): {"balance", "holdings": {sym: {...}}}."""
+        con = self._connect()
+        try: return self._read(con, account)[1]
+        finally: con.close()
+
+    # --- WRITES (one transaction each) ---
+    def seed(self, account, portfolio):
+        """Import an account's current state (e.g. from its sheet) unless the ledger already has it seeded."""
+        def fn(con):
+            if con.execute(f"SELECT 1 FROM accounts WHERE account=? AND {_SEEDED}", (account,)).fetchone(): return False
+            # Rows made before seeding (older versions traded on a default account) are not the user's: replace them
+            con.execute("DELETE FROM positions WHERE account=?", (account,))
+            con.execute("DELETE FROM accounts WHERE account=?", (account,))
+            con.execute("INSERT INTO accounts (account, cash) VALUES (?,?)", (account, float(portfolio["balance"])))
+            for s, v in portfolio["holdings"].items():
+                con.execute("INSERT INTO positions VALUES (?,?,?,?,?,?)", (account, s, int(v['qty']), float(v['buy_price']), v['category'], v['date']))
+            self._event(con, account, "seed", cash_after=float(portfolio["balance"]))
+            # The sheet already holds this state
+            con.execute("UPDATE accounts SET synced_version = version WHERE account=?", (account,))
+            return True
+        return self._txn(fn)
+
+    def buy(self, account, symbol, qty, price, category):
+        def fn(con):
+            cash = self._cash(con, account)
+            cost = qty * price
+            if cash < cost: return False
+            today_date = datetime.now().strftime("%d-%m-%Y")
+            pos = con.execute("SELECT qty, buy_price FROM positions WHERE account=? AND symbol=?", (account, symbol)).fetchone()
+            if pos:
+                new_qty = pos[0] + qty
+                new_avg = ((pos[0] * pos[1]) + cost) / new_qty
+                con.execute("UPDATE positions SET qty=?, buy_price=?, category=?, date=? WHERE account=? AND symbol=?",
+                            (new_qty, new_avg, category, today_date, account, symbol))
+            else:
+                con.execute("INSERT INTO positions VALUES (?,?,?,?,?,?)", (account, symbol, int(qty), float(price), category, today_date))
+            con.execute("UPDATE accounts SET cash=? WHERE account=?", (cash - cost, account))
+            self._event(con, account, "buy", symbol, int(qty), float(price), category, cash - cost)
+            return True
+        return self._txn(fn)
+
+    def sell(self, account, symbol, live_price):
+        def fn(con):
+            cash = self._cash(con, account)
+            pos = con.execute("SELECT qty FROM positions WHERE account=? AND symbol=?", (account, symbol)).fetchone()
+            if not pos: return False
+            cash += pos[0] * live_price
+            con.execute("DELETE FROM positions WHERE account=? AND symbol=?", (account, symbol))
+            con.execute("UPDATE accounts SET cash=? WHERE account=?", (cash, account))
+            self._event(con, account, "sell", symbol, int(pos[0]), float(live_price), None, cash)
+            return True
+        return self._txn(fn)
+
+    def reset(self, account, cash=START_CASH):
+        def fn(con):
+            self._cash(con, account)
+            con.execute("UPDATE accounts SET cash=? WHERE account=?", (cash, account))
+            con.execute("DELETE FROM positions WHERE account=?", (account,))
+            self._event(con, account, "reset", cash_after=cash)
+        self._txn(fn)
+
+    # --- SYNC BOOKKEEPING ---
+    def dirty(self):
+        with closing(self._connect()) as con:
+            return [r[0] for r in con.execute(f"SELECT account FROM accounts WHERE version > synced_version AND {_SEEDED}")]
+
+    def snapshot(self, account):
+        """(version, holdings_df, balance_df) in the sheet's own layout."""
+        con = self._connect()
+        try:
+            con.execute("BEGIN")  # one read snapshot for version + rows
+            version, pf = self._read(con, account)
+            con.execute("COMMIT")
+        finally: con.close()
+        holdings_df = pd.DataFrame([[s, v['buy_price'], v['qty'], v['category'], v['date']] for s, v in pf['holdings'].items()],
+                                   columns=HOLDING_COLS)
+        balance_df = pd.DataFrame([[pf['balance']]], columns=['Cash'])
+        return version, holdings_df, balance_df
+
+    def mark_synced(self, account, version):
+        with closing(self._connect()) as con:
+            con.execute("UPDATE accounts SET synced_version=MAX(synced_version, ?) WHERE account=?", (version, account))
+
+
+class SheetsSyncer:
+    """Mirrors dirty ledger accounts to their Portfolio/Balance worksheets from a background thread."""
+
+    def __init__(self, ledger, conn, interval=2.0, max_backoff=60.0):
+        self.ledger = ledger; self.conn = conn
+        self.interval = interval; self.max_backoff = max_backoff
+        self._wake = threading.Event(); self._lock = threading.Lock()
+        self._thread = None
+
+    def push(self, account):
+        version, holdings_df, balance_df = self.ledger.snapshot(account)
+        with stage("sheets.sync"):
+            self.conn.update(spreadsheet=account, worksheet="Portfolio", data=holdings_df)
+            self.conn.update(spreadsheet=account, worksheet="Balance", data=balance_df)
+        self.ledger.mark_synced(account, version)
+
+    def sync_once(self):
+        """Push every dirty account once; returns the accounts that failed."""
+        failed = []
+        for account in self.ledger.dirty():
+            try: self.push(account)
+            except Exception: failed.append(account)
+        return failed
+
+    def notify(self):
+        self._wake.set()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="sheets-sync", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        delay = None; retry = self.interval
+        while True:
+            self._wake.wait(timeout=delay)
+            self._wake.clear()
+            # Short settle so a burst of clicks becomes one write
+            time.sleep(self.interval)
+            if self.sync_once():
+                # Sheets unreachable / quota: the ledger keeps the trades, retry with backoff
+                delay = retry; retry = min(retry * 2, self.max_backoff)
+            else: delay = None; retry = self.interval
+
+
+_ledger = None
+_syncer = None
+
+def get_ledger():
+    global _ledger
+    if _ledger is None: _ledger = Ledger()
+    return _ledger
+
+def get_syncer(conn):
+    global _syncer
+    if _syncer is None: _syncer = SheetsSyncer(get_ledger(), conn)
+    else: _syncer.conn = conn
+    return _syncer
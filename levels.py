@@ -0,0 +1,214 @@
+import threading
+import numpy as np
+import pandas as pd
+from metrics import record
+
+# ==========================================
+# 🧲 PIVOTS, S/R ZONES & PRICE-LEVEL INDEX
+# ==========================================
+# Same pivots as argrelextrema(order=5) on the daily Low/High, but kept per
+# symbol and updated only for the bars that changed:
+#   - a bar whose whole +/-order window is made of closed bars is decided for
+#     good and stored by timestamp (the forming last bar is never relied on)
+#   - only the newly closed bars, the last `order` bars and the first `order`
+#     bars (clipped window at the frame start) are re-checked per scan
+#   - the decided bars' Low/High are kept and compared with the new frame, so
+#     any edit to them (split, correction, longer frame) rebuilds
+# Pivot prices are clustered into support (lows) and resistance (highs) zones.
+# LevelIndex concatenates every symbol's zones into one array sorted by
+# (symbol, log price), so "who is within X% of a support zone" is a single
+# searchsorted over the universe.
+
+ORDER = 5
+ZONE_PCT = 1.0   # pivots closer than this (%) merge into one zone
+_KEY_SPAN = 64.0  # room per symbol in the sorted key: log(price) stays well inside
+
+
+def find_pivots(x, pos, order=ORDER, cmp=np.less):
+    """Positions in pos that are extrema of x, with argrelextrema's clip semantics."""
+    x = np.asarray(x, dtype=float); pos = np.asarray(pos, dtype=np.int64)
+    if len(pos) == 0: return pos
+    k = np.arange(1, order + 1)
+    nb = x[np.clip(np.concatenate([pos[:, None] - k, pos[:, None] + k], axis=1), 0, len(x) - 1)]
+    return pos[cmp(x[pos][:, None], nb).all(axis=1)]
+
+
+def _ns(idx):
+    """Epoch nanoseconds (UTC) of a DatetimeIndex, whatever its unit or tz."""
+    return idx.values.astype("datetime64[ns]").view(np.int64)
+
+def _positions(t, ns):
+    """Positions of ns timestamps in the sorted int64 array t (-1 when absent)."""
+    ns = np.asarray(ns, dtype=np.int64)
+    if len(t) == 0: return np.full(len(ns), -1, dtype=np.int64)
+    pos = np.minimum(np.searchsorted(t, ns), len(t) - 1)
+    return np.where(t[pos] == ns, pos, -1)
+
+
+class PivotTracker:
+    def __init__(self, order=ORDER):
+        self.order = order
+        self.confirmed = {"min": np.zeros(0, dtype=np.int64), "max": np.zeros(0, dtype=np.int64)}  # ns timestamps
+        self.decided = None  # (ns, low, high) arrays of the bars decided so far
+
+    def _anchor_pos(self, t, lows, highs):
+        """Position of the last decided bar in this frame, or None when any decided bar in it changed."""
+        if self.decided is None: return None
+        dt, dl, dh = self.decided
+        pos = _positions(t, dt[-1:])[0]; k = pos + 1
+        if pos < 0 or k > len(dt): return None  # gone, or the frame now starts before the decided history
+        same = (np.array_equal(dt[-k:], t[:k]) and np.array_equal(dl[-k:], lows[:k], equal_nan=True)
+                and np.array_equal(dh[-k:], highs[:k], equal_nan=True))
+        return pos if same else None
+
+    def _store(self, t, lows, highs, found, upto):
+        """Keep the decided pivots (left window complete, right window closed) and move the anchor to upto."""
+        o = self.order
+        for side in ("min", "max"):
+            p = found[side]; p = p[(p >= o) & (p <= upto)]
+            c = self.confirmed[side]
+            self.confirmed[side] = np.concatenate([c[c >= t[0]], t[p]]) if len(p) or (len(c) and c[0] < t[0]) else c
+        k = upto + 1
+        self.decided = (t[:k].copy(), np.array(lows[:k], dtype=float), np.array(highs[:k], dtype=float)) if k > 0 else None
+
+    def update(self, index, lows, highs):
+        """(min_idx, max_idx) for a frame's index/Low/High, re-checking only the bars that are not decided yet."""
+        t = _ns(index); n = len(t); o = self.order
+        upto = n - 2 - o  # last bar whose window ends before the forming bar
+        pos = self._anchor_pos(t, lows, highs) if n else None
+        if pos is None:
+            record("pivots.rebuild")
+            self.confirmed = {"min": np.zeros(0, dtype=np.int64), "max": np.zeros(0, dtype=np.int64)}
+            new = np.arange(n)
+        else:
+            new = np.arange(max(pos + 1, o), n)
+        # The first `order` bars are re-checked with the others (their window is clipped at the frame start)
+        check = np.concatenate([np.arange(min(o, n)), new[new >= o]])
+        found = {"min": find_pivots(lows, check, o, np.less), "max": find_pivots(highs, check, o, np.greater)}
+        if pos is not None and pos >= upto:
+            upto = pos  # nothing new closed: keep the anchor
+        self._store(t, lows, highs, found, upto)
+        out = []
+        for side in ("min", "max"):
+            known = _positions(t, self.confirmed[side]); known = known[known >= o]
+            f = found[side]
+            # Disjoint parts: clipped start, decided, undecided (upto < o on very short frames)
+            out.append(np.sort(np.concatenate([f[f < o], known[known <= upto], f[f > max(upto, o - 1)]])))
+        return out[0], out[1]
+
+    def load(self, index, lows, highs, min_idx, max_idx):
+        """Take pivots computed elsewhere (a pool worker) for the same frame."""
+        self.confirmed = {"min": np.zeros(0, dtype=np.int64), "max": np.zeros(0, dtype=np.int64)}
+        found = {"min": np.asarray(min_idx, dtype=np.int64), "max": np.asarray(max_idx, dtype=np.int64)}
+        self._store(_ns(index), lows, highs, found, len(index) - 2 - self.order)
+
+
+def cluster_zones(prices, pct=ZONE_PCT):
+    """Sorted pivot prices -> zones as (lo, hi, touches) arrays; a zone grows while the next price is within pct of its low."""
+    p = np.sort(np.asarray(prices, dtype=float)); p = p[np.isfinite(p) & (p > 0)]
+    if len(p) == 0: return np.zeros(0), np.zeros(0), np.zeros(0, dtype=np.int64)
+    lo, hi, touches = [p[0]], [p[0]], [1]
+    for v in p[1:]:
+        if v <= lo[-1] * (1 + pct / 100): hi[-1] = v; touches[-1] += 1
+        else: lo.append(v); hi.append(v); touches.append(1)
+    return np.array(lo), np.array(hi), np.array(touches, dtype=np.int64)
+
+
+class LevelIndex:
+    """All zones of one kind across the universe, in one array sorted by (symbol, log price)."""
+
+    def __init__(self, zones):
+        self.symbols = sorted(zones)
+        self.sid = {s: i for i, s in enumerate(self.symbols)}
+        parts = [(i, *zones[s]) for i, s in enumerate(self.symbols) if len(zones[s][0])]
+        if parts:
+            self.owner = np.concatenate([np.full(len(z[1]), z[0]) for z in parts])
+            self.lo = np.concatenate([z[1] for z in parts]); self.hi = np.concatenate([z[2] for z in parts])
+            self.touches = np.concatenate([z[3] for z in parts])
+        else:
+            self.owner = np.zeros(0, dtype=np.int64); self.lo = self.hi = np.zeros(0); self.touches = np.zeros(0, dtype=np.int64)
+        self.keys = self.owner * _KEY_SPAN + np.log(self.lo) if len(self.lo) else np.zeros(0)
+
+    def __len__(self):
+        return len(self.lo)
+
+    def near(self, prices, pct, kind="support", min_touches=1):
+        """Symbols whose price is inside a zone or within pct% of it: support below the price, resistance above."""
+        syms = [s for s in prices if s in self.sid and prices[s] and prices[s] > 0]
+        cols = ["Symbol", "Price", "Zone_Low", "Zone_High", "Touches", "Distance_%"]
+        if not syms or not len(self.keys): return pd.DataFrame(columns=cols)
+        sid = np.array([self.sid[s] for s in syms]); p = np.array([prices[s] for s in syms], dtype=float)
+        j = np.searchsorted(self.keys, sid * _KEY_SPAN + np.log(p), side="right") - 1  # last zone starting at or below p
+        inside = (j >= 0) & (self.owner[np.maximum(j, 0)] == sid) & (p <= self.hi[np.maximum(j, 0)])
+        if kind == "support":
+            z = j; ok = (z >= 0) & (self.owner[np.maximum(z, 0)] == sid)
+            dist = np.where(inside, 0.0, (p / self.hi[np.maximum(z, 0)] - 1) * 100)
+        else:
+            z = np.where(inside, j, j + 1); ok = (z < len(self.keys)) & (self.owner[np.minimum(z, len(self.keys) - 1)] == sid)
+            z = np.minimum(z, len(self.keys) - 1)
+            dist = np.where(inside, 0.0, (self.lo[z] / p - 1) * 100)
+        z = np.maximum(z, 0)
+        ok &= (dist <= pct) & (self.touches[z] >= min_touches)
+        out = pd.DataFrame({"Symbol": np.array(syms, dtype=object)[ok], "Price": p[ok], "Zone_Low": self.lo[z[ok]],
+                            "Zone_High": self.hi[z[ok]], "Touches": self.touches[z[ok]], "Distance_%": dist[ok].round(2)})
+        return out.sort_values("Distance_%", kind="stable").reset_index(drop=True)
+
+
+class LevelStore:
+    """Per-symbol pivot trackers and zones, plus the universe index (rebuilt lazily after changes)."""
+
+    def __init__(self, order=ORDER, zone_pct=ZONE_PCT):
+        self.order = order; self.zone_pct = zone_pct
+        self.trackers = {}; self.zones = {}; self.last = {}
+        self._index = None; self._lock = threading.Lock()
+
+    def _set(self, symbol, lows, highs, close, min_idx, max_idx):
+        sup, res = lows[min_idx], highs[max_idx]
+        with self._lock:
+            self.last[symbol] = close
+            old = self.zones.get(symbol)
+            if old is not None and np.array_equal(old["pivots"][0], sup) and np.array_equal(old["pivots"][1], res): return
+        zones = {"support": cluster_zones(sup, self.zone_pct), "resistance": cluster_zones(res, self.zone_pct), "pivots": (sup, res)}
+        with self._lock:
+            self.zones[symbol] = zones; self._index = None
+
+    def _tracker(self, symbol):
+        with self._lock: return self.trackers.setdefault(symbol, PivotTracker(self.order))
+
+    def pivots(self, symbol, df, lows=None, highs=None):
+        """(min_idx, max_idx) of a daily frame; also refreshes the symbol's zones."""
+        lows = df['Low'].to_numpy(dtype=float) if lows is None else lows
+        highs = df['High'].to_numpy(dtype=float) if highs is None else highs
+        min_idx, max_idx = self._tracker(symbol).update(df.index, lows, highs)
+        self._set(symbol, lows, highs, float(df['Close'].iloc[-1]), min_idx, max_idx)
+        return min_idx, max_idx
+
+    def adopt(self, results):
+        """Register pivots that pool workers computed (parallel scans)."""
+        for r in results:
+            df = r.get("DF_Daily")
+            if df is None or df.empty: continue
+            lows = df['Low'].to_numpy(dtype=float); highs = df['High'].to_numpy(dtype=float)
+            min_idx = np.asarray(r["Min_Idx"], dtype=np.int64); max_idx = np.asarray(r["Max_Idx"], dtype=np.int64)
+            self._tracker(r["Symbol"]).load(df.index, lows, highs, min_idx, max_idx)
+            self._set(r["Symbol"], lows, highs, float(df['Close'].iloc[-1]), min_idx, max_idx)
+
+    def index(self):
+        with self._lock:
+            if self._index is None:
+                self._index = {k: LevelIndex({s: z[k] for s, z in self.zones.items()}) for k in ("support", "resistance")}
+            return self._index
+
+    def near(self, pct=2.0, kind="support", prices=None, min_touches=1):
+        """Symbols within pct% of a zone at the given prices (default: last scanned close)."""
+        if prices is None:
+            with self._lock: prices = dict(self.last)
+        return self.index()[kind].near(prices, pct, kind, min_touches)
+
+
+_levels = None
+
+def get_levels():
+    global _levels
+    if _levels is None: _levels = LevelStore()
+    return _levels
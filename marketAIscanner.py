@@ -1,16 +1,7 @@
 import streamlit as st
-import yfinance as yf
-import pandas as pd
-import pandas_ta as ta
-import numpy as np
-from scipy.signal import argrelextrema
-import plotly.graph_objects as go
-from streamlit_gsheets import GSheetsConnection
 import warnings
-import requests
-from datetime import datetime
-import uuid
-from streamlit_javascript import st_javascript
+from credentials import get_credential_index
+from startup import prewarm
 
 # --- CONFIG MUST BE FIRST ---
 st.set_page_config(page_title="Market AI Scanner", layout="wide", page_icon="🧠")
@@ -25,73 +16,87 @@ except:
 
 # Machine ID Function
 def get_machine_id():
+    # Known after the first round trip; later reruns skip the component
+    if st.session_state.get('machine_id'): return st.session_state['machine_id']
+    from streamlit_javascript import st_javascript
     js_code = "navigator.userAgent + window.screen.width + window.screen.height"
     v = st_javascript(js_code)
+    if v: st.session_state['machine_id'] = v
     return v
 
 # Verify User Function
+def _read_admin_sheet():
+    from streamlit_gsheets import GSheetsConnection
+    conn_admin = st.connection("gsheets", type=GSheetsConnection)
+    return conn_admin.read(spreadsheet=ADMIN_SHEET_URL, ttl=0)
+
 def verify_user(u, p):
     try:
-        conn_admin = st.connection("gsheets", type=GSheetsConnection)
-        admin_df = conn_admin.read(spreadsheet=ADMIN_SHEET_URL, ttl=0)
-        
-        admin_df['Username'] = admin_df['Username'].astype(str).str.strip()
-        admin_df['Password'] = admin_df['Password'].astype(str).str.strip()
-        
-        user_row = admin_df[(admin_df['Username'] == str(u).strip()) & 
-                            (admin_df['Password'] == str(p).strip())]
-        
-        if not user_row.empty:
-            status = str(user_row.iloc[0]['Status']).strip()
-            user_sheet = user_row.iloc[0]['Sheet_URL']
-            saved_device = str(user_row.iloc[0].get('Device_ID', ''))
-
-            if status != "Active":
-                return False, "BLOCKED", None
-            
-            return True, user_sheet, saved_device
-            
-        return False, "INVALID", None
+        # Process-wide username index; logins are decided on admin rows at most min_refresh (30s) old
+        return get_credential_index(_read_admin_sheet).verify(u, p)
     except Exception as e:
         st.error(f"Login Error: {e}")
         return False, "ERROR", None
 
 # --- LOGIN UI BLOCK ---
+# Only streamlit + credentials are loaded so far: the form shows first, the device
+# ID round trip runs under it, and the heavy modules load in the background meanwhile
 if not st.session_state.get('authenticated', False):
     st.markdown("<h1 style='text-align: center;'>🔐 Market Master Login</h1>", unsafe_allow_html=True)
     
-    m_id = get_machine_id()
-    
     with st.form("secure_login_form"):
         u_name = st.text_input("Username")
         u_pass = st.text_input("Password", type="password")
         submit_auth = st.form_submit_button("Access Software")
+    
+    m_id = get_machine_id()
+    prewarm()
+    
+    if submit_auth:
+        is_ok, result, saved_id = verify_user(u_name, u_pass)
         
-        if submit_auth:
-            is_ok, result, saved_id = verify_user(u_name, u_pass)
-            
-            if is_ok:
-                # Registration Logic
-                if not saved_id or saved_id == "nan" or saved_id == "":
-                    st.warning(f"Device Not Registered! Send this ID to Admin: `{m_id}`")
-                # Validation Logic
-                elif str(saved_id).strip() == str(m_id).strip():
-                    st.session_state['authenticated'] = True
-                    st.session_state['personal_sheet_url'] = result
-                    st.success("Login Successful!")
-                    st.rerun()
-                else:
-                    st.error("🚫 Access Denied: Device ID Mismatch.")
-            elif result == "BLOCKED":
-                st.error("🚫 Account Blocked by Admin.")
+        if is_ok:
+            # Registration Logic
+            if not saved_id or saved_id == "nan" or saved_id == "":
+                st.warning(f"Device Not Registered! Send this ID to Admin: `{m_id}`")
+            # Validation Logic
+            elif str(saved_id).strip() == str(m_id).strip():
+                st.session_state['authenticated'] = True
+                st.session_state['personal_sheet_url'] = result
+                st.success("Login Successful!")
+                st.rerun()
             else:
-                st.error("❌ Invalid Username or Password")
+                st.error("🚫 Access Denied: Device ID Mismatch.")
+        elif result == "BLOCKED":
+            st.error("🚫 Account Blocked by Admin.")
+        else:
+            st.error("❌ Invalid Username or Password")
 
     if m_id:
         st.info(f"📍 Your Device ID: `{m_id}`")
     st.stop()
 
 # --- MAIN APP STARTS HERE ---
+import pandas as pd
+import numpy as np
+from streamlit_gsheets import GSheetsConnection
+from data_provider import get_history
+from timeframes import to_weekly, to_hourly
+from fundamentals import get_store as get_fundamentals_store
+from scan_results import ScanResultTable, FRAME_KEYS
+from quotes import get_quote_service
+from ledger import get_ledger, get_syncer
+from dashboard import INDICES, get_dashboard
+from metrics import METRICS, stage, serve_prometheus
+from levels import get_levels
+from screens import parse_screens, NUMBERS, FLAGS
+from scan_service import get_scan_service
+from scan_stream import ScanJob, iter_upload_tickers, source_id
+from throttle import collect, endpoint_states
+from scanner_core import (
+    STOCK_LIST_PART_1, STOCK_LIST_PART_2, STOCK_LIST_PART_3, configure_telegram, analyze_stock_hybrid,
+)
+
 # Retrieve Sheet URL from Session
 SHEET_URL = st.session_state['personal_sheet_url']
 
@@ -143,10 +148,11 @@ st.markdown("""
 # --- BACKEND ---
 conn = st.connection("gsheets", type=GSheetsConnection)
 
-def load_data_from_sheets():
+def load_data_from_sheets(fallback=True):
     try:
-        holdings_df = conn.read(spreadsheet=SHEET_URL, worksheet="Portfolio", ttl=0)
-        balance_df = conn.read(spreadsheet=SHEET_URL, worksheet="Balance", ttl=0)
+        with stage("sheets.read"):
+            holdings_df = conn.read(spreadsheet=SHEET_URL, worksheet="Portfolio", ttl=0)
+            balance_df = conn.read(spreadsheet=SHEET_URL, worksheet="Balance", ttl=0)
         current_balance = float(balance_df.iloc[0, 0])
         h_dict = {}
         if not holdings_df.empty:
@@ -160,69 +166,48 @@ def load_data_from_sheets():
                     }
         return {"balance": current_balance, "holdings": h_dict}
     except Exception as e:
+        if not fallback: raise
         return {"balance": 1000000.0, "holdings": {}}
 
-if 'portfolio' not in st.session_state: 
-    st.session_state['portfolio'] = load_data_from_sheets()
+# Trades commit to the local ledger; the sheet is mirrored in the background
+ledger = get_ledger()
+sheet_sync = get_syncer(conn)
+serve_prometheus()  # no-op unless MARKET_AI_METRICS_PORT is set
+
+def seed_account():
+    """Import the account from its sheet once; False while the sheet cannot be read (trading stays paused)."""
+    if ledger.has_account(SHEET_URL): return True
+    try: ledger.seed(SHEET_URL, load_data_from_sheets(fallback=False)); return True
+    except Exception: return False
+
+def load_portfolio():
+    if seed_account(): return ledger.portfolio(SHEET_URL)
+    return load_data_from_sheets()
+
+# Unseeded sessions retry the sheet on every rerun
+if 'portfolio' not in st.session_state or not ledger.has_account(SHEET_URL):
+    st.session_state['portfolio'] = load_portfolio()
+if not ledger.has_account(SHEET_URL): st.warning("⚠️ Portfolio sheet could not be read. Trading is paused until it loads.")
 for idx in ["Nifty", "Sensex", "BankNifty", "FinNifty", "Bankex"]:
     if f'show_{idx}' not in st.session_state: st.session_state[f'show_{idx}'] = False
 
-# --- 🔔 TELEGRAM ALERT FUNCTION ---
-def send_telegram_alert(message):
-    try:
-        bot_token = st.secrets["telegram"]["token"]
-        chat_id = st.secrets["telegram"]["chat_id"]
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-        params = {"chat_id": chat_id, "text": message, "parse_mode": "Markdown"}
-        requests.get(url, params=params)
-    except: pass
-
-# ==========================================
-# 📋 STOCK LISTS
-# ==========================================
-STOCK_LIST_PART_1 = ["NIFTYBEES.NS", "BANKBEES.NS", "RELIANCE.NS", "TCS.NS", "HDFCBANK.NS", "ICICIBANK.NS", "INFY.NS", "SBIN.NS", "ITC.NS", "BHARTIARTL.NS", "L&T.NS", "HINDUNILVR.NS", "TATAMOTORS.NS", "AXISBANK.NS", "MARUTI.NS", "TITAN.NS", "ULTRACEMCO.NS", "ADANIENT.NS", "SUNPHARMA.NS", "BAJFINANCE.NS", "KOTAKBANK.NS", "WIPRO.NS", "HCLTECH.NS", "TATASTEEL.NS", "POWERGRID.NS", "NTPC.NS", "ONGC.NS", "M&M.NS", "COALINDIA.NS", "JSWSTEEL.NS", "BPCL.NS", "EICHERMOT.NS", "DIVISLAB.NS", "DRREDDY.NS", "CIPLA.NS", "ASIANPAINT.NS", "BRITANNIA.NS", "NESTLEIND.NS", "DLF.NS", "ZOMATO.NS", "PAYTM.NS", "HAL.NS", "BEL.NS", "IRCTC.NS", "VBL.NS", "JIOFIN.NS", "INDIGO.NS", "DMART.NS", "ADANIPORTS.NS", "CHOLAFIN.NS", "BANKBARODA.NS", "PNB.NS", "CANBK.NS", "IDFCFIRSTB.NS", "BHEL.NS", "SAIL.NS", "VEDL.NS", "HAVELLS.NS", "SIEMENS.NS", "ABB.NS", "ZEEL.NS", "ASHOKLEY.NS", "TVSMOTOR.NS", "MOTHERSON.NS", "MRF.NS", "BOSCHLTD.NS", "PIDILITIND.NS", "SHREECEM.NS", "ACC.NS", "AMBUJACEM.NS", "INDUSINDBK.NS", "NAUKRI.NS", "TRENT.NS", "COLPAL.NS", "DABUR.NS", "GODREJCP.NS", "BERGEPAINT.NS", "MARICO.NS", "BAJAJ-AUTO.NS", "HEROMOTOCO.NS", "ALKEM.NS", "LUPIN.NS", "AUROPHARMA.NS", "BIOCON.NS", "TORNTPHARM.NS", "MFSL.NS", "MAXHEALTH.NS", "APOLLOHOSP.NS", "JUBLFOOD.NS", "DEVYANI.NS", "PIIND.NS", "UPL.NS", "SRF.NS", "NAVINFLUOR.NS", "AARTIIND.NS", "DEEPAKNTR.NS", "ATGL.NS", "ADANIGREEN.NS", "ADANIPOWER.NS", "TATAPOWER.NS", "JSWENERGY.NS", "NHPC.NS", "SJVN.NS", "TORNTPOWER.NS", "PFC.NS", "RECLTD.NS", "IOB.NS", "UNIONBANK.NS", "INDIANB.NS", "UCOBANK.NS", "MAHABANK.NS", "CENTRALBK.NS", "PSB.NS", "SBICARD.NS"]
-STOCK_LIST_PART_2 = ["BAJAJHLDNG.NS", "HDFCLIFE.NS", "SBILIFE.NS", "ICICIPRULI.NS", "LICI.NS", "GICRE.NS", "NIACL.NS", "MUTHOOTFIN.NS", "MANAPPURAM.NS", "M&MFIN.NS", "SHRIRAMFIN.NS", "SUNDARMFIN.NS", "POONAWALLA.NS", "ABCAPITAL.NS", "L&TFH.NS", "PEL.NS", "DELHIVERY.NS", "NYKAA.NS", "POLICYBZR.NS", "IDEA.NS", "INDUSTOWER.NS", "TATACOMM.NS", "PERSISTENT.NS", "LTIM.NS", "KPITTECH.NS", "COFORGE.NS", "MPHASIS.NS", "LTTS.NS", "TATAELXSI.NS", "ORACLEFIN.NS", "CYIENT.NS", "ZENSARTECH.NS", "SONACOMS.NS", "TIINDIA.NS", "UNO.NS", "PRESTIGE.NS", "OBEROIRLTY.NS", "PHOENIXLTD.NS", "BRIGADE.NS", "SOBHA.NS", "GODREJPROP.NS", "RVNL.NS", "IRCON.NS", "RITES.NS", "RAILTEL.NS", "TITAGARH.NS", "JINDALSTEL.NS", "HINDALCO.NS", "NMDC.NS", "NATIONALUM.NS", "HINDCOPPER.NS", "APLAPOLLO.NS", "RATNAMANI.NS", "WELCORP.NS", "JSL.NS", "VOLTAS.NS", "BLUESTARCO.NS", "KAJARIACER.NS", "CERA.NS", "ASTRAL.NS", "POLYCAB.NS", "KEI.NS", "DIXON.NS", "CROMPTON.NS", "WHIRLPOOL.NS", "BATAINDIA.NS", "RELAXO.NS", "PAGEIND.NS", "KPRMILL.NS", "TRIDENT.NS", "RAYMOND.NS", "ABFRL.NS", "MANYAVAR.NS", "METROBRAND.NS", "BIKAJI.NS", "VBL.NS", "AWL.NS", "PATANJALI.NS", "EMAMILTD.NS", "JYOTHYLAB.NS", "FLUOROCHEM.NS", "LINDEINDIA.NS", "SOLARINDS.NS", "CASTROLIND.NS", "OIL.NS", "PETRONET.NS", "GSPL.NS", "IGL.NS", "MGL.NS", "GUJGASLTD.NS", "GAIL.NS", "HINDPETRO.NS", "IOC.NS", "MRPL.NS", "CHENNPETRO.NS", "CUMMINSIND.NS", "THERMAX.NS", "SKFINDIA.NS", "TIMKEN.NS", "SCHAEFFLER.NS", "AIAENG.NS", "ELGIEQUIP.NS", "KIRLOSENG.NS", "SUZLON.NS", "INOXWIND.NS", "BEML.NS", "MAZDOCK.NS", "COCHINSHIP.NS"]
-STOCK_LIST_PART_3 = ["GRSE.NS", "BDL.NS", "ASTRAMICRO.NS", "MTARTECH.NS", "DATAPATTNS.NS", "LALPATHLAB.NS", "METROPOLIS.NS", "SYNGENE.NS", "VIJAYA.NS", "KIMS.NS", "RAINBOW.NS", "MEDANTA.NS", "ASTERDM.NS", "NH.NS", "FORTIS.NS", "GLENMARK.NS", "IPCALAB.NS", "JBCHEPHARM.NS", "AJANTPHARM.NS", "NATCOPHARM.NS", "PFIZER.NS", "SANOFI.NS", "ABBOTINDIA.NS", "GLAXO.NS", "ASTRAZEN.NS", "ERIS.NS", "GRANULES.NS", "LAURUSLABS.NS", "FSL.NS", "REDINGTON.NS", "BSOFT.NS", "MASTEK.NS", "INTELLECT.NS", "TANLA.NS", "ROUTE.NS", "JUSTDIAL.NS", "AFFLE.NS", "HAPPSTMNDS.NS", "LATENTVIEW.NS", "MAPMYINDIA.NS", "RATEGAIN.NS", "NAZARA.NS", "EASEMYTRIP.NS", "CARTRADE.NS", "PBFINTECH.NS", "SAPPHIRE.NS", "RBA.NS", "WESTLIFE.NS", "CHALET.NS", "LEMONTREE.NS", "EIHOTEL.NS", "IHCL.NS", "DELTACO.NS", "PVRINOX.NS", "SAREGAMA.NS", "SUNTV.NS", "NETWORK18.NS", "TV18BRDCST.NS", "HATHWAY.NS", "DEN.NS", "DISHMAN.NS", "GTPL.NS", "UJJIVANSFB.NS", "EQUITASBNK.NS", "AUBANK.NS", "BANDHANBNK.NS", "FEDERALBNK.NS", "RBLBANK.NS", "CSBBANK.NS", "KARURVYSYA.NS", "CUB.NS", "DCBBANK.NS", "SOUTHBANK.NS", "J&KBANK.NS", "MAHSEAMLES.NS", "EPL.NS", "POLYPLEX.NS", "UFRLEX.NS", "SUPREMEIND.NS", "FINPIPE.NS", "PRINCEPIPE.NS", "RESPONIND.NS", "CENTURYPLY.NS", "GREENPANEL.NS", "GREENPLY.NS", "KAJARIACER.NS", "SOMANYCERA.NS", "ASAHIINDIA.NS", "LAOPALA.NS", "BORORENEW.NS", "VIPIND.NS", "SAFARI.NS", "TTKPRESTIG.NS", "HAWKINS.NS", "SYMPHONY.NS", "ORIENTELEC.NS", "IFBIND.NS", "VGUARD.NS", "AMBER.NS", "PGHH.NS", "GILLETTE.NS", "AKZOINDIA.NS", "KANSAINER.NS", "INDIGOPNTS.NS", "SIRCA.NS", "SHALPAINTS.NS", "GARFIBRES.NS", "LUXIND.NS", "RUPA.NS", "DOLLAR.NS", "TCNSBRANDS.NS", "GOKEX.NS", "SWANENERGY.NS"]
+# --- 🔔 TELEGRAM (secrets -> headless core) ---
+try: configure_telegram(st.secrets["telegram"]["token"], st.secrets["telegram"]["chat_id"])
+except: pass
 
 def buy_stock(symbol, qty, price, category):
-    data = load_data_from_sheets() 
-    cost = qty * price
-    if data['balance'] >= cost:
-        new_balance = data['balance'] - cost
-        today_date = datetime.now().strftime("%d-%m-%Y")
-        holdings_list = []
-        found = False
-        for s, v in data['holdings'].items():
-            if s == symbol:
-                new_qty = v['qty'] + qty
-                new_avg = ((v['qty'] * v['buy_price']) + cost) / new_qty
-                holdings_list.append([s, new_avg, new_qty, category, today_date])
-                found = True
-            else:
-                holdings_list.append([s, v['buy_price'], v['qty'], v['category'], v['date']])
-        if not found:
-            holdings_list.append([symbol, float(price), int(qty), category, today_date])
-        new_holdings_df = pd.DataFrame(holdings_list, columns=['Symbol', 'Buy_Price', 'Qty', 'Category', 'Date'])
-        new_balance_df = pd.DataFrame([[new_balance]], columns=['Cash'])
-        conn.update(spreadsheet=SHEET_URL, worksheet="Portfolio", data=new_holdings_df)
-        conn.update(spreadsheet=SHEET_URL, worksheet="Balance", data=new_balance_df)
-        st.session_state['portfolio']['balance'] = new_balance
-        st.session_state['portfolio']['holdings'] = load_data_from_sheets()['holdings']
+    if not seed_account(): return False
+    if ledger.buy(SHEET_URL, symbol, qty, price, category):
+        sheet_sync.notify()
+        st.session_state['portfolio'] = ledger.portfolio(SHEET_URL)
         return True
     return False
 
 def sell_stock(symbol, live_price):
-    data = load_data_from_sheets()
-    if symbol in data['holdings']:
-        qty = data['holdings'][symbol]['qty']
-        new_balance = data['balance'] + (qty * live_price)
-        holdings_list = [[s, v['buy_price'], v['qty'], v['category'], v['date']] for s, v in data['holdings'].items() if s != symbol]
-        new_holdings_df = pd.DataFrame(holdings_list, columns=['Symbol', 'Buy_Price', 'Qty', 'Category', 'Date'])
-        new_balance_df = pd.DataFrame([[new_balance]], columns=['Cash'])
-        conn.update(spreadsheet=SHEET_URL, worksheet="Portfolio", data=new_holdings_df)
-        conn.update(spreadsheet=SHEET_URL, worksheet="Balance", data=new_balance_df)
-        st.session_state['portfolio']['balance'] = new_balance
-        st.session_state['portfolio']['holdings'] = load_data_from_sheets()['holdings']
+    if not seed_account(): return False
+    if ledger.sell(SHEET_URL, symbol, live_price):
+        sheet_sync.notify()
+        st.session_state['portfolio'] = ledger.portfolio(SHEET_URL)
         st.rerun()
     return False
 
@@ -236,110 +221,37 @@ with st.sidebar:
         balance = st.session_state['portfolio']['balance']
     else: balance = 1000000.0
     st.metric("Cash Balance", f"₹ {balance:,.2f}")
-    if st.button("Reset Cash", type="secondary"):
-        new_balance_df = pd.DataFrame([[1000000.0]], columns=['Cash'])
-        new_holdings_df = pd.DataFrame(columns=['Symbol', 'Buy_Price', 'Qty', 'Category', 'Date'])
-        conn.update(spreadsheet=SHEET_URL, data=new_balance_df, worksheet="Balance")
-        conn.update(spreadsheet=SHEET_URL, data=new_holdings_df, worksheet="Portfolio")
-        st.session_state['portfolio'] = load_data_from_sheets()
+    if st.button("Reset Cash", type="secondary") and seed_account():
+        ledger.reset(SHEET_URL, 1000000.0)
+        sheet_sync.notify()
+        st.session_state['portfolio'] = ledger.portfolio(SHEET_URL)
         st.rerun()
     st.markdown("---")
     capital = st.number_input("Capital (₹)", 10000, 10000000, 100000, step=10000)
     risk_pct = st.slider("Risk Per Trade (%)", 0.5, 5.0, 2.0, 0.5)
     sl_multiplier = 2.0 
+    zone_pct = st.slider("S/R Zone Distance (%)", 0.5, 5.0, 2.0, 0.5)
+    with st.expander("🧪 My Screens"):
+        screens_text = st.text_area("One per line: Name: rule", key="screens_text",
+                                    placeholder="Strong CE: rsi_d > 60 and adx > 25 and weekly_up")
+        my_screens, screen_errors = parse_screens(screens_text)
+        for err in screen_errors: st.warning(err)
+        st.caption("Fields: " + ", ".join(sorted(NUMBERS) + sorted(FLAGS)))
     st.markdown("---")
     auto_run = st.checkbox("🔄 Auto-Run (Live Loop)", False)
-
-# --- 🔮 RESULT MAGIC (YoY) ---
-def predict_results(symbol):
-    try:
-        stock = yf.Ticker(symbol)
-        fin = stock.quarterly_financials
-        if fin is None or fin.empty: return "N/A"
-        try:
-            cols = fin.columns
-            if len(cols) >= 5:
-                key_row = 'Net Income' if 'Net Income' in fin.index else fin.index[0]
-                curr = fin.loc[key_row].iloc[0]
-                last_yr = fin.loc[key_row].iloc[4]
-                if pd.isna(curr) or pd.isna(last_yr) or last_yr == 0: return "Data Gap"
-                growth = ((curr - last_yr) / abs(last_yr)) * 100
-                if growth > 20: return f"🔥 Super Growth (+{int(growth)}%)"
-                elif growth > 0: return f"✅ Positive (+{int(growth)}%)"
-                elif growth < -10: return f"⚠️ Weak (-{int(abs(growth))}%)"
-                else: return "Neutral"
-            else:
-                inc = fin.loc['Net Income'].iloc[:2]
-                return "✅ QoQ Growth" if inc.iloc[0] > inc.iloc[1] else "⚠️ QoQ Dip"
-        except: return "N/A"
-    except: return "N/A"
-
-# --- 🆔 INDEX OPTION ANALYZER ---
-def get_index_signal(df):
-    try:
-        if df.empty or len(df) < 30: return "WAIT"
-        df['EMA9'] = ta.ema(df['Close'], length=9)
-        df['EMA21'] = ta.ema(df['Close'], length=21)
-        df['RSI'] = ta.rsi(df['Close'], length=14)
-        st_data = ta.supertrend(df['High'], df['Low'], df['Close'], length=7, multiplier=3)
-        df['ST_Dir'] = st_data.iloc[:, 1]
-        
-        curr = df['Close'].iloc[-1]
-        ema9 = df['EMA9'].iloc[-1]; ema21 = df['EMA21'].iloc[-1]
-        rsi = df['RSI'].iloc[-1]; st_dir = df['ST_Dir'].iloc[-1]
-        
-        if (ema9 > ema21) and (rsi > 55) and (st_dir == 1): return "🚀 BUY CALL"
-        elif (ema9 < ema21) and (rsi < 45) and (st_dir == -1): return "🐻 BUY PUT"
-        return "⏳ WAIT"
-    except: return "WAIT"
-
-def analyze_market_index(symbol):
-    try:
-        idx = yf.Ticker(symbol)
-        df = idx.history(period="1y") # Daily
-        df_intra = idx.history(period="5d", interval="15m") # Intraday
-        
-        if df.empty: return None
-        curr = df['Close'].iloc[-1]; change = ((curr - df['Close'].iloc[-2]) / df['Close'].iloc[-2]) * 100
-        st_data = ta.supertrend(df['High'], df['Low'], df['Close'], length=7, multiplier=3)
-        st_dir = st_data.iloc[-1, 1]
-        trend_txt = "🟢 BULL" if st_dir == 1 else "🔴 BEAR"
-        opt_sig = get_index_signal(df_intra)
-        
-        return {"price": curr, "change": change, "trend": trend_txt, "df": df, "opt_sig": opt_sig}
-    except: return None
-
-# --- MARKET ANALYSIS ---
-@st.cache_data(ttl=600)
-def get_smart_sectors():
-    sectors = {
-        "🏦 Bank": "^NSEBANK", "💻 IT": "^CNXIT", "🚗 Auto": "^CNXAUTO",
-        "💊 Pharma": "^CNXPHARMA", "🛒 FMCG": "^CNXFMCG", "⚙️ Metal": "^CNXMETAL",
-        "⚡ Energy": "^CNXENERGY", "🏠 Realty": "^CNXREALTY",
-        "💰 PSU Bank": "^CNXPSUB", "🏗️ Infra": "^CNXINFRA", "📺 Media": "^CNXMEDIA"
-    }
-    results = {}
-    for name, ticker in sectors.items():
-        try:
-            stock = yf.Ticker(ticker); hist = stock.history(period="3mo")
-            curr = hist['Close'].iloc[-1]; prev = hist['Close'].iloc[-2]
-            change = ((curr - prev) / prev) * 100
-            sma50 = ta.sma(hist['Close'], length=50).iloc[-1]
-            trend = "🟢 BULL" if curr > sma50 else "🔴 BEAR"
-            bc = "#22c55e" if change >= 0 else "#ef4444"
-            tc = "#15803d" if change >= 0 else "#b91c1c"
-            results[name] = {"change": round(change, 2), "trend": trend, "bc": bc, "tc": tc, "ticker": ticker}
-        except:
-            results[name] = {"change": 0.0, "trend": "-", "bc": "#ccc", "tc": "#333", "ticker": ticker}
-    return results
-
-def get_market_mood_strip():
-    try:
-        sp500 = yf.Ticker("^GSPC").history(period="2d")
-        sp_chg = ((sp500['Close'].iloc[-1] - sp500['Close'].iloc[-2]) / sp500['Close'].iloc[-2]) * 100
-        global_mood = "🟢 Bullish" if sp_chg > 0 else "🔴 Bearish"
-        return global_mood
-    except: return "Neutral"
+    st.markdown("---")
+    with st.expander("🩺 Diagnostics"):
+        stage_df = METRICS.stage_table()
+        if stage_df.empty: st.caption("No scan has run in this process yet.")
+        else:
+            st.dataframe(stage_df[["calls", "avg_ms", "max_seconds", "failures", "timeouts"]].round(3), use_container_width=True)
+            slow = METRICS.slow_symbols(10, "analyze")
+            if slow: st.caption("Slowest symbols: " + ", ".join(f"{sym} ({row['seconds'] * 1000:.0f} ms)" for _, sym, row in slow))
+            for name, err in list(METRICS.errors.items())[-5:]:
+                st.caption(f"⚠️ {name} {err['symbol'] or ''}: {err['error']}")
+        eps = endpoint_states()
+        if eps: st.dataframe(pd.DataFrame(eps).set_index("endpoint"), use_container_width=True)  # Yahoo budget / circuit per endpoint
+        st.download_button("Export (Prometheus)", METRICS.prometheus_text(), file_name="marketai_metrics.txt")
 
 # --- PLOT CHART (FIBONACCI + S/R + SMA + SAR) ---
 def plot_chart(symbol, df, title_extra="", current_atr_mult=2.0, min_idx=None, max_idx=None, is_daily=True):
@@ -347,211 +259,24 @@ def plot_chart(symbol, df, title_extra="", current_atr_mult=2.0, min_idx=None, m
         if df is None or df.empty:
             st.warning("Chart data unavailable")
             return
-
-        current_price = df['Close'].iloc[-1]
-        try:
-            atr_val = ta.atr(df['High'], df['Low'], df['Close'], length=14).iloc[-1]
-            sl_price = current_price - (atr_val * current_atr_mult)
-            tgt_price = current_price + (atr_val * (current_atr_mult * 2))
-        except: sl_price = 0; tgt_price = 0
-
-        if min_idx is None:
-            lows = df['Low'].values; highs = df['High'].values
-            min_idx = argrelextrema(lows, np.less, order=5)[0]
-            max_idx = argrelextrema(highs, np.greater, order=5)[0]
-
-        if isinstance(df.index, pd.DatetimeIndex):
-            if is_daily: df.index = df.index.strftime('%Y-%m-%d')
-            else: df.index = df.index.strftime('%d-%m %H:%M')
-
-        fig = go.Figure()
-        fig.add_trace(go.Candlestick(x=df.index, open=df['Open'], high=df['High'], low=df['Low'], close=df['Close'], name='Price'))
-        
-        # 🟢 ADDED: SMA 20, 50, 200 (Taaki chart adhura na lage)
-        fig.add_trace(go.Scatter(x=df.index, y=ta.sma(df['Close'], length=20), line=dict(color='#3b82f6', width=1.5), name='SMA 20'))
-        fig.add_trace(go.Scatter(x=df.index, y=ta.sma(df['Close'], length=50), line=dict(color='orange', width=1.5), name='SMA 50'))
-        fig.add_trace(go.Scatter(x=df.index, y=ta.sma(df['Close'], length=200), line=dict(color='purple', width=1.5), name='SMA 200'))
-
-        # 🟢 ADDED: PARABOLIC SAR TRACE
-        try:
-            psar = ta.psar(df['High'], df['Low'], df['Close'])
-            if psar is not None:
-                sar_vals = psar.iloc[:, 0].fillna(psar.iloc[:, 1]) 
-                fig.add_trace(go.Scatter(x=df.index, y=sar_vals, mode='markers', marker=dict(color='black', size=4), name='SAR'))
-        except: pass
-
-        # --- FIBONACCI GOLDEN LINES ---
-        max_h = df['High'].max(); min_l = df['Low'].min(); diff = max_h - min_l
-        if diff > 0:
-            fig.add_hline(y=max_h - (diff * 0.618), line_dash="dot", line_color="#EAB308", annotation_text="GOLDEN 61.8%")
-            fig.add_hline(y=max_h - (diff * 0.5), line_dash="dot", line_color="#EAB308", annotation_text="GOLDEN 50%")
-            
-        if sl_price > 0: fig.add_hline(y=sl_price, line_dash="dash", line_color="red", annotation_text=f"SL: {sl_price:.1f}")
-        if tgt_price > 0: fig.add_hline(y=tgt_price, line_dash="dash", line_color="green", annotation_text=f"TGT: {tgt_price:.1f}")
-        
-        valid_min = [i for i in min_idx if i < len(df)]
-        if valid_min: fig.add_trace(go.Scatter(x=df.iloc[valid_min].index, y=df.iloc[valid_min]['Low'], mode='markers', marker=dict(symbol='triangle-up', size=10, color='green'), name='Support'))
-        valid_max = [i for i in max_idx if i < len(df)]
-        if valid_max: fig.add_trace(go.Scatter(x=df.iloc[valid_max].index, y=df.iloc[valid_max]['High'], mode='markers', marker=dict(symbol='triangle-down', size=10, color='red'), name='Resistance'))
-
-        fig.update_layout(title=f"{symbol} {title_extra}", xaxis_rangeslider_visible=False, height=400, margin=dict(l=10, r=10, t=50, b=10), template="plotly_white", xaxis={'type': 'category'})
-        st.plotly_chart(fig, use_container_width=True)
+        # Cached overlays + LTTB-reduced candles; the shared frame is never modified
+        from charts import chart_data, build_figure  # plotly loads on the first chart
+        cd = chart_data(symbol, df, is_daily, current_atr_mult, min_idx, max_idx)
+        st.plotly_chart(build_figure(cd, f"{symbol} {title_extra}"), use_container_width=True)
     except Exception as e: st.error(f"Chart Error: {str(e)}")
 
-# 🔥 MAIN ANALYZER 🔥
-def analyze_stock_hybrid(symbol):
-    try:
-        stock = yf.Ticker(symbol)
-        df_daily = stock.history(period="1y", interval="1d", auto_adjust=True)
-        df_intra = stock.history(period="5d", interval="15m", auto_adjust=True)
-        
-        if df_daily is None or len(df_daily) < 50: return None
-        try: info = stock.info
-        except: info = {}
-        
-        curr = df_daily['Close'].iloc[-1]
-        change_pct = ((curr - df_daily['Close'].iloc[-2]) / df_daily['Close'].iloc[-2]) * 100
-        
-        df_daily['SMA200'] = ta.sma(df_daily['Close'], length=200)
-        df_daily['SMA20'] = ta.sma(df_daily['Close'], length=20)
-        df_daily['RSI'] = ta.rsi(df_daily['Close'], length=14)
-        df_daily['Vol_Avg'] = ta.sma(df_daily['Volume'], length=10)
-        
-        adx_df = ta.adx(df_daily['High'], df_daily['Low'], df_daily['Close'], length=14)
-        adx_val_d = adx_df[adx_df.columns[0]].iloc[-1] if not adx_df.empty else 0
-        
-        try:
-            st_data_d = ta.supertrend(df_daily['High'], df_daily['Low'], df_daily['Close'], length=7, multiplier=3)
-            st_dir_d = st_data_d.iloc[-1, 1]
-        except: st_dir_d = 0
-
-        # 🟢 ADDED: SAR CALCULATION
-        try:
-            psar = ta.psar(df_daily['High'], df_daily['Low'], df_daily['Close'])
-            sar_val = psar.iloc[-1, 0] if not pd.isna(psar.iloc[-1, 0]) else psar.iloc[-1, 1]
-            is_sar_bullish = curr > sar_val
-        except: is_sar_bullish = False
-
-        intra_buy = False; intra_sell = False; reversal_2pm = False
-        if df_intra is not None and len(df_intra) > 20:
-            df_intra['RSI'] = ta.rsi(df_intra['Close'], length=14)
-            try:
-                st_data_i = ta.supertrend(df_intra['High'], df_intra['Low'], df_intra['Close'], length=7, multiplier=3)
-                st_dir_i = st_data_i.iloc[-1, 1]
-                df_intra['VWAP'] = (df_intra['Volume'] * (df_intra['High'] + df_intra['Low'] + df_intra['Close']) / 3).cumsum() / df_intra['Volume'].cumsum()
-                curr_intra = df_intra['Close'].iloc[-1]
-                vwap_val = df_intra['VWAP'].iloc[-1]
-                if (curr_intra > vwap_val) and (st_dir_i == 1): intra_buy = True
-                if (curr_intra < vwap_val) and (st_dir_i == -1): intra_sell = True
-                
-                last_time = df_intra.index[-1]
-                if last_time.hour >= 13 and (last_time.hour > 13 or last_time.minute >= 30):
-                    prev_close = df_intra['Close'].iloc[-2]; prev_vwap = df_intra['VWAP'].iloc[-2]
-                    vol_now = df_intra['Volume'].iloc[-1]; vol_avg = df_intra['Volume'].tail(10).mean()
-                    if (prev_close < prev_vwap) and (curr_intra > vwap_val) and (vol_now > vol_avg * 1.5): reversal_2pm = True
-            except: pass
-
-        try: atr_val = ta.atr(df_daily['High'], df_daily['Low'], df_daily['Close'], length=14).iloc[-1]
-        except: atr_val = 0
-        sl_fix = round(curr - (atr_val * 2.0), 1)
-        tgt_fix = round(curr + (atr_val * 4.0), 1)
-        
-        lows = df_daily['Low'].values; highs = df_daily['High'].values
-        min_idx = argrelextrema(lows, np.less, order=5)[0]
-        max_idx = argrelextrema(highs, np.greater, order=5)[0]
-        last_idx = len(df_daily) - 1
-        fresh_support = (len(min_idx) > 0 and min_idx[-1] >= (last_idx - 1))
-        fresh_resistance = (len(max_idx) > 0 and max_idx[-1] >= (last_idx - 1))
-
-        weekly_trend_up = False
-        try:
-            df_wk = stock.history(period="1y", interval="1wk")
-            if not df_wk.empty and df_wk['Close'].iloc[-1] > ta.sma(df_wk['Close'], length=20).iloc[-1]: weekly_trend_up = True
-        except: pass
-
-        # --- 🏆 GOLDEN LINE LOGIC ---
-        max_h = df_daily['High'].max()
-        min_l = df_daily['Low'].min()
-        diff = max_h - min_l
-        golden_level = max_h - (diff * 0.618)
-        is_at_golden = (abs(curr - golden_level) <= (curr * 0.015)) and (curr > df_daily['Open'].iloc[-1])
-
-        vol_today = df_daily['Volume'].iloc[-1]
-        vol_avg_10 = df_daily['Vol_Avg'].iloc[-1]
-        is_high_volume = (vol_today / vol_avg_10 > 1.5) if vol_avg_10 > 0 else False
-
-        res = {
-            "Symbol": symbol, "Price": round(curr, 2), "Change": round(change_pct, 2),
-            "F_Jackpot": False, "F_CE_100": False, "F_CE_80": False, "F_PE_100": False, "F_PE_80": False,
-            "F_Day_Buy": intra_buy, "F_Day_Sell": intra_sell, "F_2PM": reversal_2pm,
-            "F_Swing": False, "F_Double": False, "F_Tech": False, "F_Fund": False, "F_Trend": False,
-            "F_Support": fresh_support, "F_Resistance": fresh_resistance, "F_Golden": is_at_golden,
-            "F_SAR": is_sar_bullish, # 🟢 ADDED SAR FLAG
-            "DF_Daily": df_daily, "DF_Intra": df_intra, "ATR": atr_val, "Weekly": "🟢 UP" if weekly_trend_up else "🔴 DOWN", 
-            "Alert_Trigger": False, "SL": sl_fix, "TGT": tgt_fix, "Min_Idx": min_idx, "Max_Idx": max_idx
-        }
-
-        sma200 = df_daily['SMA200'].iloc[-1]; rsi_d = df_daily['RSI'].iloc[-1]
-        vol_blast = df_daily['Volume'].iloc[-1] > (df_daily['Vol_Avg'].iloc[-1] * 1.5)
-        pe_ratio = info.get('trailingPE', 100); roe = info.get('returnOnEquity', 0)
-        is_fund = (0 < pe_ratio < 60 and roe > 0.12); is_tech = (curr > sma200 and rsi_d > 55)
-
-        if is_fund and is_tech and vol_blast and weekly_trend_up and (rsi_d < 70): res["F_Jackpot"] = True
-        
-        if st_dir_d == 1 and rsi_d > 60 and adx_val_d > 25 and weekly_trend_up: res['F_CE_100'] = True
-        elif st_dir_d == 1 and rsi_d > 55: res['F_CE_80'] = True
-        
-        if st_dir_d == -1 and rsi_d < 40 and adx_val_d > 25: res['F_PE_100'] = True 
-        elif st_dir_d == -1 and rsi_d < 45: res['F_PE_80'] = True
-        
-        if curr > sma200: res["F_Tech"] = True
-        if curr > df_daily['Close'].iloc[-20]: res["F_Trend"] = True
-        if 0 < pe_ratio < 60: res["F_Fund"] = True
-        if res["F_Fund"] and res["F_Tech"]: res["F_Double"] = True
-        if vol_blast: res["Alert_Trigger"] = True
-        
-        signal_quality = "⚪ Neutral"
-        if (res['F_Jackpot'] or res['F_CE_100']) and weekly_trend_up and is_high_volume:
-            signal_quality = "🔥 SUPER STRONG CE"
-            send_telegram_alert(f"🚀 ALERT: {symbol} is SUPER STRONG CE!\nPrice: {curr}\nRSI: {rsi_d:.1f}\nVol: High")
-        elif res['F_PE_100'] and is_high_volume:
-            signal_quality = "⚡ SUPER STRONG PE"
-            send_telegram_alert(f"🐻 ALERT: {symbol} is SUPER STRONG PE!\nPrice: {curr}\nRSI: {rsi_d:.1f}\nVol: High")
-        elif is_at_golden: signal_quality = "🏆 Golden Support"
-        elif is_sar_bullish: signal_quality = "🟢 SAR Bull" # 🟢 SAR SIGNAL
-        elif res['F_CE_100'] or res['F_CE_80']: signal_quality = "✅ Strong CE"
-        elif res['F_PE_100'] or res['F_PE_80']: signal_quality = "🔻 Strong PE"
-        elif fresh_support: signal_quality = "🟢 Support Buy"
-        elif intra_buy: signal_quality = "🚀 Day Buy"
-        elif intra_sell: signal_quality = "🐻 Day Sell"
-        
-        res["Signal_Quality"] = signal_quality
-        active_tags = []
-        if res["F_Jackpot"]: active_tags.append("🏆 Jackpot")
-        if res["F_Golden"]: active_tags.append("🏆 Golden Dip")
-        if res["F_SAR"]: active_tags.append("🟢 SAR Bull") # 🟢 TAG ADDED
-        if res["F_CE_100"]: active_tags.append("🚀 CE 100%")
-        if res["F_PE_100"]: active_tags.append("🐻 PE 100%")
-        if res["F_Support"]: active_tags.append("🟢 Support")
-        if res["F_Resistance"]: active_tags.append("🔴 Resistance")
-        if res["F_Day_Buy"]: active_tags.append("🚀 Day Buy")
-        if res["F_Trend"]: active_tags.append("🌊 Trend")
-        if res["F_Tech"]: active_tags.append("📈 Tech")
-        if res["F_Fund"]: active_tags.append("💎 Fund")
-        if res["F_Double"]: active_tags.append("🥈 Double")
-        if res["Alert_Trigger"]: active_tags.append("🔥 Alert")
-        
-        res["All_Tags"] = " | ".join(active_tags) if active_tags else "-"
-        return res
-    except: return None
 # ==========================================
 # 👇 LAYOUT 👇
 # ==========================================
 
 st.markdown('<div class="main-header"><h1>🧠 MARKET AI SCANNER</h1></div>', unsafe_allow_html=True)
 
+# Mood, indices and sectors: one shared snapshot refreshed in the background
+dash = get_dashboard().snapshot() or {"mood": "Neutral", "indices": {}, "sectors": {}}
+
 # 1. MARKET SENTIMENT STRIP
-gm = get_market_mood_strip()
+gm = dash['mood']
+if dash.get('fetch') is not None and dash['fetch'].partial: st.caption(f"⚠️ Market data: {dash['fetch'].summary()}")
 st.markdown(f"""
     <div class='sentiment-bar'>
         <span class='sent-item'>🌎 Global Mood: {gm}</span>
@@ -561,11 +286,11 @@ st.markdown(f"""
 # 2. MARKET INDICES & OPTION SIGNAL
 st.markdown('<div class="dashboard-card">', unsafe_allow_html=True)
 st.markdown('<div class="card-title">🌍 Market Indices & Signals</div>', unsafe_allow_html=True)
-idx_list = [("Nifty 50", "^NSEI", "Nifty"), ("Sensex", "^BSESN", "Sensex"), ("Bank Nifty", "^NSEBANK", "BankNifty"), ("Fin Nifty", "NIFTY_FIN_SERVICE.NS", "FinNifty"), ("Bankex", "^BSEBANK", "Bankex")]
+idx_list = INDICES
 cols = st.columns(5)
 for i, (name, ticker, key) in enumerate(idx_list):
     with cols[i]:
-        d = analyze_market_index(ticker)
+        d = dash['indices'].get(ticker)
         if d:
             st.metric(label=name, value=f"{d['price']:.0f}", delta=f"{d['change']:.2f}%")
             sig = d['opt_sig']
@@ -576,30 +301,35 @@ for i, (name, ticker, key) in enumerate(idx_list):
         else: st.warning("N/A")
 for name, ticker, key in idx_list:
     if st.session_state.get(f'show_{key}', False):
-        d = analyze_market_index(ticker)
-        tf_opt = st.radio(f"Timeframe ({name})", ["Daily", "15 Min"], key=f"tf_{key}", horizontal=True)
+        d = dash['indices'].get(ticker)
+        tf_opt = st.radio(f"Timeframe ({name})", ["Daily", "Weekly", "15 Min", "1 Hour"], key=f"tf_{key}", horizontal=True)
         if d: 
             if tf_opt == "Daily": plot_chart(name, d['df'], f"({d['trend']})", is_daily=True)
-            else: df_15 = yf.Ticker(ticker).history(period="5d", interval="15m"); plot_chart(name, df_15, f"({d['trend']})", is_daily=False)
+            elif tf_opt == "Weekly": plot_chart(name, to_weekly(d['df']), f"({d['trend']})", is_daily=True)
+            elif tf_opt == "15 Min": plot_chart(name, d['df_intra'], f"({d['trend']})", is_daily=False)
+            else: plot_chart(name, to_hourly(d['df_intra']), f"({d['trend']})", is_daily=False)
 st.markdown('</div>', unsafe_allow_html=True)
 
 # 3. HEATMAP
 st.markdown('<div class="dashboard-card">', unsafe_allow_html=True)
 st.markdown('<div class="card-title">🌡️ Sector Heatmap</div>', unsafe_allow_html=True)
-mood = get_smart_sectors()
+mood = dash['sectors']
 hm_cols = st.columns(8)
 for i, (sec, val) in enumerate(mood.items()):
     with hm_cols[i % 8]:
-        st.markdown(f"<div class='sector-box'><span class='sec-name'>{sec}</span><span class='sec-val' style='color:{val['tc']}'>{val['change']}%</span><br></div>", unsafe_allow_html=True)
+        chg = "n/a" if val['change'] is None else f"{val['change']}%"
+        st.markdown(f"<div class='sector-box'><span class='sec-name'>{sec}</span><span class='sec-val' style='color:{val['tc']}'>{chg}</span><br></div>", unsafe_allow_html=True)
         if st.button("📉 Chart", key=f"btn_sec_{i}", type="secondary"): st.session_state['active_sector'] = val['ticker']
 if 'active_sector' in st.session_state:
     try:
-        sec_stock = yf.Ticker(st.session_state['active_sector'])
-        sec_tf = st.radio("Select Timeframe", ["Daily", "15 Min"], key="sec_tf_radio", horizontal=True)
-        p = "1y" if sec_tf == "Daily" else "5d"
-        i = "1d" if sec_tf == "Daily" else "15m"
-        sec_df = sec_stock.history(period=p, interval=i)
-        plot_chart(st.session_state['active_sector'], sec_df, "(Sector View)", is_daily=(sec_tf=="Daily"))
+        sec_tf = st.radio("Select Timeframe", ["Daily", "Weekly", "15 Min", "1 Hour"], key="sec_tf_radio", horizontal=True)
+        is_daily = sec_tf in ("Daily", "Weekly")
+        p = "1y" if is_daily else "5d"
+        i = "1d" if is_daily else "15m"
+        sec_df = get_history(st.session_state['active_sector'], period=p, interval=i)
+        if sec_tf == "Weekly": sec_df = to_weekly(sec_df)
+        elif sec_tf == "1 Hour": sec_df = to_hourly(sec_df)
+        plot_chart(st.session_state['active_sector'], sec_df, "(Sector View)", is_daily=is_daily)
         if st.button("Close Sector Chart", type="primary"): del st.session_state['active_sector']; st.rerun()
     except: st.error("Sector Chart Data Error")
 st.markdown('</div>', unsafe_allow_html=True)
@@ -611,30 +341,82 @@ c1, c2 = st.columns([1, 1])
 with c1:
     st.markdown("**Select Source**")
     scan_source = st.radio("S", ["Part 1 (Large)", "Part 2 (Mid)", "Part 3 (Small)", "Custom"], horizontal=True, label_visibility="collapsed")
-tickers = []
+tickers = []; csv_file = None
 if "Part 1" in scan_source: tickers = STOCK_LIST_PART_1
 elif "Part 2" in scan_source: tickers = STOCK_LIST_PART_2
 elif "Part 3" in scan_source: tickers = STOCK_LIST_PART_3
 elif "Custom" in scan_source:
     csv_file = st.file_uploader("Upload CSV", type=["csv", "xlsx"])
-    if csv_file:
-        try:
-            df_up = pd.read_csv(csv_file) if csv_file.name.endswith('.csv') else pd.read_excel(csv_file)
-            col = next((c for c in df_up.columns if "SYMBOL" in c.upper()), None)
-            if col: tickers = [f"{x.strip()}.NS" if not str(x).endswith(".NS") else x for x in df_up[col].dropna().unique()]
-        except: st.error("File Error")
 st.markdown("<br>", unsafe_allow_html=True)
+shared_universe = "Custom" not in scan_source
+scan_service = get_scan_service()
+
+def run_upload_scan(job):
+    """Progressive private scan: results land in the tabs chunk by chunk; Stop (any rerun) keeps them for Resume."""
+    st.button("⏹️ Stop scan")  # clicking reruns the script, which interrupts the loop below
+    status = st.empty(); status.info("Reading upload...")
+    live = st.empty()
+    def on_chunk(job, results):
+        st.session_state['scan_data'] = job.table
+        sig = job.table.view(np.flatnonzero(job.table.texts["Signal_Quality"] != "⚪ Neutral"), ["Symbol", "Signal_Quality", "Price", "Change", "All_Tags"])
+        status.info(f"⏳ Scanned {job.done} stocks | {len(job.table)} results | {len(sig)} signals so far")
+        live.dataframe(sig, use_container_width=True, height=240)
+    with collect() as fetch:
+        try: job.run(iter_upload_tickers(csv_file, csv_file.name), on_chunk=on_chunk)
+        except Exception: st.error("File Error")
+    status.empty(); live.empty()
+    if fetch.partial: st.warning(f"⚠️ {fetch.summary()}. Scan the file again later to fill them in.")
+
+if csv_file is not None:
+    upload_id = source_id(csv_file.file_id, csv_file.name, csv_file.size)
+    job = st.session_state.get('scan_job')
+    if job is not None and job.source_id == upload_id and job.done and not job.finished:
+        if st.button(f"▶️ Resume scan ({job.done} stocks done)", type="secondary"): run_upload_scan(job)
 if st.button("🚀 START AI SCANNING", type="primary"):
-    if not tickers: st.error("List Empty")
+    if csv_file is not None:
+        job = st.session_state['scan_job'] = ScanJob(upload_id)
+        st.session_state.pop('scan_key', None)
+        run_upload_scan(job)
+    elif not tickers: st.error("List Empty")
     else:
-        L_All = []
-        bar = st.progress(0)
-        for i, t in enumerate(tickers):
-            d = analyze_stock_hybrid(t)
-            if d: L_All.append(d)
-            bar.progress((i+1)/len(tickers))
+        bar = st.progress(0, text=f"Fetching market data for {len(tickers)} stocks...")
+        progress = lambda i, n: bar.progress(i / n, text=f"Analyzing {i}/{n}")
+        # Built-in lists: one scan per 15m bar for all sessions; others joining wait for it
+        if scan_service.computing(tickers): bar.progress(0, text="Another session is scanning this list, waiting for its results...")
+        snap = scan_service.get(tickers, progress=progress)
+        st.session_state['scan_data'] = snap.table; st.session_state['scan_key'] = snap.key
         bar.empty()
-        st.session_state['scan_data'] = L_All
+
+# Subscribed to the shared list: pick up newer snapshots other sessions computed
+if shared_universe and tickers and st.session_state.get('scan_key'):
+    snap = scan_service.latest(tickers)
+    if snap is not None and snap.key[0] == st.session_state['scan_key'][0]:
+        if snap.key != st.session_state['scan_key']:
+            st.session_state['scan_data'] = snap.table; st.session_state['scan_key'] = snap.key
+        st.caption(f"🛰️ Shared scan of the {snap.bar.strftime('%d-%m %H:%M')} bar | computed in {snap.seconds:.0f}s | opened by {snap.served} session(s)")
+        if snap.partial: st.warning(f"⚠️ {snap.status.summary()}. The next scan of this bar retries them.")
+
+# 🔄 AUTO-RUN: one bar-aligned scheduler per universe rescans only symbols with a new 15m bar
+@st.fragment(run_every=20)
+def auto_run_sync(tickers, owner):
+    from scheduler import get_auto_scanner
+    auto = get_auto_scanner(tickers)  # a fresh one if the last stopped idle
+    auto.prioritize(list(st.session_state['portfolio']['holdings']), owner)
+    if (id(auto), auto.version) != st.session_state.get('auto_version'):
+        rows = auto.rows(owner)
+        if rows:
+            st.session_state['auto_version'] = (id(auto), auto.version)
+            st.session_state['scan_data'] = ScanResultTable.from_results(rows)
+            st.rerun()
+    nxt = auto.next_wake.strftime('%d-%m %H:%M') if auto.next_wake is not None else "-"
+    scanned = sum(s in auto.results for s in auto.tickers)
+    st.caption(f"🔄 Auto-Run: {scanned}/{len(auto.tickers)} scanned | next bar scan {nxt} IST")
+
+if auto_run and csv_file is not None and not tickers:
+    try: tickers = list(dict.fromkeys(iter_upload_tickers(csv_file, csv_file.name)))
+    except Exception: st.error("File Error")
+if auto_run and tickers:
+    auto_run_sync(tuple(tickers), st.session_state.get('personal_sheet_url'))
 st.markdown('</div>', unsafe_allow_html=True)
 
 # 5. RESULTS
@@ -648,9 +430,19 @@ if 'scan_data' in st.session_state:
         logic_map = {"🏆 Golden Line": "F_Golden", "🟢 Parabolic SAR": "F_SAR", "🚀 CE (100%)": "F_CE_100", "⚡ CE (80%)": "F_CE_80", "🐻 PE (100%)": "F_PE_100", "📉 PE (80%)": "F_PE_80", "🏆 Jackpot": "F_Jackpot", "🚀 Swing": "F_Swing", "🥈 Double": "F_Double", "🟢 Fresh Support": "F_Support", "🔴 Fresh Resistance": "F_Resistance", "🌊 Trend": "F_Trend", "📈 Tech": "F_Tech", "💎 Fund": "F_Fund", "🔥 Alerts": "Alert_Trigger"}
     final_tabs = {}
     for name, key in logic_map.items():
-        f = [x for x in data if x.get(key)]
-        if f: final_tabs[name] = f
-    if len(data) > 0: final_tabs["🔮 Result Magic"] = data 
+        f = data.where(key)
+        if len(f): final_tabs[name] = f
+    if "Intraday" not in scan_mode:
+        # One query on the universe-wide zone index, nearest zone first
+        near = get_levels().near(zone_pct, "support", prices=dict(zip(data.symbols, data.floats["Price"])))
+        row_of = {s: j for j, s in enumerate(data.symbols)}
+        rows = np.array([row_of[s] for s in near["Symbol"] if s in row_of], dtype=int)
+        if len(rows): final_tabs["🧲 Near Support Zone"] = rows
+    # User screens run on the table in memory (no rescan)
+    for name, scr in my_screens.items():
+        rows = scr.rows(data)
+        if len(rows): final_tabs[f"🧪 {name}"] = rows
+    if len(data) > 0: final_tabs["🔮 Result Magic"] = np.arange(len(data))
     if final_tabs:
         st.markdown('<div class="dashboard-card">', unsafe_allow_html=True)
         st.markdown('<div class="card-title">🎯 Scan Results</div>', unsafe_allow_html=True)
@@ -658,26 +450,19 @@ if 'scan_data' in st.session_state:
         for i, (name, lst) in enumerate(final_tabs.items()):
             with tabs[i]:
                 if name == "🔮 Result Magic":
-                    st.info(f"AI checking YoY Financial Growth for {len(lst)} stocks... (This may take time)")
+                    # Read from the fundamentals store; anything missing is refreshed in the background
+                    preds = get_fundamentals_store().results(list(data.symbols[lst]))
+                    pending = len(lst) - len(preds)
+                    if pending: st.info(f"⏳ Loading YoY financials for {pending} stocks in the background. Check this tab again shortly.")
                     res_list = []
-                    
-                    progress_text = "Financial Scan in progress. Please wait."
-                    my_bar = st.progress(0, text=progress_text)
-                    
-                    for idx, item in enumerate(lst):
-                        pred = predict_results(item['Symbol'])
-                        if "Growth" in pred or "Positive" in pred or "Weak" in pred:
-                            item['Result_Text'] = pred
-                            res_list.append(item)
-                        
-                        progress_percent = (idx + 1) / len(lst)
-                        my_bar.progress(progress_percent, text=f"Checking {item['Symbol']} ({idx+1}/{len(lst)})")
-                        
-                    my_bar.empty()
+                    for j in lst:
+                        pred = preds.get(data.symbols[j], "N/A")
+                        if "Growth" in pred or "Positive" in pred or "Weak" in pred: res_list.append((j, pred))
                     
                     if not res_list: st.warning("No clear result patterns found.")
                     else:
-                        df_view = pd.DataFrame(res_list)
+                        df_view = data.view([j for j, _ in res_list], ["Symbol", "Price", "Change", "All_Tags"])
+                        df_view["Result_Text"] = [p for _, p in res_list]
                         st.dataframe(
                             df_view[["Symbol", "Price", "Change", "Result_Text", "All_Tags"]], 
                             use_container_width=True,
@@ -686,9 +471,9 @@ if 'scan_data' in st.session_state:
                             }
                         )
                 else:
-                    df_view = pd.DataFrame(lst)
+                    df_view = data.view(lst, ["Symbol", "Signal_Quality", "Price", "Change", "SL", "TGT", "All_Tags"])
                     event = st.dataframe(
-                        df_view[["Symbol", "Signal_Quality", "Price", "Change", "SL", "TGT", "All_Tags"]],
+                        df_view,
                         use_container_width=True,
                         on_select="rerun", 
                         selection_mode="single-row", 
@@ -699,13 +484,18 @@ if 'scan_data' in st.session_state:
                         }
                     )
                     if len(event.selection.rows) > 0:
-                        idx = event.selection.rows[0]; sel_sym = df_view.iloc[idx]['Symbol']
-                        sel_item = next((x for x in lst if x['Symbol'] == sel_sym), None)
+                        idx = event.selection.rows[0]; sel_item = data.item(lst[idx]); sel_sym = sel_item['Symbol']
                         cc1, cc2 = st.columns([3, 1])
                         with cc1: 
-                            chart_df = sel_item['DF_Intra'] if "Day" in name else sel_item['DF_Daily']
+                            # Loaded lazily from the shared frame cache only for the selected row
+                            kind = "intra" if "Day" in name else "daily"
+                            chart_df = data.frame(sel_sym, kind); mins, maxs = sel_item['Min_Idx'], sel_item['Max_Idx']
+                            if chart_df is None:
+                                # The scanned bars are gone: chart the current ones with their own pivots
+                                _, period, interval = FRAME_KEYS[kind]
+                                chart_df = get_history(sel_sym, period=period, interval=interval); mins = maxs = None
                             is_daily = "Day" not in name
-                            plot_chart(sel_sym, chart_df, f"({scan_mode})", sl_multiplier, sel_item['Min_Idx'], sel_item['Max_Idx'], is_daily)
+                            plot_chart(sel_sym, chart_df, f"({scan_mode})", sl_multiplier, mins, maxs, is_daily)
                         with cc2:
                             st.subheader(f"Trade {sel_sym}")
                             if "SUPER" in sel_item['Signal_Quality']: st.success(f"💎 {sel_item['Signal_Quality']}")
@@ -723,6 +513,7 @@ if 'scan_data' in st.session_state:
                             qty = st.number_input("Final Qty", 1, 10000, auto_qty if 'auto_qty' in locals() else 1, key=f"q_{sel_sym}")
                             if st.button("BUY NOW", key=f"b_{sel_sym}", type="secondary"):
                                 if buy_stock(sel_sym, qty, sel_item['Price'], name): st.success("Bought!")
+                                elif not ledger.has_account(SHEET_URL): st.error("Portfolio sheet unavailable, try again shortly.")
                                 else: st.error("No Cash!")
         st.markdown('</div>', unsafe_allow_html=True)
 
@@ -735,9 +526,11 @@ else:
     headers = ["STOCK", "DATE", "CAT", "QTY", "AVG", "LTP", "P/L", "CHART", "SELL"]
     for c, h in zip([c1,c2,c3,c4,c5,c6,c7,c8,c9], headers): c.markdown(f"<div class='table-header'>{h}</div>", unsafe_allow_html=True)
     total_pl_sum = 0.0
+    # One batched quote call for all holdings (shared, TTL-cached) instead of a request per row
+    qs = get_quote_service(); held = list(st.session_state['portfolio']['holdings'])
+    qs.watch(held); quotes = qs.prices(held)
     for s, v in st.session_state['portfolio']['holdings'].items():
-        try: live = yf.Ticker(s).fast_info['last_price']
-        except: live = v['buy_price']
+        live = quotes.get(s, v['buy_price'])
         pl = (live - v['buy_price']) * v['qty']; total_pl_sum += pl
         pl_c = "green" if pl >= 0 else "#ef4444"
         with st.container():
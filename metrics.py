@@ -0,0 +1,168 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+# ==========================================
+# 🩺 HOT-PATH INSTRUMENTATION
+# ==========================================
+# Process-wide counters per stage (and per stage+symbol): calls, seconds
+# (total and max), bytes, failures and timeouts, plus the last error seen.
+#   with stage("yahoo.history") as h: ...; h.bytes += n
+#   fail("analyze", symbol, exc)         # for errors a caller swallows
+# Pool workers send their counters back with their rows (snapshot/merge).
+# Exported as Prometheus text via prometheus_text() and, when
+# MARKET_AI_METRICS_PORT is set, on http://<host>:<port>/metrics.
+
+PREFIX = "marketai"
+
+
+def _is_timeout(exc):
+    return exc is not None and (isinstance(exc, TimeoutError) or "Timeout" in type(exc).__name__)
+
+
+class _Handle:
+    __slots__ = ("bytes",)
+    def __init__(self): self.bytes = 0
+
+
+class Metrics:
+    FIELDS = ("calls", "seconds", "max_seconds", "bytes", "failures", "timeouts")
+
+    def __init__(self, max_symbol_keys=20000):
+        self.max_symbol_keys = max_symbol_keys
+        self.stages = {}; self.symbols = {}; self.errors = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _add(table, key, calls, seconds, nbytes, failed, timeout):
+        row = table.get(key)
+        if row is None: row = table[key] = dict.fromkeys(Metrics.FIELDS, 0)
+        row["calls"] += calls; row["seconds"] += seconds; row["bytes"] += nbytes
+        row["max_seconds"] = max(row["max_seconds"], seconds)
+        row["failures"] += int(failed); row["timeouts"] += int(timeout)
+
+    def record(self, name, seconds=0.0, symbol=None, nbytes=0, failed=False, timeout=False, calls=1):
+        with self._lock:
+            self._add(self.stages, name, calls, seconds, nbytes, failed, timeout)
+            if symbol is not None and ((name, symbol) in self.symbols or len(self.symbols) < self.max_symbol_keys):
+                self._add(self.symbols, (name, symbol), calls, seconds, nbytes, failed, timeout)
+
+    def fail(self, name, symbol=None, exc=None):
+        """Count an error that the caller handles itself (e.g. a skipped symbol)."""
+        self.record(name, symbol=symbol, failed=True, timeout=_is_timeout(exc), calls=0)
+        with self._lock:
+            self.errors[name] = {"symbol": symbol, "error": repr(exc)[:300], "at": time.time()}
+
+    @contextmanager
+    def stage(self, name, symbol=None):
+        h = _Handle(); t0 = time.perf_counter()
+        try: yield h
+        except BaseException as e:
+            self.record(name, time.perf_counter() - t0, symbol, h.bytes, failed=True, timeout=_is_timeout(e))
+            with self._lock: self.errors[name] = {"symbol": symbol, "error": repr(e)[:300], "at": time.time()}
+            raise
+        self.record(name, time.perf_counter() - t0, symbol, h.bytes)
+
+    # --- TRANSPORT (pool workers -> parent) ---
+    def snapshot(self):
+        with self._lock:
+            return {"stages": {k: dict(v) for k, v in self.stages.items()},
+                    "symbols": [[k[0], k[1], dict(v)] for k, v in self.symbols.items()],
+                    "errors": dict(self.errors)}
+
+    @staticmethod
+    def _merge_row(table, key, v):
+        row = table.get(key)
+        if row is None: row = table[key] = dict.fromkeys(Metrics.FIELDS, 0)
+        for f in ("calls", "seconds", "bytes", "failures", "timeouts"): row[f] += v[f]
+        row["max_seconds"] = max(row["max_seconds"], v["max_seconds"])
+
+    def merge(self, snap):
+        with self._lock:
+            for k, v in snap["stages"].items(): self._merge_row(self.stages, k, v)
+            for name, sym, v in snap["symbols"]:
+                if (name, sym) in self.symbols or len(self.symbols) < self.max_symbol_keys:
+                    self._merge_row(self.symbols, (name, sym), v)
+            self.errors.update(snap["errors"])
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}; self.symbols = {}; self.errors = {}
+
+    # --- VIEWS ---
+    def stage_table(self):
+        import pandas as pd
+        snap = self.snapshot()["stages"]
+        df = pd.DataFrame.from_dict(snap, orient="index", columns=list(self.FIELDS))
+        if df.empty: return df
+        df["avg_ms"] = (df["seconds"] / df["calls"].where(df["calls"] > 0)) * 1000
+        return df.sort_values("seconds", ascending=False)
+
+    def slow_symbols(self, n=20, stage=None):
+        """[(stage, symbol, stats)] with the most total seconds (or failures when tied)."""
+        with self._lock:
+            items = [(k[0], k[1], dict(v)) for k, v in self.symbols.items() if stage is None or k[0] == stage]
+        return sorted(items, key=lambda x: (x[2]["seconds"], x[2]["failures"]), reverse=True)[:n]
+
+    def prometheus_text(self, top_symbols=50):
+        snap = self.snapshot()
+        out = []
+        series = [("calls_total", "calls", "counter", "Calls per stage"),
+                  ("seconds_total", "seconds", "counter", "Seconds spent per stage"),
+                  ("seconds_max", "max_seconds", "gauge", "Slowest single call per stage"),
+                  ("bytes_total", "bytes", "counter", "Bytes of data received per stage"),
+                  ("failures_total", "failures", "counter", "Failed calls per stage"),
+                  ("timeouts_total", "timeouts", "counter", "Timed-out calls per stage")]
+        for suffix, field, kind, help_ in series:
+            metric = f"{PREFIX}_stage_{suffix}"
+            out += [f"# HELP {metric} {help_}", f"# TYPE {metric} {kind}"]
+            for name, row in sorted(snap["stages"].items()):
+                out.append(f'{metric}{{stage="{_esc(name)}"}} {row[field]:g}')
+        metric = f"{PREFIX}_symbol_seconds_total"
+        out += [f"# HELP {metric} Seconds per stage and symbol (slowest {top_symbols})", f"# TYPE {metric} counter"]
+        for name, sym, row in self.slow_symbols(top_symbols):
+            out.append(f'{metric}{{stage="{_esc(name)}",symbol="{_esc(sym)}"}} {row["seconds"]:g}')
+        metric = f"{PREFIX}_symbol_failures_total"
+        out += [f"# HELP {metric} Failures per stage and symbol", f"# TYPE {metric} counter"]
+        failed = sorted((x for x in snap["symbols"] if x[2]["failures"]), key=lambda x: -x[2]["failures"])
+        for name, sym, row in failed[:top_symbols]:
+            out.append(f'{metric}{{stage="{_esc(name)}",symbol="{_esc(sym)}"}} {row["failures"]:g}')
+        return "\n".join(out) + "\n"
+
+
+def _esc(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+METRICS = Metrics()
+stage = METRICS.stage
+fail = METRICS.fail
+record = METRICS.record
+
+
+# --- /metrics ENDPOINT ---
+_server = None
+
+def serve_prometheus(port=None, host="0.0.0.0"):
+    """Start (once) a background HTTP server answering GET /metrics."""
+    global _server
+    port = port or int(os.environ.get("MARKET_AI_METRICS_PORT", 0) or 0)
+    if _server is not None or not port: return _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_response(404); self.end_headers(); return
+            body = METRICS.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body))); self.end_headers()
+            self.wfile.write(body)
+        def log_message(self, *a): pass
+
+    try: _server = ThreadingHTTPServer((host, port), Handler)
+    except OSError: return None  # port taken (another app process already serves it)
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
@@ -0,0 +1,147 @@
+import os
+import time
+import sqlite3
+import pandas as pd
+from data_provider import OHLCV_COLS, _PERIOD_OFFSETS, trim_period
+from metrics import record
+
+# ==========================================
+# 💾 PERSISTENT OHLCV CACHE (SQLite)
+# ==========================================
+# One row per (symbol, interval, bar timestamp). Only CLOSED bars are stored:
+# a bar is closed once ts + bar length <= now. The still-forming last bar is
+# always taken from the fresh fetch and never written, so a refresh only has
+# to ask upstream for bars from the last stored timestamp onwards.
+
+INTERVAL_SECONDS = {
+    "1m": 60, "2m": 120, "5m": 300, "15m": 900, "30m": 1800, "60m": 3600, "90m": 5400,
+    "1h": 3600, "1d": 86400, "5d": 5 * 86400, "1wk": 7 * 86400, "1mo": 31 * 86400, "3mo": 92 * 86400,
+}
+
+DEFAULT_CACHE_PATH = os.path.join(".market_cache", "ohlcv.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL, interval TEXT NOT NULL, ts INTEGER NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (symbol, interval, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS series (
+    symbol TEXT NOT NULL, interval TEXT NOT NULL, tz TEXT, last_ts INTEGER, covered_from INTEGER, fetched_at REAL,
+    PRIMARY KEY (symbol, interval)
+);
+"""
+
+def _to_epoch(index):
+    if index.tz is not None: index = index.tz_convert("UTC").tz_localize(None)
+    return (index.values.astype("datetime64[s]").astype("int64")).tolist()
+
+def _from_epoch(ts, tz):
+    idx = pd.to_datetime(ts, unit="s")
+    if tz: idx = idx.tz_localize("UTC").tz_convert(tz)
+    return idx
+
+
+class OHLCVCache:
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("MARKET_AI_CACHE_PATH", DEFAULT_CACHE_PATH)
+        d = os.path.dirname(self.path)
+        if d: os.makedirs(d, exist_ok=True)
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(_SCHEMA)
+
+    def _connect(self):
+        # A connection per call keeps this safe across Streamlit session threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def coverage(self, symbols, interval):
+        """{symbol: (covered_from, last_ts)} for series already in the cache."""
+        out = {}
+        with self._connect() as con:
+            for s in symbols:
+                row = con.execute("SELECT covered_from, last_ts FROM series WHERE symbol=? AND interval=?", (s, interval)).fetchone()
+                if row and row[1] is not None: out[s] = (row[0], row[1])
+        return out
+
+    def load(self, symbol, interval, since=None):
+        with self._connect() as con:
+            meta = con.execute("SELECT tz FROM series WHERE symbol=? AND interval=?", (symbol, interval)).fetchone()
+            if meta is None: return None
+            q = "SELECT ts, open, high, low, close, volume FROM bars WHERE symbol=? AND interval=?"
+            args = [symbol, interval]
+            if since is not None: q += " AND ts >= ?"; args.append(int(since))
+            rows = con.execute(q + " ORDER BY ts", args).fetchall()
+        if not rows: return pd.DataFrame(columns=OHLCV_COLS)
+        ts = [r[0] for r in rows]
+        df = pd.DataFrame([r[1:] for r in rows], columns=OHLCV_COLS, index=_from_epoch(ts, meta[0]))
+        return df
+
+    def store(self, symbol, interval, df, now=None, covered_from=None):
+        """Upsert closed bars; returns the frame's still-forming tail (not persisted).
+
+        covered_from marks a full-window fetch: history is complete from there on.
+        """
+        if df is None or df.empty: return df
+        now = time.time() if now is None else now
+        bar_len = INTERVAL_SECONDS.get(interval, 86400)
+        ts = _to_epoch(df.index)
+        closed = [i for i, t in enumerate(ts) if t + bar_len <= now]
+        tz = str(df.index.tz) if df.index.tz is not None else ""
+        if closed:
+            vals = df[OHLCV_COLS].astype(float).values
+            rows = [(symbol, interval, ts[i], *vals[i]) for i in closed]
+            with self._connect() as con:
+                con.executemany("INSERT OR REPLACE INTO bars VALUES (?,?,?,?,?,?,?,?)", rows)
+                con.execute(
+                    "INSERT INTO series VALUES (?,?,?,?,?,?) ON CONFLICT(symbol, interval) DO UPDATE SET "
+                    "tz=excluded.tz, last_ts=MAX(COALESCE(series.last_ts, 0), excluded.last_ts), "
+                    "covered_from=MIN(COALESCE(series.covered_from, excluded.covered_from), COALESCE(excluded.covered_from, series.covered_from)), "
+                    "fetched_at=excluded.fetched_at",
+                    (symbol, interval, tz, ts[closed[-1]], covered_from, now))
+        return df.iloc[closed[-1] + 1:] if closed else df
+
+
+class CachedProvider:
+    """Wraps any provider: full history once, afterwards only bars since the last closed bar."""
+
+    def __init__(self, provider, cache=None, clock=time.time):
+        self.provider = provider
+        self.cache = cache or OHLCVCache()
+        self.clock = clock
+
+    def info(self, symbols):
+        return self.provider.info(symbols)
+
+    def history(self, symbols, period="1y", interval="1d", start=None):
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols: return {}
+        now = self.clock()
+        off = _PERIOD_OFFSETS.get(period, pd.DateOffset(years=1))
+        window_start = (pd.Timestamp(now, unit="s") - off).timestamp()
+        if start is not None: window_start = max(window_start, pd.Timestamp(start).timestamp())
+
+        cov = self.cache.coverage(symbols, interval)
+        # Cold: never seen, only a shorter window stored, or so stale the gap exceeds the window
+        cold = [s for s in symbols if s not in cov or cov[s][0] is None or cov[s][0] > window_start or cov[s][1] < window_start]
+        warm = [s for s in symbols if s not in cold]
+        record(f"cache.cold.{interval}", calls=len(cold)); record(f"cache.warm.{interval}", calls=len(warm))
+
+        fresh = {}
+        if cold: fresh.update(self.provider.history(cold, period=period, interval=interval))
+        if warm:
+            # Re-ask from the last stored bar so nothing in between can be missed
+            since = pd.Timestamp(min(cov[s][1] for s in warm), unit="s", tz="UTC")
+            fresh.update(self.provider.history(warm, period=period, interval=interval, start=since))
+
+        out = {}
+        for s in symbols:
+            forming = self.cache.store(s, interval, fresh.get(s), now=now, covered_from=int(window_start) if s in cold else None)
+            df = self.cache.load(s, interval, since=window_start)
+            if df is None: continue
+            if forming is not None and not forming.empty:
+                df = pd.concat([df, forming[OHLCV_COLS]])
+                df = df[~df.index.duplicated(keep="last")]
+            df = trim_period(df, period) if start is None else df
+            if not df.empty: out[s] = df
+        return out
@@ -0,0 +1,160 @@
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 🧵 PARALLEL SCAN (process pool + shared memory)
+# ==========================================
+# The parent packs every prefetched frame into right-aligned arrays that live
+# in shared memory: (5, n_symbols, n_bars) float64 OHLCV plus (n_symbols, n_bars)
+# int64 UTC timestamps, per base interval. Workers attach by name, rebuild only their
+# batch's frames from those buffers and send back compact result rows, so no
+# DataFrame is ever pickled in either direction. The parent's streaming
+# intraday state travels with each batch and comes back advanced: a worker
+# never uses a state of its own (it may hold an older one from a previous
+# scan, or none), so the flags are the serial loop's. A dead worker breaks
+# the pool: it is dropped (the next scan starts a fresh one) and the error
+# reaches run_scan, which finishes the scan serially.
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+INTERVALS = ["daily", "intra"]
+_NAT = np.iinfo(np.int64).min
+
+_pool = None
+_pool_size = 0
+
+def _get_pool(workers):
+    global _pool, _pool_size
+    if _pool is None or _pool_size != workers:
+        if _pool is not None: _pool.shutdown(wait=False, cancel_futures=True)
+        # spawn: forking a threaded Streamlit server is not safe
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"))
+        _pool_size = workers
+    return _pool
+
+def _drop_pool():
+    global _pool, _pool_size
+    if _pool is not None: _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None; _pool_size = 0
+
+def _share(arr):
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[...] = arr
+    return shm, (shm.name, arr.shape, arr.dtype.str)
+
+def _pack(frames):
+    """[DataFrame or None per row] -> (ohlcv, ts, lens, tzs) right-aligned arrays."""
+    n = len(frames)
+    T = max((len(df) for df in frames if df is not None), default=1) or 1
+    ohlcv = np.full((5, n, T), np.nan); ts = np.full((n, T), _NAT, dtype=np.int64)
+    lens = np.zeros(n, dtype=np.int64); tzs = [""] * n
+    for r, df in enumerate(frames):
+        if df is None or df.empty: continue
+        k = len(df); lens[r] = k
+        idx = df.index
+        tzs[r] = str(idx.tz) if idx.tz is not None else ""
+        if idx.tz is not None: idx = idx.tz_convert("UTC").tz_localize(None)
+        ts[r, T - k:] = idx.values.astype("datetime64[ns]").astype(np.int64)
+        for f, col in enumerate(FIELDS): ohlcv[f, r, T - k:] = df[col].to_numpy(dtype=float)
+    return ohlcv, ts, lens, tzs
+
+
+# --- WORKER SIDE ---
+_attached = {}
+
+def _view(spec):
+    name, shape, dtype = spec
+    if name not in _attached:
+        # Spawned workers share the parent's resource tracker; the parent unlinks after the scan
+        _attached[name] = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, np.dtype(dtype), buffer=_attached[name].buf)
+
+def _release_stale(keep):
+    for name in [n for n in _attached if n not in keep]:
+        try: _attached.pop(name).close()
+        except Exception: pass
+
+def _frame(ohlcv, ts, lens, tzs, r):
+    k = int(lens[r])
+    if k == 0: return None
+    T = ts.shape[1]
+    idx = pd.DatetimeIndex(ts[r, T - k:].astype("datetime64[ns]"))
+    if tzs[r]: idx = idx.tz_localize("UTC").tz_convert(tzs[r])
+    return pd.DataFrame({col: ohlcv[f, r, T - k:].copy() for f, col in enumerate(FIELDS)}, index=idx)
+
+def _scan_batch(specs, meta, batch, states):
+    from scanner_core import analyze_stock_hybrid, result_rows
+    from indicators import daily_feature_table
+    from streaming import get_registry
+    from metrics import METRICS, stage
+    METRICS.reset()  # only this batch's counters travel back
+    _release_stale({spec[0] for iv in specs.values() for spec in iv.values()})
+    registry = get_registry()
+    registry.adopt(states, replace=[sym for _, sym in batch])
+    views = {iv: (_view(s["ohlcv"]), _view(s["ts"]), meta["lens"][iv], meta["tzs"][iv]) for iv, s in specs.items()}
+    bundles = {}
+    for r, sym in batch:
+        b = {iv: _frame(*views[iv], r) for iv in INTERVALS}
+        b["info"] = meta["info"].get(sym, {})
+        bundles[sym] = b
+    with stage("indicators"):
+        feats = daily_feature_table({s: b["daily"] for s, b in bundles.items() if b["daily"] is not None and len(b["daily"]) >= 50})
+    out = []
+    for r, sym in batch:
+        with stage("analyze", sym): res = analyze_stock_hybrid(sym, bundles[sym], feats.loc[sym] if sym in feats.index else None)
+        if res: out.append((r, result_rows([res])[0]))
+    return out, METRICS.snapshot(), registry.export([sym for _, sym in batch])
+
+
+# --- PARENT SIDE ---
+def run_parallel_scan(tickers, bundles, workers=None, batch_size=32, progress=None):
+    """Same results as the serial loop, computed across a process pool."""
+    from metrics import METRICS
+    from streaming import get_registry
+    workers = workers or os.cpu_count() or 1
+    symbols = [t for t in dict.fromkeys(tickers) if t in bundles]
+    if not symbols: return []
+    blocks = []; specs = {}; lens = {}; tzs = {}
+    try:
+        for iv in INTERVALS:
+            ohlcv, ts, lens[iv], tzs[iv] = _pack([bundles[s].get(iv) for s in symbols])
+            shm_o, spec_o = _share(ohlcv); shm_t, spec_t = _share(ts)
+            blocks += [shm_o, shm_t]; specs[iv] = {"ohlcv": spec_o, "ts": spec_t}
+        # Alerts travel back in the rows; the parent dispatches them
+        meta = {"lens": lens, "tzs": tzs, "info": {s: bundles[s].get("info") or {} for s in symbols}}
+        rows = list(enumerate(symbols))
+        batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+        pool = _get_pool(workers)
+        results = {}; states = {}; done = 0
+        try:
+            registry = get_registry()
+            jobs = [pool.submit(_scan_batch, specs, meta, b, registry.export([sym for _, sym in b])) for b in batches]
+            for job in as_completed(jobs):
+                rows, snap, st = job.result()
+                METRICS.merge(snap); states.update(st)
+                for r, row in rows: results[r] = row
+                done += 1
+                if progress: progress(min(done * batch_size, len(symbols)), len(symbols))
+        except BrokenProcessPool:
+            _drop_pool(); raise
+        registry.adopt(states)
+    finally:
+        for shm in blocks:
+            shm.close(); shm.unlink()
+
+    by_symbol = {symbols[r]: row for r, row in results.items()}
+    out = []
+    for sym in tickers:
+        if sym not in by_symbol: continue
+        row = dict(by_symbol[sym])
+        # Chart frames stay in the parent; re-attach them exactly as the serial path holds them
+        row["DF_Daily"] = bundles[sym]["daily"].copy()
+        row["DF_Intra"] = bundles[sym]["intra"].copy() if bundles[sym].get("intra") is not None else None
+        row["Min_Idx"] = np.asarray(row["Min_Idx"], dtype=np.int64)
+        row["Max_Idx"] = np.asarray(row["Max_Idx"], dtype=np.int64)
+        out.append(row)
+    return out
@@ -0,0 +1,83 @@
+import time
+import threading
+from metrics import stage
+
+# ==========================================
+# 💹 LIVE QUOTE SERVICE
+# ==========================================
+# Last prices for the holdings table: one batched request for every symbol
+# that is missing or older than the TTL, shared by all sessions in the
+# process. Watched symbols are also refreshed by a background thread, so
+# a rerun normally renders straight from memory.
+
+def _default_fetch(symbols):
+    from data_provider import get_provider
+    p = get_provider()
+    p = getattr(p, "provider", p)  # skip the bar cache: 1m quote bars are not worth storing
+    frames = p.history(symbols, period="1d", interval="1m")
+    out = {}
+    for s, df in frames.items():
+        close = df["Close"].dropna()
+        if not close.empty: out[s] = float(close.iloc[-1])
+    return out
+
+
+class QuoteService:
+    def __init__(self, ttl=20.0, fetch=None, clock=time.monotonic, watch_for=600.0):
+        self.ttl = ttl
+        self.fetch = fetch or _default_fetch
+        self.clock = clock
+        self._quotes = {}  # symbol -> (price, fetched_at)
+        self._watched = {}  # symbol -> last time a session asked for it
+        self.watch_for = watch_for
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _stale(self, symbols, now):
+        return [s for s in symbols if s not in self._quotes or now - self._quotes[s][1] > self.ttl]
+
+    def refresh(self, symbols):
+        if not symbols: return {}
+        try:
+            with stage("quotes.fetch"): fresh = self.fetch(list(symbols))
+        except Exception: fresh = {}
+        now = self.clock()
+        with self._lock:
+            for s, px in fresh.items(): self._quotes[s] = (px, now)
+        return fresh
+
+    def prices(self, symbols, block=True):
+        """{symbol: last price}. Stale/missing symbols are fetched in ONE batched call when block=True."""
+        symbols = list(dict.fromkeys(symbols))
+        with self._lock: todo = self._stale(symbols, self.clock())
+        if todo and block: self.refresh(todo)
+        with self._lock:
+            return {s: self._quotes[s][0] for s in symbols if s in self._quotes}
+
+    # --- BACKGROUND REFRESH ---
+    def watch(self, symbols):
+        now = self.clock()
+        with self._lock:
+            for s in symbols: self._watched[s] = now
+            start = self._thread is None or not self._thread.is_alive()
+            if start:
+                self._thread = threading.Thread(target=self._loop, name="quote-refresh", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            now = self.clock()
+            with self._lock:
+                # Symbols nobody has looked at for a while (sold, session gone) drop out
+                for s in [s for s, t in self._watched.items() if now - t > self.watch_for]: del self._watched[s]
+                todo = self._stale(list(self._watched), now)
+            if todo: self.refresh(todo)
+            time.sleep(max(self.ttl / 2, 1.0))
+
+
+_service = None
+
+def get_quote_service():
+    global _service
+    if _service is None: _service = QuoteService()
+    return _service
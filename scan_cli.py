@@ -0,0 +1,116 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from scanner_core import STOCK_LISTS, run_scan, result_rows, tickers_from_frame, get_dispatcher
+from scan_results import ScanResultTable, FrameCache
+from screens import compile_screen, RuleError
+from scan_stream import ScanJob, iter_upload_tickers, source_id
+from throttle import collect
+
+# ==========================================
+# 🖥️ HEADLESS SCAN CLI
+# ==========================================
+# python scan_cli.py --list part1 --out scan.json
+# python scan_cli.py --csv my_universe.csv --out scan.parquet
+# python scan_cli.py --list all --screen "rsi_d > 60 and adx > 25 and weekly_up"
+# python scan_cli.py --csv big.csv --out scan.jsonl [--resume]   (rows written per chunk)
+
+def load_tickers(args):
+    if args.csv:
+        df_up = pd.read_csv(args.csv) if args.csv.endswith(".csv") else pd.read_excel(args.csv)
+        return tickers_from_frame(df_up)
+    return STOCK_LISTS[args.list]
+
+def stream_scan(args, screen):
+    """Progressive scan to JSON lines: rows are appended per chunk, the job state sits next to the output."""
+    state_path = args.out + ".job.json"
+    if args.csv:
+        st_ = os.stat(args.csv); sid = source_id(os.path.abspath(args.csv), st_.st_size, st_.st_mtime)
+        fh = open(args.csv, "rb"); tickers = iter_upload_tickers(fh, args.csv)
+    else:
+        sid = source_id(args.list); fh = None; tickers = STOCK_LISTS[args.list]
+    job = ScanJob(sid, args.chunk)
+    if args.resume and os.path.exists(state_path):
+        with open(state_path) as f: state = json.load(f)
+        if state["source_id"] != sid:
+            print("--resume: the job file belongs to another universe", file=sys.stderr); return None
+        job.done = state["done"]; job.chunk_size = state["chunk_size"]
+    elif os.path.exists(args.out): os.remove(args.out)
+    written = [0]
+    def on_chunk(job, results):
+        rows = result_rows(results)
+        if screen is not None:
+            rows = [rows[i] for i in screen.rows(ScanResultTable.from_results(rows, frame_cache=FrameCache()))]
+        with open(args.out, "a") as out:
+            for r in rows: out.write(json.dumps(json_safe(r), default=str, allow_nan=False) + "\n")
+        with open(state_path, "w") as f: json.dump(job.state(), f)
+        job.parts.clear()  # rows are on disk; keep memory flat
+        written[0] += len(rows)
+        if not args.quiet: print(f"\r{job.done} scanned, {written[0]} rows", end="", file=sys.stderr)
+    try: job.run(tickers, workers=args.workers, on_chunk=on_chunk)
+    finally:
+        if fh is not None: fh.close()
+    if job.finished and os.path.exists(state_path): os.remove(state_path)
+    return job.done, written[0]
+
+def json_safe(v):
+    """NaN/inf -> None, recursively: JSON has no NaN and strict readers reject it."""
+    if isinstance(v, dict): return {k: json_safe(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)): return [json_safe(x) for x in v]
+    if isinstance(v, (float, np.floating)) and not np.isfinite(v): return None
+    return v
+
+def write_rows(rows, path):
+    if path.endswith(".parquet"):
+        df = pd.DataFrame(rows)
+        for c in ("Min_Idx", "Max_Idx"):
+            if c in df: df[c] = df[c].apply(json.dumps)
+        df.to_parquet(path, index=False)
+    else:
+        with open(path, "w") as fh: json.dump(json_safe(rows), fh, indent=1, default=str, allow_nan=False)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run the Market AI scan without the Streamlit UI.")
+    src = ap.add_mutually_exclusive_group()
+    src.add_argument("--list", choices=sorted(STOCK_LISTS), default="part1", help="built-in stock list")
+    src.add_argument("--csv", help="CSV/XLSX with a SYMBOL column")
+    ap.add_argument("--out", default="scan_results.json", help="output file (.json or .parquet)")
+    ap.add_argument("--workers", type=int, default=None, help="process-pool size (default MARKET_AI_WORKERS or 1)")
+    ap.add_argument("--screen", help="keep only rows matching a rule (see screens.py)")
+    ap.add_argument("--chunk", type=int, default=50, help="symbols per chunk for .jsonl output")
+    ap.add_argument("--resume", action="store_true", help="continue an interrupted .jsonl scan")
+    ap.add_argument("--quiet", action="store_true")
+    args = ap.parse_args(argv)
+    try: screen = compile_screen(args.screen) if args.screen else None
+    except RuleError as e:
+        print(f"Bad --screen: {e}", file=sys.stderr); return 2
+
+    t0 = time.perf_counter()
+    if args.out.endswith(".jsonl"):
+        with collect() as fetch: out = stream_scan(args, screen)
+        if out is None: return 1
+        get_dispatcher().flush()
+        if fetch.partial: print(f"\n{fetch.summary()}", file=sys.stderr)
+        if not args.quiet:
+            print(f"\nScanned {out[0]} symbols -> {out[1]} rows in {time.perf_counter() - t0:.1f}s ({args.out})", file=sys.stderr)
+        return 0
+    tickers = load_tickers(args)
+    if not tickers:
+        print("List Empty", file=sys.stderr); return 1
+    progress = None if args.quiet else (lambda i, n: print(f"\r{i}/{n}", end="", file=sys.stderr))
+    with collect() as fetch: rows = result_rows(run_scan(tickers, progress=progress, workers=args.workers))
+    if screen is not None:
+        rows = [rows[i] for i in screen.rows(ScanResultTable.from_results(rows, frame_cache=FrameCache()))]
+    write_rows(rows, args.out)
+    get_dispatcher().flush()  # daemon sender: let queued alerts go out before exit
+    if fetch.partial: print(f"\n{fetch.summary()}", file=sys.stderr)
+    if not args.quiet:
+        print(f"\nScanned {len(tickers)} symbols -> {len(rows)} results in {time.perf_counter() - t0:.1f}s ({args.out})", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
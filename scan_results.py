@@ -0,0 +1,172 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 🗜️ COMPACT SCAN RESULTS
+# ==========================================
+# A scan used to live in session_state as one dict per symbol holding two
+# DataFrames, pivot arrays and ~20 bools. ScanResultTable keeps it columnar:
+#   flags   -> one uint32 bitset per row (bit = position in FLAG_COLUMNS),
+#              plus the row list of every flag, built once (tabs are lookups)
+#   scalars -> typed numpy arrays, strings -> object arrays
+#   pivots  -> one flat int32 array + offsets per side
+# Chart frames are NOT held per session: they go into the process-wide
+# FRAME_CACHE keyed by (symbol, kind, version) and are re-loaded lazily on
+# select. The version (last bar, bar count) pins the exact frame a row's pivot
+# positions index, so a later scan by another session cannot move them.
+
+FLAG_COLUMNS = [
+    "F_Jackpot", "F_CE_100", "F_CE_80", "F_PE_100", "F_PE_80", "F_Day_Buy", "F_Day_Sell", "F_2PM",
+    "F_Swing", "F_Double", "F_Tech", "F_Fund", "F_Trend", "F_Support", "F_Resistance", "F_Golden",
+    "F_SAR", "Alert_Trigger", "F_Weekly_Up",
+]
+FLAG_BIT = {f: np.uint32(1 << i) for i, f in enumerate(FLAG_COLUMNS)}
+FLOAT_COLUMNS = ["Price", "Change", "SL", "TGT", "ATR", "RSI", "ADX", "ST_Dir", "SMA20", "SMA200", "Vol_Ratio", "PE", "ROE"]
+TEXT_COLUMNS = ["Symbol", "Signal_Quality", "All_Tags", "Weekly"]
+FRAME_KEYS = {"daily": ("DF_Daily", "1y", "1d"), "intra": ("DF_Intra", "5d", "15m")}
+
+
+def _ns(idx):
+    return idx.values.astype("datetime64[ns]").view(np.int64)
+
+def frame_version(df):
+    """(last bar epoch ns, bar count) of a frame, None for no frame."""
+    if df is None or df.empty: return None
+    return (int(_ns(df.index[-1:])[0]), len(df))
+
+def _window(df, version):
+    """The bars of df that made up a frame of this version, or None when they are no longer all there."""
+    if df is None or df.empty: return None
+    last, n = version
+    df = df.iloc[:int(np.searchsorted(_ns(df.index), last, side="right"))].iloc[-n:]
+    return df if frame_version(df) == version else None
+
+
+class FrameCache:
+    """Bounded LRU of chart frames shared by every session in the process."""
+
+    def __init__(self, max_items=1500):
+        self.max_items = max_items
+        self._data = OrderedDict(); self._lock = threading.Lock()
+
+    def put(self, key, df):
+        if df is None: return
+        with self._lock:
+            self._data[key] = df; self._data.move_to_end(key)
+            while len(self._data) > self.max_items: self._data.popitem(last=False)
+
+    def get(self, key):
+        """key = (symbol, kind, version); a versioned key gives that exact frame or None."""
+        with self._lock:
+            df = self._data.get(key)
+            if df is not None: self._data.move_to_end(key)
+        if df is None:
+            # Evicted (or another process did the scan): reload from the bar cache
+            from data_provider import get_history
+            _, period, interval = FRAME_KEYS[key[1]]
+            df = get_history(key[0], period=period, interval=interval)
+            if key[2] is not None: df = _window(df, key[2])
+            if df is not None and not df.empty: self.put(key, df)
+        return df
+
+FRAME_CACHE = FrameCache()
+
+
+def _csr(lists):
+    offs = np.zeros(len(lists) + 1, dtype=np.int32)
+    offs[1:] = np.cumsum([len(x) for x in lists])
+    flat = np.concatenate([np.asarray(x, dtype=np.int32) for x in lists]) if lists else np.zeros(0, dtype=np.int32)
+    return flat, offs
+
+
+class ScanResultTable:
+    def __init__(self, flags, floats, texts, pivots, versions=None):
+        self.flags = flags; self.floats = floats; self.texts = texts; self.pivots = pivots
+        self.versions = versions or {k: np.full(len(flags), None, dtype=object) for k in FRAME_KEYS}
+        self.index = {f: np.flatnonzero(flags & bit) for f, bit in FLAG_BIT.items()}
+        self._rows = None
+
+    @classmethod
+    def from_results(cls, results, frame_cache=FRAME_CACHE):
+        n = len(results)
+        flags = np.zeros(n, dtype=np.uint32)
+        for f, bit in FLAG_BIT.items():
+            flags |= np.array([bool(r.get(f)) for r in results], dtype=bool).astype(np.uint32) * bit
+        floats = {c: np.array([r.get(c, np.nan) for r in results], dtype=np.float64) for c in FLOAT_COLUMNS}
+        texts = {c: np.array([r.get(c, "") for r in results], dtype=object) for c in TEXT_COLUMNS}
+        pivots = {k: _csr([r.get(k, []) for r in results]) for k in ("Min_Idx", "Max_Idx")}
+        versions = {k: np.full(n, None, dtype=object) for k in FRAME_KEYS}
+        for i, r in enumerate(results):
+            for kind, (col, _, _) in FRAME_KEYS.items():
+                # Rows without frames (auto-run) carry the versions their frames were cached under
+                v = frame_version(r[col]) if r.get(col) is not None else r.get("Frame_Versions", {}).get(kind)
+                versions[kind][i] = v
+                if r.get(col) is not None: frame_cache.put((r["Symbol"], kind, v), r[col])
+        return cls(flags, floats, texts, pivots, versions)
+
+    @classmethod
+    def concat(cls, tables):
+        """One table from several (e.g. the chunks of a progressive scan), rows in order."""
+        tables = [t for t in tables if t is not None]
+        if len(tables) == 1: return tables[0]
+        if not tables: return cls.from_results([])
+        pivots = {}
+        for k in ("Min_Idx", "Max_Idx"):
+            flats = [t.pivots[k][0] for t in tables]; offs = [t.pivots[k][1] for t in tables]
+            base = np.cumsum([0] + [o[-1] for o in offs[:-1]])
+            pivots[k] = (np.concatenate(flats), np.concatenate([offs[0][:1]] + [o[1:] + b for o, b in zip(offs, base)]).astype(np.int32))
+        return cls(np.concatenate([t.flags for t in tables]),
+                   {c: np.concatenate([t.floats[c] for t in tables]) for c in FLOAT_COLUMNS},
+                   {c: np.concatenate([t.texts[c] for t in tables]) for c in TEXT_COLUMNS}, pivots,
+                   {k: np.concatenate([t.versions[k] for t in tables]) for k in FRAME_KEYS})
+
+    def __len__(self):
+        return len(self.flags)
+
+    @property
+    def symbols(self):
+        return self.texts["Symbol"]
+
+    @property
+    def nbytes(self):
+        strs = sum(len(s) for col in self.texts.values() for s in col)
+        return (self.flags.nbytes + sum(a.nbytes for a in self.floats.values()) + strs
+                + sum(a.nbytes + o.nbytes for a, o in self.pivots.values()) + sum(a.nbytes for a in self.index.values()))
+
+    def where(self, flag):
+        """Row indices whose flag bit is set."""
+        return self.index[flag]
+
+    def column(self, name):
+        """One column as an array: floats, texts, or a bool array for a flag."""
+        if name in self.floats: return self.floats[name]
+        if name in self.texts: return self.texts[name]
+        return (self.flags & FLAG_BIT[name]) > 0
+
+    def view(self, idx, columns):
+        cols = {}
+        for c in columns:
+            if c in self.floats: cols[c] = self.floats[c][idx]
+            elif c in self.texts: cols[c] = self.texts[c][idx]
+            elif c in FLAG_BIT: cols[c] = (self.flags[idx] & FLAG_BIT[c]) > 0
+        return pd.DataFrame(cols)
+
+    def _pivots(self, key, i):
+        flat, offs = self.pivots[key]
+        return flat[offs[i]:offs[i + 1]]
+
+    def item(self, i):
+        """One row as the old result dict (without frames)."""
+        row = {c: self.texts[c][i] for c in TEXT_COLUMNS}
+        row.update({c: float(self.floats[c][i]) for c in FLOAT_COLUMNS})
+        row.update({f: bool(self.flags[i] & bit) for f, bit in FLAG_BIT.items()})
+        row["Min_Idx"] = self._pivots("Min_Idx", i); row["Max_Idx"] = self._pivots("Max_Idx", i)
+        return row
+
+    def frame(self, symbol, kind="daily", frame_cache=FRAME_CACHE):
+        """The frame this row was scanned on (its Min_Idx/Max_Idx index it); None once those bars are gone."""
+        if self._rows is None: self._rows = {s: i for i, s in enumerate(self.symbols)}
+        i = self._rows.get(symbol)
+        return frame_cache.get((symbol, kind, self.versions[kind][i] if i is not None else None))
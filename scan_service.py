@@ -0,0 +1,120 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import pandas as pd
+from metrics import record
+from throttle import collect
+from scheduler import SystemClock, SETTLE_SECONDS, last_bar_close
+
+# ==========================================
+# 🛰️ SHARED SCAN SERVICE
+# ==========================================
+# Every session that pressed "START AI SCANNING" used to rescan the whole
+# universe on its own. Scans of a shared universe are now computed once per
+# (universe, timeframe, bar boundary) and kept in a process-wide store that
+# every Streamlit session reads:
+#   - the first session asking for a key runs the scan; sessions asking for
+#     the same key meanwhile wait for that result instead of starting another
+#   - a failed scan wakes the waiters, and the next one in line retries
+#   - the bar boundary comes from the clock (+ settle delay), so a new 15m bar
+#     gives a new key and the next request scans again
+# Sessions keep only a reference to the shared (read-only) snapshot. Private
+# universes (uploaded CSVs) keep calling run_scan directly.
+# A snapshot that Yahoo throttling left partial is served with its status, and
+# the first request after `partial_retry` seconds scans the bar again.
+
+TIMEFRAMES = {"15m": 15, "1d": None}  # bar minutes for last_bar_close (None: one key per session)
+
+
+class ScanSnapshot:
+    def __init__(self, key, table, seconds, clock_at, status=None):
+        self.key = key; self.table = table; self.seconds = seconds
+        self.computed_at = clock_at; self.served = 0
+        self.status = status  # throttle.FetchStatus of the scan
+
+    @property
+    def bar(self):
+        return self.key[2]
+
+    @property
+    def partial(self):
+        return self.status is not None and self.status.partial
+
+
+def universe_id(tickers):
+    return hashlib.sha1("|".join(dict.fromkeys(tickers)).encode()).hexdigest()[:16]
+
+def _default_scan(tickers, progress=None):
+    from scanner_core import run_scan
+    from scan_results import ScanResultTable
+    return ScanResultTable.from_results(run_scan(tickers, progress=progress))
+
+
+class ScanService:
+    def __init__(self, scan=None, clock=None, keep=8, settle=SETTLE_SECONDS, holidays=(), partial_retry=60.0):
+        self.scan = scan or _default_scan
+        self.clock = clock or SystemClock()
+        self.keep = keep; self.settle = settle; self.holidays = set(holidays)
+        self.partial_retry = partial_retry
+        self._store = OrderedDict(); self._inflight = {}
+        self._lock = threading.Lock()
+
+    def key(self, tickers, timeframe="15m"):
+        now = self.clock.now() - pd.Timedelta(seconds=self.settle)
+        return (universe_id(tickers), timeframe, last_bar_close(now, self.holidays, TIMEFRAMES[timeframe]))
+
+    def _put(self, snap):
+        with self._lock:
+            self._store[snap.key] = snap; self._store.move_to_end(snap.key)
+            while len(self._store) > self.keep: self._store.popitem(last=False)
+
+    def get(self, tickers, timeframe="15m", progress=None, timeout=None):
+        """Snapshot for the current bar: cached, joined while another session computes it, or scanned here."""
+        key = self.key(tickers, timeframe)
+        while True:
+            with self._lock:
+                snap = self._store.get(key)
+                if snap is not None and snap.partial and (self.clock.now() - snap.computed_at).total_seconds() >= self.partial_retry:
+                    snap = None  # throttled last time: try this bar again
+                if snap is not None:
+                    snap.served += 1; self._store.move_to_end(key)
+                    record("scan_service.hit"); return snap
+                done = self._inflight.get(key)
+                leader = done is None
+                if leader: done = self._inflight[key] = threading.Event()
+            if not leader:
+                record("scan_service.wait")
+                if not done.wait(timeout): return self.latest(tickers, timeframe)
+                continue  # stored now, or the leader failed and someone has to retry
+            record("scan_service.miss")
+            try:
+                t0 = time.perf_counter()
+                with collect() as status: table = self.scan(list(tickers), progress=progress)
+                snap = ScanSnapshot(key, table, time.perf_counter() - t0, self.clock.now(), status)
+                if snap.partial: record("scan_service.partial")
+                snap.served = 1
+                self._put(snap)
+                return snap
+            finally:
+                with self._lock: self._inflight.pop(key, None)
+                done.set()
+
+    def latest(self, tickers, timeframe="15m"):
+        """Newest stored snapshot of this universe, whatever its bar (None if never scanned)."""
+        uid = universe_id(tickers)
+        with self._lock:
+            snaps = [s for k, s in self._store.items() if k[0] == uid and k[1] == timeframe]
+        return max(snaps, key=lambda s: s.bar, default=None)
+
+    def computing(self, tickers, timeframe="15m"):
+        key = self.key(tickers, timeframe)
+        with self._lock: return key in self._inflight
+
+
+_service = None
+
+def get_scan_service():
+    global _service
+    if _service is None: _service = ScanService()
+    return _service
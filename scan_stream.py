@@ -0,0 +1,93 @@
+import hashlib
+from itertools import islice
+import pandas as pd
+from scanner_core import run_scan, symbol_column, normalize_symbol
+from scan_results import ScanResultTable
+
+# ==========================================
+# 🌊 PROGRESSIVE SCAN
+# ==========================================
+# iter_scan() scans a universe chunk by chunk and yields each chunk's rows as
+# soon as it is done (prefetch, features, flags and alerts are per chunk), so
+# the UI can draw results while the rest is still running. The ticker source
+# can itself be lazy: iter_upload_tickers() reads big CSV/XLSX uploads in row
+# chunks instead of loading the whole sheet into pandas.
+# A ScanJob remembers how many (deduplicated) tickers are done plus the
+# compact results so far; a stopped or interrupted job resumes from there.
+
+CHUNK_SIZE = 50
+UPLOAD_CHUNK_ROWS = 5000
+
+
+def iter_upload_tickers(fh, name, chunk_rows=UPLOAD_CHUNK_ROWS):
+    """Tickers from an uploaded CSV/XLSX (SYMBOL column), read a chunk of rows at a time."""
+    fh.seek(0)
+    if name.lower().endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook
+        wb = load_workbook(fh, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            header = next(rows, None) or ()
+            col = symbol_column(header)
+            if col is None: return
+            k = list(header).index(col)
+            for row in rows:
+                if k < len(row) and row[k] is not None and str(row[k]).strip(): yield normalize_symbol(str(row[k]))
+        finally: wb.close()
+        return
+    col = symbol_column(pd.read_csv(fh, nrows=0).columns)
+    if col is None: return
+    fh.seek(0)
+    for chunk in pd.read_csv(fh, usecols=[col], dtype=str, chunksize=chunk_rows):
+        for x in chunk[col].dropna():
+            if x.strip(): yield normalize_symbol(x)
+
+def _unique(tickers):
+    seen = set()
+    for t in tickers:
+        if t not in seen:
+            seen.add(t); yield t
+
+def iter_scan(tickers, chunk_size=CHUNK_SIZE, start=0, workers=None, cancel=None):
+    """Yield (done, results) per chunk. done counts unique tickers and is the resume point for start."""
+    it = _unique(tickers)
+    done = sum(1 for _ in islice(it, start))
+    while True:
+        if cancel is not None and cancel.is_set(): return
+        chunk = list(islice(it, chunk_size))
+        if not chunk: return
+        results = run_scan(chunk, workers=workers)
+        done += len(chunk)
+        yield done, results
+
+
+class ScanJob:
+    """A resumable progressive scan of one universe."""
+
+    def __init__(self, source_id, chunk_size=CHUNK_SIZE):
+        self.source_id = source_id; self.chunk_size = chunk_size
+        self.done = 0; self.finished = False; self.parts = []
+        self._table = None
+
+    @property
+    def table(self):
+        if self._table is None: self._table = ScanResultTable.concat(self.parts)
+        return self._table
+
+    def run(self, tickers, workers=None, cancel=None, on_chunk=None):
+        """Scan from where the job stopped; on_chunk(job, results) after every chunk."""
+        for done, results in iter_scan(tickers, self.chunk_size, self.done, workers, cancel):
+            # Frames go to the shared frame cache; the job keeps only the compact table
+            self.parts.append(ScanResultTable.from_results(results)); self._table = None
+            self.done = done
+            if on_chunk: on_chunk(self, results)
+        self.finished = not (cancel is not None and cancel.is_set())
+        return self
+
+    def state(self):
+        return {"source_id": self.source_id, "chunk_size": self.chunk_size, "done": self.done, "finished": self.finished}
+
+
+def source_id(*parts):
+    """Identifies a universe source (upload id, file path + size + mtime) so a job only resumes on the same one."""
+    return hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:16]
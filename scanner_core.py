@@ -0,0 +1,333 @@
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from data_provider import prefetch_bundles, get_history, get_provider, yahoo_call
+from indicators import daily_feature_table
+from streaming import IntradayState, get_registry
+from timeframes import to_weekly
+from levels import get_levels
+from metrics import stage, fail, record
+from startup import lazy_module
+
+ta = lazy_module("pandas_ta")   # only the weekly SMA and index/sector views need it
+yf = lazy_module("yfinance")
+
+# ==========================================
+# 🧠 SCANNER CORE (headless)
+# ==========================================
+# Pure analysis engine: no Streamlit, no secrets, no Sheets. The Streamlit app
+# and scan_cli.py both import from here, so it can be profiled and run in batch.
+
+warnings.filterwarnings('ignore')
+
+# --- 🔔 TELEGRAM ALERTS (queued, deduped; see alerts.py) ---
+from alerts import TELEGRAM, configure_telegram, get_dispatcher
+
+# ==========================================
+# 📋 STOCK LISTS
+# ==========================================
+STOCK_LIST_PART_1 = ["NIFTYBEES.NS", "BANKBEES.NS", "RELIANCE.NS", "TCS.NS", "HDFCBANK.NS", "ICICIBANK.NS", "INFY.NS", "SBIN.NS", "ITC.NS", "BHARTIARTL.NS", "L&T.NS", "HINDUNILVR.NS", "TATAMOTORS.NS", "AXISBANK.NS", "MARUTI.NS", "TITAN.NS", "ULTRACEMCO.NS", "ADANIENT.NS", "SUNPHARMA.NS", "BAJFINANCE.NS", "KOTAKBANK.NS", "WIPRO.NS", "HCLTECH.NS", "TATASTEEL.NS", "POWERGRID.NS", "NTPC.NS", "ONGC.NS", "M&M.NS", "COALINDIA.NS", "JSWSTEEL.NS", "BPCL.NS", "EICHERMOT.NS", "DIVISLAB.NS", "DRREDDY.NS", "CIPLA.NS", "ASIANPAINT.NS", "BRITANNIA.NS", "NESTLEIND.NS", "DLF.NS", "ZOMATO.NS", "PAYTM.NS", "HAL.NS", "BEL.NS", "IRCTC.NS", "VBL.NS", "JIOFIN.NS", "INDIGO.NS", "DMART.NS", "ADANIPORTS.NS", "CHOLAFIN.NS", "BANKBARODA.NS", "PNB.NS", "CANBK.NS", "IDFCFIRSTB.NS", "BHEL.NS", "SAIL.NS", "VEDL.NS", "HAVELLS.NS", "SIEMENS.NS", "ABB.NS", "ZEEL.NS", "ASHOKLEY.NS", "TVSMOTOR.NS", "MOTHERSON.NS", "MRF.NS", "BOSCHLTD.NS", "PIDILITIND.NS", "SHREECEM.NS", "ACC.NS", "AMBUJACEM.NS", "INDUSINDBK.NS", "NAUKRI.NS", "TRENT.NS", "COLPAL.NS", "DABUR.NS", "GODREJCP.NS", "BERGEPAINT.NS", "MARICO.NS", "BAJAJ-AUTO.NS", "HEROMOTOCO.NS", "ALKEM.NS", "LUPIN.NS", "AUROPHARMA.NS", "BIOCON.NS", "TORNTPHARM.NS", "MFSL.NS", "MAXHEALTH.NS", "APOLLOHOSP.NS", "JUBLFOOD.NS", "DEVYANI.NS", "PIIND.NS", "UPL.NS", "SRF.NS", "NAVINFLUOR.NS", "AARTIIND.NS", "DEEPAKNTR.NS", "ATGL.NS", "ADANIGREEN.NS", "ADANIPOWER.NS", "TATAPOWER.NS", "JSWENERGY.NS", "NHPC.NS", "SJVN.NS", "TORNTPOWER.NS", "PFC.NS", "RECLTD.NS", "IOB.NS", "UNIONBANK.NS", "INDIANB.NS", "UCOBANK.NS", "MAHABANK.NS", "CENTRALBK.NS", "PSB.NS", "SBICARD.NS"]
+STOCK_LIST_PART_2 = ["BAJAJHLDNG.NS", "HDFCLIFE.NS", "SBILIFE.NS", "ICICIPRULI.NS", "LICI.NS", "GICRE.NS", "NIACL.NS", "MUTHOOTFIN.NS", "MANAPPURAM.NS", "M&MFIN.NS", "SHRIRAMFIN.NS", "SUNDARMFIN.NS", "POONAWALLA.NS", "ABCAPITAL.NS", "L&TFH.NS", "PEL.NS", "DELHIVERY.NS", "NYKAA.NS", "POLICYBZR.NS", "IDEA.NS", "INDUSTOWER.NS", "TATACOMM.NS", "PERSISTENT.NS", "LTIM.NS", "KPITTECH.NS", "COFORGE.NS", "MPHASIS.NS", "LTTS.NS", "TATAELXSI.NS", "ORACLEFIN.NS", "CYIENT.NS", "ZENSARTECH.NS", "SONACOMS.NS", "TIINDIA.NS", "UNO.NS", "PRESTIGE.NS", "OBEROIRLTY.NS", "PHOENIXLTD.NS", "BRIGADE.NS", "SOBHA.NS", "GODREJPROP.NS", "RVNL.NS", "IRCON.NS", "RITES.NS", "RAILTEL.NS", "TITAGARH.NS", "JINDALSTEL.NS", "HINDALCO.NS", "NMDC.NS", "NATIONALUM.NS", "HINDCOPPER.NS", "APLAPOLLO.NS", "RATNAMANI.NS", "WELCORP.NS", "JSL.NS", "VOLTAS.NS", "BLUESTARCO.NS", "KAJARIACER.NS", "CERA.NS", "ASTRAL.NS", "POLYCAB.NS", "KEI.NS", "DIXON.NS", "CROMPTON.NS", "WHIRLPOOL.NS", "BATAINDIA.NS", "RELAXO.NS", "PAGEIND.NS", "KPRMILL.NS", "TRIDENT.NS", "RAYMOND.NS", "ABFRL.NS", "MANYAVAR.NS", "METROBRAND.NS", "BIKAJI.NS", "VBL.NS", "AWL.NS", "PATANJALI.NS", "EMAMILTD.NS", "JYOTHYLAB.NS", "FLUOROCHEM.NS", "LINDEINDIA.NS", "SOLARINDS.NS", "CASTROLIND.NS", "OIL.NS", "PETRONET.NS", "GSPL.NS", "IGL.NS", "MGL.NS", "GUJGASLTD.NS", "GAIL.NS", "HINDPETRO.NS", "IOC.NS", "MRPL.NS", "CHENNPETRO.NS", "CUMMINSIND.NS", "THERMAX.NS", "SKFINDIA.NS", "TIMKEN.NS", "SCHAEFFLER.NS", "AIAENG.NS", "ELGIEQUIP.NS", "KIRLOSENG.NS", "SUZLON.NS", "INOXWIND.NS", "BEML.NS", "MAZDOCK.NS", "COCHINSHIP.NS"]
+STOCK_LIST_PART_3 = ["GRSE.NS", "BDL.NS", "ASTRAMICRO.NS", "MTARTECH.NS", "DATAPATTNS.NS", "LALPATHLAB.NS", "METROPOLIS.NS", "SYNGENE.NS", "VIJAYA.NS", "KIMS.NS", "RAINBOW.NS", "MEDANTA.NS", "ASTERDM.NS", "NH.NS", "FORTIS.NS", "GLENMARK.NS", "IPCALAB.NS", "JBCHEPHARM.NS", "AJANTPHARM.NS", "NATCOPHARM.NS", "PFIZER.NS", "SANOFI.NS", "ABBOTINDIA.NS", "GLAXO.NS", "ASTRAZEN.NS", "ERIS.NS", "GRANULES.NS", "LAURUSLABS.NS", "FSL.NS", "REDINGTON.NS", "BSOFT.NS", "MASTEK.NS", "INTELLECT.NS", "TANLA.NS", "ROUTE.NS", "JUSTDIAL.NS", "AFFLE.NS", "HAPPSTMNDS.NS", "LATENTVIEW.NS", "MAPMYINDIA.NS", "RATEGAIN.NS", "NAZARA.NS", "EASEMYTRIP.NS", "CARTRADE.NS", "PBFINTECH.NS", "SAPPHIRE.NS", "RBA.NS", "WESTLIFE.NS", "CHALET.NS", "LEMONTREE.NS", "EIHOTEL.NS", "IHCL.NS", "DELTACO.NS", "PVRINOX.NS", "SAREGAMA.NS", "SUNTV.NS", "NETWORK18.NS", "TV18BRDCST.NS", "HATHWAY.NS", "DEN.NS", "DISHMAN.NS", "GTPL.NS", "UJJIVANSFB.NS", "EQUITASBNK.NS", "AUBANK.NS", "BANDHANBNK.NS", "FEDERALBNK.NS", "RBLBANK.NS", "CSBBANK.NS", "KARURVYSYA.NS", "CUB.NS", "DCBBANK.NS", "SOUTHBANK.NS", "J&KBANK.NS", "MAHSEAMLES.NS", "EPL.NS", "POLYPLEX.NS", "UFRLEX.NS", "SUPREMEIND.NS", "FINPIPE.NS", "PRINCEPIPE.NS", "RESPONIND.NS", "CENTURYPLY.NS", "GREENPANEL.NS", "GREENPLY.NS", "KAJARIACER.NS", "SOMANYCERA.NS", "ASAHIINDIA.NS", "LAOPALA.NS", "BORORENEW.NS", "VIPIND.NS", "SAFARI.NS", "TTKPRESTIG.NS", "HAWKINS.NS", "SYMPHONY.NS", "ORIENTELEC.NS", "IFBIND.NS", "VGUARD.NS", "AMBER.NS", "PGHH.NS", "GILLETTE.NS", "AKZOINDIA.NS", "KANSAINER.NS", "INDIGOPNTS.NS", "SIRCA.NS", "SHALPAINTS.NS", "GARFIBRES.NS", "LUXIND.NS", "RUPA.NS", "DOLLAR.NS", "TCNSBRANDS.NS", "GOKEX.NS", "SWANENERGY.NS"]
+
+# --- 🔮 RESULT MAGIC (YoY) ---
+def predict_results(symbol):
+    try:
+        stock = yf.Ticker(symbol)
+        def fetch():
+            with stage("yahoo.financials", symbol): return stock.quarterly_financials
+        fin = yahoo_call("financials", fetch)
+        if fin is None or fin.empty: return "N/A"
+        try:
+            cols = fin.columns
+            if len(cols) >= 5:
+                key_row = 'Net Income' if 'Net Income' in fin.index else fin.index[0]
+                curr = fin.loc[key_row].iloc[0]
+                last_yr = fin.loc[key_row].iloc[4]
+                if pd.isna(curr) or pd.isna(last_yr) or last_yr == 0: return "Data Gap"
+                growth = ((curr - last_yr) / abs(last_yr)) * 100
+                if growth > 20: return f"🔥 Super Growth (+{int(growth)}%)"
+                elif growth > 0: return f"✅ Positive (+{int(growth)}%)"
+                elif growth < -10: return f"⚠️ Weak (-{int(abs(growth))}%)"
+                else: return "Neutral"
+            else:
+                inc = fin.loc['Net Income'].iloc[:2]
+                return "✅ QoQ Growth" if inc.iloc[0] > inc.iloc[1] else "⚠️ QoQ Dip"
+        except: return "N/A"
+    except Exception as e:
+        fail("yahoo.financials", symbol, e); return None  # not fetched: the fundamentals store retries it
+
+# --- 🆔 INDEX OPTION ANALYZER ---
+def get_index_signal(df, symbol=None):
+    try:
+        if df.empty or len(df) < 30: return "WAIT"
+        # Streaming state only folds in the bars it has not seen yet
+        snap = get_registry().snapshot(symbol, df) if symbol else IntradayState().advance(df)
+        
+        ema9 = snap['ema9']; ema21 = snap['ema21']
+        rsi = snap['rsi']; st_dir = snap['st_dir']
+        
+        if (ema9 > ema21) and (rsi > 55) and (st_dir == 1): return "🚀 BUY CALL"
+        elif (ema9 < ema21) and (rsi < 45) and (st_dir == -1): return "🐻 BUY PUT"
+        return "⏳ WAIT"
+    except: return "WAIT"
+
+def analyze_market_index(symbol, df=None, df_intra=None):
+    try:
+        # The dashboard snapshot passes frames from its bulk download
+        if df is None: df = get_history(symbol, period="1y") # Daily
+        if df_intra is None: df_intra = get_history(symbol, period="5d", interval="15m") # Intraday
+        
+        if df.empty: return None
+        curr = df['Close'].iloc[-1]; change = ((curr - df['Close'].iloc[-2]) / df['Close'].iloc[-2]) * 100
+        st_data = ta.supertrend(df['High'], df['Low'], df['Close'], length=7, multiplier=3)
+        st_dir = st_data.iloc[-1, 1]
+        trend_txt = "🟢 BULL" if st_dir == 1 else "🔴 BEAR"
+        opt_sig = get_index_signal(df_intra, symbol)
+        
+        return {"price": curr, "change": change, "trend": trend_txt, "df": df, "df_intra": df_intra, "opt_sig": opt_sig}
+    except: return None
+
+# --- MARKET ANALYSIS ---
+def get_smart_sectors():
+    sectors = {
+        "🏦 Bank": "^NSEBANK", "💻 IT": "^CNXIT", "🚗 Auto": "^CNXAUTO",
+        "💊 Pharma": "^CNXPHARMA", "🛒 FMCG": "^CNXFMCG", "⚙️ Metal": "^CNXMETAL",
+        "⚡ Energy": "^CNXENERGY", "🏠 Realty": "^CNXREALTY",
+        "💰 PSU Bank": "^CNXPSUB", "🏗️ Infra": "^CNXINFRA", "📺 Media": "^CNXMEDIA"
+    }
+    # One bulk 1y daily fetch: the same series the sector chart reads, SMA50 needs only the tail
+    hists = get_provider().history(list(sectors.values()), period="1y", interval="1d")
+    results = {}
+    for name, ticker in sectors.items():
+        try:
+            hist = hists[ticker]
+            curr = hist['Close'].iloc[-1]; prev = hist['Close'].iloc[-2]
+            change = ((curr - prev) / prev) * 100
+            sma50 = ta.sma(hist['Close'], length=50).iloc[-1]
+            trend = "🟢 BULL" if curr > sma50 else "🔴 BEAR"
+            bc = "#22c55e" if change >= 0 else "#ef4444"
+            tc = "#15803d" if change >= 0 else "#b91c1c"
+            results[name] = {"change": round(change, 2), "trend": trend, "bc": bc, "tc": tc, "ticker": ticker}
+        except:
+            # No reading (throttled / missing): shown as n/a, never as a flat 0.0%
+            results[name] = {"change": None, "trend": "-", "bc": "#ccc", "tc": "#333", "ticker": ticker}
+    return results
+
+def get_market_mood_strip():
+    try:
+        sp500 = get_history("^GSPC", period="2d")
+        sp_chg = ((sp500['Close'].iloc[-1] - sp500['Close'].iloc[-2]) / sp500['Close'].iloc[-2]) * 100
+        global_mood = "🟢 Bullish" if sp_chg > 0 else "🔴 Bearish"
+        return global_mood
+    except: return "Neutral"
+
+# 🔥 MAIN ANALYZER 🔥
+def analyze_stock_hybrid(symbol, bundle=None, feat=None):
+    try:
+        # Scan loop hands in a prefetched bundle; single lookups (portfolio chart) fetch their own
+        if bundle is None: bundle = prefetch_bundles([symbol]).get(symbol)
+        if not bundle:
+            record("analyze.skipped", symbol=symbol); return None
+        df_daily = bundle['daily'].copy()
+        df_intra = bundle['intra'].copy() if bundle.get('intra') is not None else None
+        
+        if df_daily is None or len(df_daily) < 50:
+            record("analyze.skipped", symbol=symbol); return None
+        info = bundle.get('info') or {}
+        
+        # Daily indicators come from the vectorized engine (one row of the universe feature matrix)
+        if feat is None: feat = daily_feature_table({symbol: df_daily}).loc[symbol]
+        curr = feat['close']
+        change_pct = ((curr - feat['prev_close']) / feat['prev_close']) * 100
+        
+        adx_val_d = feat['adx']
+        st_dir_d = feat['st_dir']
+
+        # 🟢 ADDED: SAR CALCULATION
+        is_sar_bullish = bool(curr > feat['sar'])
+
+        intra_buy = False; intra_sell = False; reversal_2pm = False
+        if df_intra is not None and len(df_intra) > 20:
+            try:
+                # O(1) per new 15m bar; VWAP is anchored to today's session
+                with stage("intraday", symbol): snap = get_registry().snapshot(symbol, df_intra)
+                st_dir_i = snap['st_dir']
+                curr_intra = snap['close']
+                vwap_val = snap['vwap']
+                if (curr_intra > vwap_val) and (st_dir_i == 1): intra_buy = True
+                if (curr_intra < vwap_val) and (st_dir_i == -1): intra_sell = True
+                
+                last_time = df_intra.index[-1]
+                if last_time.hour >= 13 and (last_time.hour > 13 or last_time.minute >= 30):
+                    prev_close = snap['prev_close']; prev_vwap = snap['prev_vwap']
+                    vol_now = snap['volume']; vol_avg = snap['vol_avg10']
+                    if (prev_close < prev_vwap) and (curr_intra > vwap_val) and (vol_now > vol_avg * 1.5): reversal_2pm = True
+            except Exception as e: fail("intraday", symbol, e)
+
+        atr_val = feat['atr']
+        sl_fix = round(curr - (atr_val * 2.0), 1)
+        tgt_fix = round(curr + (atr_val * 4.0), 1)
+        
+        lows = df_daily['Low'].values; highs = df_daily['High'].values
+        # Incremental: only bars not yet decided are re-checked (also refreshes the S/R zone index)
+        with stage("pivots", symbol): min_idx, max_idx = get_levels().pivots(symbol, df_daily, lows, highs)
+        last_idx = len(df_daily) - 1
+        fresh_support = (len(min_idx) > 0 and min_idx[-1] >= (last_idx - 1))
+        fresh_resistance = (len(max_idx) > 0 and max_idx[-1] >= (last_idx - 1))
+
+        weekly_trend_up = False
+        try:
+            with stage("weekly", symbol): df_wk = to_weekly(df_daily) # derived locally, no separate 1wk download
+            if df_wk is not None and not df_wk.empty and df_wk['Close'].iloc[-1] > ta.sma(df_wk['Close'], length=20).iloc[-1]: weekly_trend_up = True
+        except: pass
+
+        # --- 🏆 GOLDEN LINE LOGIC ---
+        max_h = feat['high_max']
+        min_l = feat['low_min']
+        diff = max_h - min_l
+        golden_level = max_h - (diff * 0.618)
+        is_at_golden = (abs(curr - golden_level) <= (curr * 0.015)) and (curr > feat['open'])
+
+        vol_today = feat['volume']
+        vol_avg_10 = feat['vol_avg']
+        is_high_volume = (vol_today / vol_avg_10 > 1.5) if vol_avg_10 > 0 else False
+
+        res = {
+            "Symbol": symbol, "Price": round(curr, 2), "Change": round(change_pct, 2),
+            "F_Jackpot": False, "F_CE_100": False, "F_CE_80": False, "F_PE_100": False, "F_PE_80": False,
+            "F_Day_Buy": intra_buy, "F_Day_Sell": intra_sell, "F_2PM": reversal_2pm,
+            "F_Swing": False, "F_Double": False, "F_Tech": False, "F_Fund": False, "F_Trend": False,
+            "F_Support": fresh_support, "F_Resistance": fresh_resistance, "F_Golden": is_at_golden,
+            "F_SAR": is_sar_bullish, # 🟢 ADDED SAR FLAG
+            "DF_Daily": df_daily, "DF_Intra": df_intra, "ATR": atr_val, "Weekly": "🟢 UP" if weekly_trend_up else "🔴 DOWN", 
+            "Alert_Trigger": False, "SL": sl_fix, "TGT": tgt_fix, "Min_Idx": min_idx, "Max_Idx": max_idx,
+            "Alert": None, "F_Weekly_Up": weekly_trend_up,
+            # Raw features for user screens (screens.py); missing fundamentals stay NaN
+            "RSI": feat['rsi'], "ADX": adx_val_d, "ST_Dir": st_dir_d, "SMA20": feat['sma20'], "SMA200": feat['sma200'],
+            "Vol_Ratio": (vol_today / vol_avg_10) if vol_avg_10 > 0 else np.nan,
+            "PE": info.get('trailingPE', np.nan), "ROE": info.get('returnOnEquity', np.nan),
+        }
+
+        sma200 = feat['sma200']; rsi_d = feat['rsi']
+        vol_blast = vol_today > (vol_avg_10 * 1.5)
+        pe_ratio = info.get('trailingPE', 100); roe = info.get('returnOnEquity', 0)
+        is_fund = (0 < pe_ratio < 60 and roe > 0.12); is_tech = (curr > sma200 and rsi_d > 55)
+
+        if is_fund and is_tech and vol_blast and weekly_trend_up and (rsi_d < 70): res["F_Jackpot"] = True
+        
+        if st_dir_d == 1 and rsi_d > 60 and adx_val_d > 25 and weekly_trend_up: res['F_CE_100'] = True
+        elif st_dir_d == 1 and rsi_d > 55: res['F_CE_80'] = True
+        
+        if st_dir_d == -1 and rsi_d < 40 and adx_val_d > 25: res['F_PE_100'] = True 
+        elif st_dir_d == -1 and rsi_d < 45: res['F_PE_80'] = True
+        
+        if curr > sma200: res["F_Tech"] = True
+        if curr > feat['close_20']: res["F_Trend"] = True
+        if 0 < pe_ratio < 60: res["F_Fund"] = True
+        if res["F_Fund"] and res["F_Tech"]: res["F_Double"] = True
+        if vol_blast: res["Alert_Trigger"] = True
+        
+        signal_quality = "⚪ Neutral"
+        if (res['F_Jackpot'] or res['F_CE_100']) and weekly_trend_up and is_high_volume:
+            signal_quality = "🔥 SUPER STRONG CE"
+            res["Alert"] = {"symbol": symbol, "signal": "CE", "bar": str(df_daily.index[-1].date()),
+                            "text": f"🚀 ALERT: {symbol} is SUPER STRONG CE!\nPrice: {curr}\nRSI: {rsi_d:.1f}\nVol: High"}
+        elif res['F_PE_100'] and is_high_volume:
+            signal_quality = "⚡ SUPER STRONG PE"
+            res["Alert"] = {"symbol": symbol, "signal": "PE", "bar": str(df_daily.index[-1].date()),
+                            "text": f"🐻 ALERT: {symbol} is SUPER STRONG PE!\nPrice: {curr}\nRSI: {rsi_d:.1f}\nVol: High"}
+        elif is_at_golden: signal_quality = "🏆 Golden Support"
+        elif is_sar_bullish: signal_quality = "🟢 SAR Bull" # 🟢 SAR SIGNAL
+        elif res['F_CE_100'] or res['F_CE_80']: signal_quality = "✅ Strong CE"
+        elif res['F_PE_100'] or res['F_PE_80']: signal_quality = "🔻 Strong PE"
+        elif fresh_support: signal_quality = "🟢 Support Buy"
+        elif intra_buy: signal_quality = "🚀 Day Buy"
+        elif intra_sell: signal_quality = "🐻 Day Sell"
+        
+        res["Signal_Quality"] = signal_quality
+        active_tags = []
+        if res["F_Jackpot"]: active_tags.append("🏆 Jackpot")
+        if res["F_Golden"]: active_tags.append("🏆 Golden Dip")
+        if res["F_SAR"]: active_tags.append("🟢 SAR Bull") # 🟢 TAG ADDED
+        if res["F_CE_100"]: active_tags.append("🚀 CE 100%")
+        if res["F_PE_100"]: active_tags.append("🐻 PE 100%")
+        if res["F_Support"]: active_tags.append("🟢 Support")
+        if res["F_Resistance"]: active_tags.append("🔴 Resistance")
+        if res["F_Day_Buy"]: active_tags.append("🚀 Day Buy")
+        if res["F_Trend"]: active_tags.append("🌊 Trend")
+        if res["F_Tech"]: active_tags.append("📈 Tech")
+        if res["F_Fund"]: active_tags.append("💎 Fund")
+        if res["F_Double"]: active_tags.append("🥈 Double")
+        if res["Alert_Trigger"]: active_tags.append("🔥 Alert")
+        
+        res["All_Tags"] = " | ".join(active_tags) if active_tags else "-"
+        return res
+    except Exception as e:
+        fail("analyze", symbol, e); return None
+
+
+# ==========================================
+# 🚀 BATCH SCAN
+# ==========================================
+STOCK_LISTS = {"part1": STOCK_LIST_PART_1, "part2": STOCK_LIST_PART_2, "part3": STOCK_LIST_PART_3}
+STOCK_LISTS["all"] = list(dict.fromkeys(STOCK_LIST_PART_1 + STOCK_LIST_PART_2 + STOCK_LIST_PART_3))
+
+def symbol_column(columns):
+    return next((c for c in columns if "SYMBOL" in str(c).upper()), None)
+
+def normalize_symbol(x):
+    return f"{x.strip()}.NS" if not str(x).endswith(".NS") else x
+
+def tickers_from_frame(df_up):
+    col = symbol_column(df_up.columns)
+    if not col: return []
+    return [normalize_symbol(x) for x in df_up[col].dropna().unique()]
+
+SCAN_WORKERS = int(os.environ.get("MARKET_AI_WORKERS", "1"))
+
+def run_scan(tickers, progress=None, workers=None):
+    """Prefetch + vectorized features + per-symbol flags. progress(i, n) is called per ticker.
+
+    workers > 1 spreads symbol batches over a process pool (same results as the serial loop).
+    """
+    workers = SCAN_WORKERS if workers is None else workers
+    with stage("prefetch"): bundles = prefetch_bundles(tickers)
+    if workers > 1:
+        from concurrent.futures.process import BrokenProcessPool
+        from parallel_scan import run_parallel_scan
+        try:
+            with stage("scan.parallel"): L_All = run_parallel_scan(tickers, bundles, workers=workers, progress=progress)
+        except BrokenProcessPool as e:
+            fail("scan.parallel", None, e)  # a worker died: the pool was dropped, finish this scan serially
+        else:
+            get_levels().adopt(L_All)  # pivots were found in the workers; index their zones here
+            get_registry().save()  # intraday states came back from the workers
+            dispatch_alerts(L_All)
+            return L_All
+    with stage("indicators"): feats = daily_feature_table({t: b['daily'] for t, b in bundles.items() if len(b['daily']) >= 50})
+    L_All = []
+    for i, t in enumerate(tickers):
+        with stage("analyze", t): d = analyze_stock_hybrid(t, bundles.get(t, {}), feats.loc[t] if t in feats.index else None)
+        if d: L_All.append(d)
+        if progress: progress(i + 1, len(tickers))
+    get_registry().save()
+    dispatch_alerts(L_All)
+    return L_All
+
+def dispatch_alerts(results):
+    """Hand a scan's alerts to the background dispatcher as one digest."""
+    alerts = [r["Alert"] for r in results if r.get("Alert")]
+    if alerts and TELEGRAM.get("token"): get_dispatcher().submit(alerts)
+
+def result_rows(results):
+    """Scan results without the chart frames: plain JSON-able rows."""
+    rows = []
+    for r in results:
+        row = {k: v for k, v in r.items() if not k.startswith("DF_")}
+        row["Min_Idx"] = [int(x) for x in r.get("Min_Idx", [])]
+        row["Max_Idx"] = [int(x) for x in r.get("Max_Idx", [])]
+        rows.append({k: (v.item() if isinstance(v, np.generic) else v) for k, v in row.items()})
+    return rows
+
@@ -0,0 +1,217 @@
+import time
+import threading
+import pandas as pd
+
+# ==========================================
+# ⏱️ AUTO-RUN SCHEDULER
+# ==========================================
+# Wakes shortly after every 15m bar close inside NSE hours (09:15-15:30 IST,
+# Mon-Fri minus `holidays`). Each time it asks the feed for every symbol's
+# latest bar and rescans only the symbols whose bar changed, in this order:
+# holdings, symbols that had an active signal last time, then the rest.
+# Each session registers its own holdings (replaced on every rerun, dropped
+# after idle_stop without a touch); holdings outside the universe are scanned
+# too, but only that session's rows() include them.
+# Results are published batch by batch (`version` bumps on each), so the UI
+# can show the first batch while the rest is still scanning. One process-wide
+# slot keeps two schedulers from scanning at the same time. A scheduler no
+# session touched for idle_stop stops and leaves the registry with its rows,
+# so uploaded universes do not pile up. The clock and the feed can be
+# swapped, so whole trading days can be replayed in tests.
+
+IST = "Asia/Kolkata"
+SESSION_OPEN = (9, 15)
+SESSION_CLOSE = (15, 30)
+BAR_MINUTES = 15
+SETTLE_SECONDS = 20  # give the data source time to publish the closed bar
+
+_SCAN_SLOT = threading.BoundedSemaphore(1)
+
+
+class SystemClock:
+    def now(self): return pd.Timestamp.now(tz=IST)
+    def sleep(self, seconds): time.sleep(max(seconds, 0))
+
+
+def _at(day, hm):
+    return day.normalize() + pd.Timedelta(hours=hm[0], minutes=hm[1])
+
+def is_trading_day(ts, holidays=()):
+    return ts.weekday() < 5 and ts.date() not in holidays
+
+def market_open(ts, holidays=()):
+    return is_trading_day(ts, holidays) and _at(ts, SESSION_OPEN) <= ts <= _at(ts, SESSION_CLOSE)
+
+def next_bar_close(ts, holidays=()):
+    """First 15m bar close strictly after ts (09:30 ... 15:30 on trading days)."""
+    day = ts.normalize()
+    for _ in range(15):
+        if is_trading_day(day, holidays):
+            first = _at(day, SESSION_OPEN) + pd.Timedelta(minutes=BAR_MINUTES)
+            if ts < first: return first
+            if ts < _at(day, SESSION_CLOSE):
+                k = (ts - _at(day, SESSION_OPEN)) // pd.Timedelta(minutes=BAR_MINUTES) + 1
+                return _at(day, SESSION_OPEN) + k * pd.Timedelta(minutes=BAR_MINUTES)
+        day = day + pd.Timedelta(days=1); ts = day
+    return None
+
+def last_bar_close(ts, holidays=(), minutes=BAR_MINUTES):
+    """Latest bar boundary at or before ts: the session open, a bar close, or the previous
+    session's close outside market hours. minutes=None gives the latest finished session's close."""
+    day = ts.normalize()
+    for _ in range(15):
+        if is_trading_day(day, holidays):
+            open_, close = _at(day, SESSION_OPEN), _at(day, SESSION_CLOSE)
+            if ts >= close: return close
+            if minutes and ts >= open_:
+                return open_ + ((ts - open_) // pd.Timedelta(minutes=minutes)) * pd.Timedelta(minutes=minutes)
+        day = day - pd.Timedelta(days=1); ts = day + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+    return None
+
+def last_bars(symbols):
+    """Default feed: latest 15m bar timestamp per symbol (delta fetch through the bar cache)."""
+    from data_provider import get_provider
+    frames = get_provider().history(symbols, period="1d", interval="15m")
+    return {s: df.index[-1] for s, df in frames.items() if df is not None and not df.empty}
+
+def _default_scan(workers):
+    def scan(symbols):
+        from scanner_core import run_scan
+        return run_scan(symbols, workers=workers)
+    return scan
+
+
+class AutoScanner:
+    def __init__(self, tickers, scan=None, feed=None, clock=None, batch_size=40, workers=None,
+                 settle=SETTLE_SECONDS, holidays=(), idle_stop=1800.0):
+        self.tickers = list(dict.fromkeys(tickers))
+        self.scan = scan or _default_scan(workers)
+        self.feed = feed or last_bars
+        self.clock = clock or SystemClock()
+        self.batch_size = batch_size; self.settle = settle
+        self.holidays = set(holidays); self.idle_stop = idle_stop
+        self.results = {}; self.seen = {}; self.holdings = {}  # owner -> (symbols, last touched)
+        self.version = 0; self.last_run = None; self.next_wake = None
+        self._lock = threading.Lock(); self._thread = None; self._stop = False
+        self._touched = self.clock.now()
+
+    # --- SCAN PASS ---
+    def prioritize(self, symbols, owner=None):
+        """Set one session's holdings: scanned first, and scanned even outside the universe."""
+        with self._lock: self.holdings[owner] = (tuple(dict.fromkeys(symbols)), self.clock.now())
+
+    def held(self):
+        """Holdings of the sessions still around, first come first."""
+        now = self.clock.now()
+        with self._lock:
+            for k in [k for k, (_, at) in self.holdings.items() if (now - at).total_seconds() > self.idle_stop]:
+                del self.holdings[k]
+            return list(dict.fromkeys(s for syms, _ in self.holdings.values() for s in syms))
+
+    def universe(self):
+        known = set(self.tickers)
+        return self.tickers + [s for s in self.held() if s not in known]
+
+    def order(self, symbols):
+        prio = set(self.held())
+        with self._lock:
+            active = {s for s, r in self.results.items() if r.get("Signal_Quality", "⚪ Neutral") != "⚪ Neutral"}
+        rank = lambda s: 0 if s in prio else (1 if s in active else 2)
+        return sorted(symbols, key=rank)  # stable: ticker order inside each group
+
+    def changed(self):
+        symbols = self.universe()
+        bars = self.feed(symbols)
+        return [s for s in symbols if s in bars and self.seen.get(s) != bars[s]], bars
+
+    def publish(self, results):
+        from scan_results import FRAME_CACHE, FRAME_KEYS, frame_version
+        rows = {}
+        for r in results:
+            # Frames go to the shared chart cache; the scheduler only keeps the light rows
+            versions = {kind: frame_version(r.get(col)) for kind, (col, _, _) in FRAME_KEYS.items()}
+            for kind, (col, _, _) in FRAME_KEYS.items(): FRAME_CACHE.put((r["Symbol"], kind, versions[kind]), r.get(col))
+            rows[r["Symbol"]] = {k: v for k, v in r.items() if not k.startswith("DF_")}
+            rows[r["Symbol"]]["Frame_Versions"] = versions
+        with self._lock:
+            self.results.update(rows); self.version += 1
+
+    def run_once(self):
+        """Rescan the symbols with a new bar, highest priority first. Returns how many were scanned."""
+        todo, bars = self.changed()
+        if not todo: return 0
+        todo = self.order(todo)
+        with _SCAN_SLOT:
+            for i in range(0, len(todo), self.batch_size):
+                chunk = todo[i:i + self.batch_size]
+                self.publish(self.scan(chunk))
+                for s in chunk: self.seen[s] = bars[s]
+        self.last_run = self.clock.now()
+        return len(todo)
+
+    def rows(self, owner=None):
+        """Latest row per symbol in universe order, then the owner's own holdings (for ScanResultTable.from_results)."""
+        with self._lock:
+            own = [s for s in self.holdings.get(owner, ((), None))[0] if s not in set(self.tickers)]
+            return [self.results[s] for s in self.tickers + own if s in self.results]
+
+    # --- LOOP ---
+    def step(self):
+        """Sleep until the next bar close (+ settle) and scan. False when the scheduler should stop."""
+        if self._stop or (self.clock.now() - self._touched).total_seconds() > self.idle_stop: return False
+        close = next_bar_close(self.clock.now(), self.holidays)
+        if close is None: return False
+        self.next_wake = close + pd.Timedelta(seconds=self.settle)
+        # Sleep in short slices so stop() is honoured within a minute
+        while not self._stop:
+            left = (self.next_wake - self.clock.now()).total_seconds()
+            if left <= 0: break
+            self.clock.sleep(min(left, 60))
+        if self._stop: return False
+        try: self.run_once()
+        except Exception: pass  # feed/network hiccup: the next bar close retries
+        return True
+
+    def touch(self, owner=None):
+        """A session is still watching (keeps the scheduler and that session's holdings alive)."""
+        now = self.clock.now(); self._touched = now
+        with self._lock:
+            if owner in self.holdings: self.holdings[owner] = (self.holdings[owner][0], now)
+
+    def start(self):
+        self.touch()
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive(): return self
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name="auto-run", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        # First pass right away (everything is "new"), then bar-aligned passes
+        try: self.run_once()
+        except Exception: pass
+        while True:
+            while self.step(): pass
+            stopped = self.clock.now()
+            with _schedulers_lock:
+                # A session started us again while we were stopping: keep going
+                if self._touched > stopped and not self._stop: continue
+                # Idle or stopped: drop out of the registry (and free the rows); the next session starts afresh
+                if _schedulers.get(tuple(self.tickers)) is self: del _schedulers[tuple(self.tickers)]
+                return
+
+    def stop(self):
+        self._stop = True
+
+
+_schedulers = {}  # only running schedulers: one removes itself when it stops
+_schedulers_lock = threading.Lock()
+
+def get_auto_scanner(tickers, **kw):
+    """One running scheduler per universe, shared by every session that enables Auto-Run."""
+    key = tuple(dict.fromkeys(tickers))
+    with _schedulers_lock:
+        auto = _schedulers.get(key)
+        if auto is None: auto = _schedulers[key] = AutoScanner(key, **kw)
+        return auto.start()
@@ -0,0 +1,134 @@
+import ast
+import operator
+import numpy as np
+
+# ==========================================
+# 🧪 USER SCREENS (rule language)
+# ==========================================
+# A screen is one expression over the scan's columns, e.g.
+#   rsi_d > 60 and adx > 25 and weekly_up
+#   ce_100 and not resistance and (price - sma200) / sma200 * 100 < 15
+# It is parsed with `ast`, checked against a whitelist (names below, numbers,
+# comparisons, + - * /, and/or/not, parentheses) and compiled to a closure over
+# whole numpy columns, so it runs across the universe in one pass on the
+# ScanResultTable already in memory: no code change, no rescan.
+# Comparisons against a missing value (NaN) are False.
+
+# rule name -> ScanResultTable column
+NUMBERS = {
+    "price": "Price", "change": "Change", "atr": "ATR", "sl": "SL", "tgt": "TGT",
+    "rsi_d": "RSI", "rsi": "RSI", "adx": "ADX", "st_dir": "ST_Dir", "sma20": "SMA20", "sma200": "SMA200",
+    "vol_ratio": "Vol_Ratio", "pe": "PE", "roe": "ROE",
+}
+FLAGS = {
+    "jackpot": "F_Jackpot", "ce_100": "F_CE_100", "ce_80": "F_CE_80", "pe_100": "F_PE_100", "pe_80": "F_PE_80",
+    "day_buy": "F_Day_Buy", "day_sell": "F_Day_Sell", "reversal_2pm": "F_2PM", "swing": "F_Swing",
+    "double": "F_Double", "tech": "F_Tech", "fund": "F_Fund", "trend": "F_Trend", "support": "F_Support",
+    "resistance": "F_Resistance", "golden": "F_Golden", "sar": "F_SAR", "alert": "Alert_Trigger",
+    "weekly_up": "F_Weekly_Up",
+}
+MAX_RULE_LEN = 500
+MAX_NODES = 200
+
+_CMP = {ast.Gt: operator.gt, ast.GtE: operator.ge, ast.Lt: operator.lt, ast.LtE: operator.le,
+        ast.Eq: operator.eq, ast.NotEq: operator.ne}
+_ARITH = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+
+
+class RuleError(ValueError):
+    pass
+
+
+def _build(node, used):
+    """node -> (fn(cols) -> array or scalar, kind) with kind "num" or "bool"."""
+    if isinstance(node, ast.BoolOp):
+        parts = [_build(v, used) for v in node.values]
+        if any(k != "bool" for _, k in parts): raise RuleError("'and'/'or' need conditions on both sides")
+        fns = [f for f, _ in parts]
+        join = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        return (lambda cols: join.reduce([np.broadcast_to(f(cols), cols["__n__"]) for f in fns])), "bool"
+    if isinstance(node, ast.UnaryOp):
+        f, kind = _build(node.operand, used)
+        if isinstance(node.op, ast.Not):
+            if kind != "bool": raise RuleError("'not' needs a condition")
+            return (lambda cols: np.logical_not(f(cols))), "bool"
+        if isinstance(node.op, ast.USub) and kind == "num": return (lambda cols: -f(cols)), "num"
+        raise RuleError("unsupported operator")
+    if isinstance(node, ast.Compare):
+        terms = [_build(node.left, used)] + [_build(c, used) for c in node.comparators]
+        if any(k != "num" for _, k in terms): raise RuleError("comparisons are between numbers")
+        ops = []
+        for op in node.ops:
+            if type(op) not in _CMP: raise RuleError("unsupported comparison")
+            ops.append(_CMP[type(op)])
+        fns = [f for f, _ in terms]
+        def compare(cols):
+            vals = [f(cols) for f in fns]
+            with np.errstate(invalid="ignore"):
+                # a < b < c -> (a < b) & (b < c); NaN on either side is False, for != too
+                out = [op(a, b) & ~np.isnan(a) & ~np.isnan(b) for op, a, b in zip(ops, vals, vals[1:])]
+            return np.logical_and.reduce([np.broadcast_to(o, cols["__n__"]) for o in out])
+        return compare, "bool"
+    if isinstance(node, ast.BinOp):
+        if type(node.op) not in _ARITH: raise RuleError("only + - * / are allowed")
+        (fa, ka), (fb, kb) = _build(node.left, used), _build(node.right, used)
+        if ka != "num" or kb != "num": raise RuleError("arithmetic is between numbers")
+        op = _ARITH[type(node.op)]
+        def arith(cols):
+            with np.errstate(divide="ignore", invalid="ignore"): return op(fa(cols), fb(cols))
+        return arith, "num"
+    if isinstance(node, ast.Name):
+        name = node.id.lower()
+        if name in ("true", "false"): v = name == "true"; return (lambda cols: v), "bool"
+        col = NUMBERS.get(name) or FLAGS.get(name)
+        if col is None: raise RuleError(f"unknown field '{node.id}' (known: {', '.join(sorted(NUMBERS) + sorted(FLAGS))})")
+        used.add(col)
+        return (lambda cols: cols[col]), ("num" if name in NUMBERS else "bool")
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        v = float(node.value); return (lambda cols: v), "num"
+    if isinstance(node, ast.Constant) and type(node.value) is bool:
+        v = node.value; return (lambda cols: v), "bool"
+    raise RuleError(f"not allowed in a screen: {type(node).__name__}")
+
+
+class Screen:
+    def __init__(self, text):
+        self.text = " ".join(str(text).split())
+        if not self.text: raise RuleError("empty screen")
+        if len(self.text) > MAX_RULE_LEN: raise RuleError(f"screen longer than {MAX_RULE_LEN} characters")
+        try: tree = ast.parse(self.text, mode="eval")
+        except SyntaxError as e: raise RuleError(f"syntax error ({e.msg})") from None
+        if sum(1 for _ in ast.walk(tree)) > MAX_NODES: raise RuleError("screen is too long")
+        self.fields = set()
+        self._fn, kind = _build(tree.body, self.fields)
+        if kind != "bool": raise RuleError("a screen must be a condition (e.g. rsi_d > 60)")
+
+    def mask(self, table):
+        cols = {c: table.column(c) for c in self.fields}; cols["__n__"] = len(table)
+        return np.broadcast_to(np.asarray(self._fn(cols), dtype=bool), len(table))
+
+    def rows(self, table):
+        """Row indices of the table that pass the screen."""
+        return np.flatnonzero(self.mask(table))
+
+
+_compiled = {}
+
+def compile_screen(text):
+    """Compiled (and memoised) Screen; raises RuleError with a readable message."""
+    key = " ".join(str(text).split())
+    if key not in _compiled:
+        if len(_compiled) > 500: _compiled.clear()
+        _compiled[key] = Screen(key)
+    return _compiled[key]
+
+def parse_screens(text):
+    """'Name: rule' per line (a bare rule is named after itself) -> ({name: Screen}, [error lines])."""
+    screens, errors = {}, []
+    for line in str(text).splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"): continue
+        name, _, rule = line.partition(":") if ":" in line else (line, "", line)
+        try: screens[name.strip() or rule.strip()] = compile_screen(rule)
+        except RuleError as e: errors.append(f"{line} -> {e}")
+    return screens, errors
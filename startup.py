@@ -0,0 +1,125 @@
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import threading
+import subprocess
+from metrics import record
+
+# ==========================================
+# 🚦 COLD START: LAZY IMPORTS & IMPORT BUDGET
+# ==========================================
+# Heavy libraries (yfinance, pandas_ta, plotly, Sheets) are bound as lazy
+# modules: the real import happens on first attribute access and is timed
+# as the "import.<name>" stage in metrics. The login page imports only
+# streamlit + credentials; once it has rendered, prewarm() loads the rest in
+# a background thread so the dashboard is ready by the time the user is.
+#
+# python startup.py            -> import time per entry point vs its budget
+# Each entry point is imported in a fresh interpreter; it fails when over
+# budget or when it pulls in a module it must not (e.g. plotting in the
+# headless scan path). Exit code 1 on any violation, so CI can gate on it.
+
+PREWARM = ["pandas", "numpy", "yfinance", "pandas_ta", "streamlit_gsheets", "streamlit_javascript", "scanner_core", "charts"]
+
+# entry point -> (modules imported, budget seconds, modules it must not load)
+ENTRY_POINTS = {
+    # streamlit imports plotly itself (for st.plotly_chart), so only our own heavy modules are checked at login
+    "login": (["streamlit", "credentials", "startup"], 2.0, ["pandas_ta", "yfinance", "streamlit_gsheets", "charts", "scanner_core"]),
+    "scan": (["scanner_core", "scan_cli"], 2.0, ["streamlit", "plotly", "streamlit_gsheets", "streamlit_javascript", "yfinance", "pandas_ta"]),
+    "app": (["scanner_core", "dashboard", "ledger", "quotes", "scan_service", "scan_stream", "screens", "levels"], 2.5, ["plotly", "scipy"]),
+}
+
+
+class LazyModule:
+    """Stands in for a module until first use, then imports it (once) and forwards attributes."""
+
+    def __init__(self, name):
+        self._name = name; self._mod = None
+
+    def _load(self):
+        if self._mod is None:
+            t0 = time.perf_counter()
+            mod = importlib.import_module(self._name)
+            if self._mod is None:
+                self._mod = mod; record(f"import.{self._name}", time.perf_counter() - t0)
+        return self._mod
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r}{' (loaded)' if self._mod is not None else ''}>"
+
+def lazy_module(name):
+    return LazyModule(name)
+
+
+_prewarm = None
+
+def prewarm(modules=PREWARM):
+    """Import the heavy modules in a daemon thread (once per process). MARKET_AI_PREWARM=0 turns it off."""
+    global _prewarm
+    if _prewarm is not None or os.environ.get("MARKET_AI_PREWARM", "1") == "0": return _prewarm
+    def run():
+        for name in modules:
+            t0 = time.perf_counter()
+            try: importlib.import_module(name)
+            except Exception: continue
+            record(f"prewarm.{name}", time.perf_counter() - t0)
+    _prewarm = threading.Thread(target=run, name="prewarm", daemon=True)
+    _prewarm.start()
+    return _prewarm
+
+
+# --- IMPORT BUDGET ---
+_PROBE = """
+import sys, time, json
+t0 = time.perf_counter()
+for m in {mods!r}: __import__(m)
+print(json.dumps({{"seconds": time.perf_counter() - t0, "loaded": sorted(sys.modules)}}))
+"""
+
+def measure(modules, env=None, cwd=None):
+    """Import modules in a fresh interpreter: (seconds, loaded module names, [(seconds, module)] slowest)."""
+    cmd = [sys.executable, "-X", "importtime", "-c", _PROBE.format(mods=list(modules))]
+    p = subprocess.run(cmd, capture_output=True, text=True, env=env, cwd=cwd or os.path.dirname(os.path.abspath(__file__)))
+    if p.returncode != 0: raise RuntimeError(p.stderr.strip().splitlines()[-1] if p.stderr.strip() else "import failed")
+    out = json.loads(p.stdout.strip().splitlines()[-1])
+    top = []
+    for line in p.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line: continue
+        _, cum, name = line.split("|")
+        if not name.startswith("  "):  # top-level imports only
+            top.append((int(cum) / 1e6, name.strip()))
+    return out["seconds"], set(out["loaded"]), sorted(top, reverse=True)[:5]
+
+def check(entries=None, scale=1.0):
+    """[(entry, seconds, budget, forbidden modules loaded, slowest, ok)]"""
+    rows = []
+    for name in entries or ENTRY_POINTS:
+        mods, budget, forbidden = ENTRY_POINTS[name]
+        seconds, loaded, top = measure(mods)
+        bad = sorted(m for m in forbidden if m in loaded)
+        rows.append((name, seconds, budget * scale, bad, top, seconds <= budget * scale and not bad))
+    return rows
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Measure cold import time of each entry point against its budget.")
+    ap.add_argument("entries", nargs="*", help=f"any of {', '.join(ENTRY_POINTS)} (default: all)")
+    ap.add_argument("--scale", type=float, default=1.0, help="multiply every budget (slow CI machines)")
+    args = ap.parse_args(argv)
+    unknown = [e for e in args.entries if e not in ENTRY_POINTS]
+    if unknown: ap.error(f"unknown entry point(s): {', '.join(unknown)}")
+    failed = False
+    for name, seconds, budget, bad, top, ok in check(args.entries or None, args.scale):
+        failed |= not ok
+        print(f"{name:<6} {seconds * 1000:8.0f} ms / {budget * 1000:.0f} ms  {'OK' if ok else 'OVER BUDGET' if not bad else 'FORBIDDEN: ' + ', '.join(bad)}")
+        for s, m in top: print(f"         {s * 1000:8.0f} ms  {m}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+import os
+import copy
+import json
+import math
+import threading
+from collections import deque
+import pandas as pd
+
+# ==========================================
+# 🔁 STREAMING INTRADAY INDICATORS
+# ==========================================
+# O(1)-per-bar versions of the 15m indicators (EMA9/21, RSI14, Supertrend 7x3,
+# session VWAP). Every object holds only its running state and round-trips
+# through to_dict()/from_dict() so a live loop can resume after a restart.
+# Only CLOSED bars are committed; the still-forming last bar is evaluated on a
+# throwaway copy and committed on the next refresh, once a newer bar exists.
+
+NAN = float("nan")
+
+def _nan(x):
+    return x is None or (isinstance(x, float) and math.isnan(x))
+
+
+class StreamingRMA:
+    # pandas ewm(alpha=1/length, min_periods=length, adjust=True)
+    def __init__(self, length):
+        self.length = length; self.num = 0.0; self.den = 0.0; self.count = 0
+
+    def update(self, x):
+        decay = 1.0 - 1.0 / self.length
+        ok = not _nan(x)
+        self.num = self.num * decay + (x if ok else 0.0)
+        self.den = self.den * decay + (1.0 if ok else 0.0)
+        self.count += ok
+        return self.value
+
+    @property
+    def value(self):
+        return self.num / self.den if self.count >= self.length and self.den else NAN
+
+
+class StreamingEMA:
+    # pandas_ta ema: SMA seed over the first `length` bars, then adjust=False recursion
+    def __init__(self, length):
+        self.length = length; self.count = 0; self.acc = 0.0; self.value = NAN
+
+    def update(self, x):
+        if _nan(x): return self.value  # a missing close leaves the average as it was
+        self.count += 1
+        if self.count < self.length: self.acc += x
+        elif self.count == self.length: self.acc += x; self.value = self.acc / self.length
+        else:
+            a = 2.0 / (self.length + 1)
+            self.value = a * x + (1 - a) * self.value
+        return self.value
+
+
+class StreamingRSI:
+    def __init__(self, length=14):
+        self.length = length; self.prev = NAN
+        self.pos = StreamingRMA(length); self.neg = StreamingRMA(length)
+
+    def update(self, close):
+        d = close - self.prev if not _nan(self.prev) else NAN
+        self.prev = close
+        self.pos.update(NAN if _nan(d) else max(d, 0.0))
+        self.neg.update(NAN if _nan(d) else max(-d, 0.0))
+        return self.value
+
+    @property
+    def value(self):
+        p, n = self.pos.value, self.neg.value
+        return 100.0 * p / (p + n) if not (_nan(p) or _nan(n)) and (p + n) else NAN
+
+
+class StreamingSupertrend:
+    def __init__(self, length=7, multiplier=3.0):
+        self.length = length; self.multiplier = multiplier
+        self.atr = StreamingRMA(length); self.prev_close = NAN
+        self.upper = NAN; self.lower = NAN; self.direction = 0; self.bars = 0
+
+    def update(self, high, low, close):
+        tr = NAN if _nan(self.prev_close) else max(high - low, abs(high - self.prev_close), abs(self.prev_close - low))
+        a = self.atr.update(tr)
+        hl2 = (high + low) / 2.0
+        up = hl2 + self.multiplier * a if not _nan(a) else NAN
+        lo = hl2 - self.multiplier * a if not _nan(a) else NAN
+        if self.bars == 0: d = 1
+        elif not _nan(self.upper) and close > self.upper: d = 1
+        elif not _nan(self.lower) and close < self.lower: d = -1
+        else:
+            d = self.direction
+            if d > 0 and not _nan(self.lower) and lo < self.lower: lo = self.lower
+            if d < 0 and not _nan(self.upper) and up > self.upper: up = self.upper
+        self.upper, self.lower, self.direction = up, lo, d
+        self.prev_close = close; self.bars += 1
+        return d
+
+
+class SessionVWAP:
+    """VWAP anchored to the trading session: resets on the first bar of each new day."""
+
+    def __init__(self):
+        self.session = None; self.pv = 0.0; self.vol = 0.0; self.value = NAN
+
+    def update(self, ts, high, low, close, volume):
+        day = pd.Timestamp(ts).date().isoformat()
+        if day != self.session: self.session = day; self.pv = 0.0; self.vol = 0.0
+        self.pv += volume * (high + low + close) / 3.0; self.vol += volume
+        self.value = self.pv / self.vol if self.vol else close
+        return self.value
+
+
+def _dump(obj):
+    if isinstance(obj, (StreamingRMA, StreamingEMA, StreamingRSI, StreamingSupertrend, SessionVWAP)):
+        return {"_cls": type(obj).__name__, **{k: _dump(v) for k, v in obj.__dict__.items()}}
+    if isinstance(obj, deque): return {"_deque": list(obj), "maxlen": obj.maxlen}
+    if isinstance(obj, float) and math.isnan(obj): return None
+    return obj
+
+def _load(data):
+    if isinstance(data, dict) and "_deque" in data: return deque(data["_deque"], maxlen=data["maxlen"])
+    if isinstance(data, dict) and "_cls" in data:
+        cls = globals()[data["_cls"]]
+        obj = cls.__new__(cls)
+        for k, v in data.items():
+            if k != "_cls": setattr(obj, k, _load(v))
+        return obj
+    return NAN if data is None else data
+
+
+class IntradayState:
+    """All streaming 15m indicators for one symbol, plus the last two closed-bar readings."""
+
+    def __init__(self):
+        self.ema9 = StreamingEMA(9); self.ema21 = StreamingEMA(21); self.rsi = StreamingRSI(14)
+        self.st = StreamingSupertrend(7, 3.0); self.vwap = SessionVWAP()
+        self.vols = deque(maxlen=10); self.last_ts = None; self.bars = 0
+        self.prev_close = NAN; self.prev_vwap = NAN
+
+    def update(self, ts, o, h, l, c, v):
+        snap = {
+            "ts": ts, "close": c, "ema9": self.ema9.update(c), "ema21": self.ema21.update(c),
+            "rsi": self.rsi.update(c), "st_dir": self.st.update(h, l, c),
+            "vwap": self.vwap.update(ts, h, l, c, v), "volume": v,
+            "prev_close": self.prev_close, "prev_vwap": self.prev_vwap,
+        }
+        self.vols.append(v)
+        snap["vol_avg10"] = sum(self.vols) / len(self.vols)
+        self.prev_close, self.prev_vwap = c, snap["vwap"]
+        self.last_ts = pd.Timestamp(ts).isoformat(); self.bars += 1
+        return snap
+
+    def advance(self, df):
+        """Commit every closed bar newer than the state; return the latest-bar snapshot."""
+        if df is None or df.empty: return None
+        last = pd.Timestamp(self.last_ts) if isinstance(self.last_ts, str) else None  # None/NaN: nothing committed yet
+        if last is not None and last.tzinfo is None and df.index.tz is not None: last = last.tz_localize(df.index.tz)
+        if last is not None and (last < df.index[0] or last >= df.index[-1]):
+            # Gap since the state was saved, or the frame moved backwards: rebuild from what we have
+            self.__init__(); last = None
+        new = df if last is None else df[df.index > last]
+        rows = list(zip(new.index, new["Open"], new["High"], new["Low"], new["Close"], new["Volume"]))
+        for r in rows[:-1]: self.update(*r)
+        # Forming bar: evaluated on a copy, committed next time once it has closed
+        return copy.deepcopy(self).update(*rows[-1])
+
+    def to_dict(self):
+        return {k: _dump(v) for k, v in self.__dict__.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        obj = cls.__new__(cls)
+        for k, v in data.items(): setattr(obj, k, _load(v))
+        return obj
+
+
+class StreamRegistry:
+    """Per-symbol IntradayState shared across sessions, persisted as JSON."""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(".market_cache", "intraday_state.json")
+        self.states = {}; self.lock = threading.Lock()
+        try:
+            with open(self.path) as fh:
+                self.states = {s: IntradayState.from_dict(d) for s, d in json.load(fh).items()}
+        except Exception: self.states = {}
+
+    def snapshot(self, symbol, df):
+        with self.lock:
+            state = self.states.setdefault(symbol, IntradayState())
+            return state.advance(df)
+
+    def adopt(self, states, replace=()):
+        """Take states advanced elsewhere: {symbol: IntradayState.to_dict()}. Symbols in
+        replace lose the state held here first (those without one in states start fresh)."""
+        with self.lock:
+            for s in replace: self.states.pop(s, None)
+            for s, d in states.items(): self.states[s] = IntradayState.from_dict(d)
+
+    def export(self, symbols):
+        with self.lock: return {s: self.states[s].to_dict() for s in symbols if s in self.states}
+
+    def save(self):
+        with self.lock:
+            data = {s: st.to_dict() for s, st in self.states.items()}
+        d = os.path.dirname(self.path)
+        if d: os.makedirs(d, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as fh: json.dump(data, fh, default=str)
+        os.replace(tmp, self.path)
+
+
+_registry = None
+
+def get_registry():
+    global _registry
+    if _registry is None: _registry = StreamRegistry()
+    return _registry
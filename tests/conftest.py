@@ -0,0 +1,78 @@
+import os
+import sys
+import pytest
+
+# The app is a set of top-level modules; make them importable from tests/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SESSION_BARS = 25  # 15m bars per NSE session, 09:15 ... 15:15
+
+
+class FakeClock:
+    """Injectable clock in seconds: call it (time.time/monotonic style), now() for the IST
+    timestamp (scheduler style), sleep() advances it instead of waiting."""
+
+    def __init__(self, t=0.0): self.t = t
+    def __call__(self): return self.t
+    def sleep(self, seconds): self.t += max(seconds, 0)
+
+    def now(self):
+        import pandas as pd
+        return pd.Timestamp(self.t, unit="s", tz="UTC").tz_convert("Asia/Kolkata")
+
+    def at(self, wall):
+        """Set to an IST wall-clock time, e.g. "2024-01-02 09:31"."""
+        import pandas as pd
+        self.t = pd.Timestamp(wall, tz="Asia/Kolkata").timestamp()
+        return self
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class SyntheticMarket:
+    """Offline provider over benchmark.synthetic_ohlcv series: 250 daily bars and 12 sessions of
+    15m bars per symbol. The 15m frames end at `cursor` (minus lag[symbol]), so moving it replays
+    the sessions bar by bar."""
+
+    offline = True
+
+    def __init__(self, symbols, sessions=12):
+        import pandas as pd
+        from benchmark import synthetic_ohlcv
+        self.symbols = list(symbols)
+        daily = pd.bdate_range(end="2026-10-16", periods=250)
+        days = pd.bdate_range(end="2026-10-16", periods=sessions)
+        intra = pd.DatetimeIndex([d + pd.Timedelta(minutes=555 + 15 * k) for d in days for k in range(SESSION_BARS)])
+        intra = intra.tz_localize("Asia/Kolkata")
+        self.daily = {s: synthetic_ohlcv(daily, 2 * i) for i, s in enumerate(self.symbols)}
+        self.intra = {s: synthetic_ohlcv(intra, 2 * i + 1, 0.004) for i, s in enumerate(self.symbols)}
+        self.cursor = len(intra); self.lag = {}
+
+    def history(self, symbols, period="1y", interval="1d", start=None):
+        from data_provider import trim_period
+        if interval == "1d": return {s: self.daily[s].copy() for s in symbols if s in self.daily}
+        return {s: trim_period(self.intra[s].iloc[:self.cursor - self.lag.get(s, 0)], period).copy()
+                for s in symbols if s in self.intra}
+
+    def info(self, symbols):
+        return {s: {"trailingPE": [20.0, 75.0, 35.0][self.symbols.index(s) % 3],
+                    "returnOnEquity": [0.2, 0.05][self.symbols.index(s) % 2]} for s in symbols if s in self.daily}
+
+
+@pytest.fixture
+def market(tmp_path, monkeypatch):
+    """Offline scan environment: a SyntheticMarket provider, fresh intraday state and S/R levels,
+    no Telegram, and no process pool left behind."""
+    import alerts, data_provider, levels, parallel_scan, streaming
+    monkeypatch.chdir(tmp_path)  # pool workers start here too: no saved state to pick up
+    monkeypatch.setattr(alerts, "_dispatcher", alerts.AlertDispatcher(send=lambda text: (True, None), sent_path=""))
+    monkeypatch.setattr(streaming, "_registry", streaming.StreamRegistry(str(tmp_path / "intraday_state.json")))
+    monkeypatch.setattr(levels, "_levels", None)
+    m = SyntheticMarket([f"SYN{i:02d}.NS" for i in range(24)])
+    monkeypatch.setattr(data_provider, "_provider", m)
+    parallel_scan._drop_pool()
+    yield m
+    parallel_scan._drop_pool()
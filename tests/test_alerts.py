@@ -0,0 +1,97 @@
+import json
+import time
+import threading
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pytest
+import requests
+import alerts
+from alerts import AlertDispatcher, alert_key, configure_telegram, _post
+
+
+class StandInTelegram:
+    """Records messages; messages containing a `down` marker are refused."""
+
+    def __init__(self): self.sent = []; self.down = set()
+
+    def __call__(self, text):
+        if any(d in text for d in self.down): return False, None
+        self.sent.append(text); return True, None
+
+
+def _alert(sym, text=None):
+    return {"symbol": sym, "signal": "Breakout", "bar": "2024-01-02", "text": text or f"{sym} breakout"}
+
+
+def _dispatcher(send):
+    return AlertDispatcher(send=send, min_interval=0, max_retries=1, sent_path="", sleep=lambda s: None)
+
+
+def test_only_alerts_of_a_failed_message_are_retried():
+    tg = StandInTelegram(); tg.down = {"B.NS"}
+    d = _dispatcher(tg)
+    batch = [_alert("A.NS", "A.NS " + "x" * 3000), _alert("B.NS", "B.NS " + "x" * 3000)]  # one message each
+    assert d.submit(batch) == 2 and d.flush(5)
+    assert len(tg.sent) == 1 and "A.NS" in tg.sent[0]
+    assert alert_key(batch[0]) in d._sent and alert_key(batch[1]) not in d._sent
+    tg.down = set()
+    assert d.submit(batch) == 1 and d.flush(5)  # A.NS is not sent twice
+    assert len(tg.sent) == 2 and "B.NS" in tg.sent[1]
+
+def test_same_bar_alert_is_sent_once():
+    tg = StandInTelegram(); d = _dispatcher(tg)
+    d.submit([_alert("A.NS")]); d.flush(5)
+    assert d.submit([_alert("A.NS")]) == 0 and len(tg.sent) == 1
+
+
+class BotAPI(BaseHTTPRequestHandler):
+    """Local stand-in for sendMessage: each request takes the next step of the server's script."""
+
+    def do_GET(self):
+        step = self.server.script.pop(0) if self.server.script else "ok"
+        q = parse_qs(urlparse(self.path).query)
+        if step == "slow": time.sleep(1.0)
+        if step == "429":
+            body = {"ok": False, "error_code": 429, "parameters": {"retry_after": 7}}; code = 429
+        else:
+            self.server.received.append((urlparse(self.path).path, q["chat_id"][0], q["text"][0])); body = {"ok": True}; code = 200
+        data = json.dumps(body).encode()
+        self.send_response(code); self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data))); self.end_headers()
+        try: self.wfile.write(data)
+        except OSError: pass  # the client gave up (timeout)
+
+    def log_message(self, *args): pass
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BotAPI)
+    server.script = []; server.received = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    for k, v in alerts.TELEGRAM.items(): monkeypatch.setitem(alerts.TELEGRAM, k, v)
+    configure_telegram("TOKEN", "42", api=f"http://127.0.0.1:{server.server_port}")
+    yield server
+    server.shutdown(); server.server_close()
+
+
+def test_post_reaches_the_configured_api(bot):
+    assert _post("hello") == (True, None)
+    assert bot.received == [("/botTOKEN/sendMessage", "42", "hello")]
+
+def test_429_waits_retry_after_then_delivers(bot):
+    bot.script = ["429"]
+    assert _post("x") == (False, 7.0) and bot.received == []
+    bot.script = ["429"]; slept = []
+    d = AlertDispatcher(min_interval=0, sent_path="", sleep=slept.append)
+    d.submit([_alert("A.NS")]); assert d.flush(5)
+    assert slept == [7.0] and [t for _, _, t in bot.received] == ["A.NS breakout"]
+
+def test_slow_api_times_out_and_is_retried(bot):
+    bot.script = ["slow"]
+    with pytest.raises(requests.Timeout): _post("x", timeout=0.2)
+    bot.script = ["slow"]
+    d = AlertDispatcher(send=partial(_post, timeout=0.2), min_interval=0, sent_path="", sleep=lambda s: None)
+    d.submit([_alert("A.NS")]); assert d.flush(5)
+    assert "A.NS breakout" in [t for _, _, t in bot.received]  # delivered by the retry
@@ -0,0 +1,22 @@
+import numpy as np
+from backtest import signal_panel, DAILY_SIGNALS, INTRADAY_SIGNALS
+from scanner_core import run_scan
+
+
+def _last_bar(frames, info, interval):
+    symbols, _, _, signals = signal_panel(frames, info, interval)
+    return {s: {k: bool(m[r, -1]) for k, m in signals.items()} for r, s in enumerate(symbols)}
+
+
+def test_last_bar_signals_agree_with_run_scan(market):
+    market.lag = {s: i % 20 for i, s in enumerate(market.symbols)}  # 15m frames end at different times of day
+    rows = {r["Symbol"]: r for r in run_scan(market.symbols, workers=1)}
+    assert sorted(rows) == sorted(market.symbols)
+    daily = _last_bar(market.history(market.symbols), market.info(market.symbols), "1d")
+    intra = _last_bar(market.history(market.symbols, period="5d", interval="15m"), None, "15m")
+    for s, row in rows.items():
+        assert {k: bool(row[k]) for k in DAILY_SIGNALS} == daily[s], s
+        assert {k: bool(row[k]) for k in INTRADAY_SIGNALS} == intra[s], s
+    # the universe exercises both outcomes of the flags that vary most
+    for k in ["F_CE_80", "F_Fund", "F_Tech", "F_SAR", "F_Day_Buy"]:
+        assert 0 < sum(bool(r[k]) for r in rows.values()) < len(rows), k
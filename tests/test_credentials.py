@@ -0,0 +1,59 @@
+import time
+import threading
+import pandas as pd
+from credentials import CredentialIndex
+
+
+class StandInSheet:
+    """Admin sheet stand-in: rows can be edited between reads, reads are counted (and can be slow)."""
+
+    def __init__(self, rows, delay=0.0):
+        self.rows = rows; self.reads = 0; self.delay = delay
+
+    def __call__(self):
+        self.reads += 1
+        time.sleep(self.delay)
+        return pd.DataFrame(self.rows)
+
+
+def _row(user, pw, status="Active", device=""):
+    return {"Username": user, "Password": pw, "Status": status, "Sheet_URL": f"https://sheet/{user}", "Device_ID": device}
+
+
+def test_verify_contract(clock):
+    idx = CredentialIndex(StandInSheet([_row("ana", "pw1"), _row("bob", "pw2", "Blocked")]), clock=clock)
+    assert idx.verify("ana", "pw1") == (True, "https://sheet/ana", "")
+    assert idx.verify(" ana ", " pw1 ") == (True, "https://sheet/ana", "")
+    assert idx.verify("ana", "nope") == (False, "INVALID", None)
+    assert idx.verify("bob", "pw2") == (False, "BLOCKED", None)
+
+def test_burst_of_logins_reads_once(clock):
+    sheet = StandInSheet([_row("ana", "pw1")])
+    idx = CredentialIndex(sheet, min_refresh=30, clock=clock)
+    for _ in range(50): idx.verify("ana", "pw1"); idx.verify("ana", "bad")
+    assert sheet.reads == 1
+
+def test_blocked_user_is_seen_within_min_refresh(clock):
+    sheet = StandInSheet([_row("ana", "pw1")])
+    idx = CredentialIndex(sheet, min_refresh=30, clock=clock)
+    assert idx.verify("ana", "pw1")[0]
+    sheet.rows = [_row("ana", "pw1", "Blocked")]
+    clock.t += 31
+    assert idx.verify("ana", "pw1") == (False, "BLOCKED", None)
+
+def test_new_device_id_is_seen_within_min_refresh(clock):
+    sheet = StandInSheet([_row("ana", "pw1")])
+    idx = CredentialIndex(sheet, min_refresh=30, clock=clock)
+    idx.verify("ana", "pw1")
+    sheet.rows = [_row("ana", "pw1", device="dev-42")]
+    clock.t += 31
+    assert idx.verify("ana", "pw1")[2] == "dev-42"
+
+def test_concurrent_refresh_is_single_flight(clock):
+    sheet = StandInSheet([_row("ana", "pw1")], delay=0.05)
+    idx = CredentialIndex(sheet, min_refresh=30, clock=clock)
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(idx.verify("ana", "pw1")[0])) for _ in range(20)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert out == [True] * 20 and sheet.reads == 1
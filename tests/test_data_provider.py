@@ -0,0 +1,106 @@
+import logging
+import numpy as np
+import pandas as pd
+import pytest
+import throttle
+import data_provider
+from throttle import Endpoint, collect
+from data_provider import YahooProvider
+from fundamentals import FundamentalsStore, _default_info_fetch
+
+
+class YFRateLimitError(Exception):
+    def __init__(self): super().__init__("Too Many Requests. Rate limited. Try after a while.")
+
+
+def _frame(n=30):
+    idx = pd.date_range("2024-01-01", periods=n, freq="D")
+    return pd.DataFrame({c: np.arange(n, dtype=float) + 1 for c in ["Open", "High", "Low", "Close", "Volume"]}, index=idx)
+
+
+class StandIn:
+    """yfinance stand-in: each download/info call takes the next step of a script."""
+
+    def __init__(self, script=(), info_script=()):
+        self.script = list(script); self.info_script = list(info_script)
+        self.downloads = []; self.info_calls = []
+
+    def download(self, tickers, **kw):
+        self.downloads.append(list(tickers))
+        step = self.script.pop(0) if self.script else "ok"
+        if step == "429": raise YFRateLimitError()
+        served = list(tickers)
+        if step == "half":  # yf.download logs the 429s and returns the rest
+            served = tickers[: len(tickers) // 2]
+            logging.getLogger("yfinance").error(f"{tickers[len(tickers) // 2:]}: YFRateLimitError('Too Many Requests')")
+        if not served: return pd.DataFrame()
+        return pd.concat({s: _frame() for s in served}, axis=1)
+
+    def Ticker(self, symbol):
+        client = self
+        class _T:
+            @property
+            def info(self):
+                client.info_calls.append(symbol)
+                step = client.info_script.pop(0) if client.info_script else "ok"
+                if step == "429": raise YFRateLimitError()
+                if step == "missing": raise KeyError(symbol)
+                return {"trailingPE": 12.5, "returnOnEquity": 0.2}
+        return _T()
+
+
+@pytest.fixture
+def endpoint(clock, monkeypatch):
+    """Installs an Endpoint on the fake clock (no real sleeping, full-size backoff)."""
+    def install(name, **kw):
+        ep = Endpoint(name, clock=clock, sleep=clock.sleep, rand=lambda: 1.0, **kw)
+        monkeypatch.setitem(throttle._endpoints, name, ep)
+        return ep
+    return install
+
+
+SYMS = [f"S{i}.NS" for i in range(6)]
+
+def test_history_retries_throttle_and_halves_concurrency(clock, endpoint):
+    ep = endpoint("history", concurrency=4, max_concurrency=8)
+    client = StandIn(["429"])
+    with collect() as status: frames = YahooProvider(chunk_size=10, client=client).history(SYMS)
+    assert sorted(frames) == SYMS and not status.partial
+    assert len(client.downloads) == 2 and ep.limit.limit == 2 and clock.t >= 1.0
+
+def test_history_logged_429_refetches_only_missing(endpoint):
+    endpoint("history")
+    client = StandIn(["half"])
+    frames = YahooProvider(chunk_size=10, client=client).history(SYMS)
+    assert sorted(frames) == SYMS
+    assert client.downloads == [SYMS, SYMS[3:]]
+
+def test_breaker_opens_fails_fast_and_recovers(clock, endpoint):
+    ep = endpoint("history", retries=2, threshold=3, cooldown=60)
+    client = StandIn(["429"] * 3); provider = YahooProvider(chunk_size=10, client=client)
+    with collect() as status: assert provider.history(SYMS) == {}
+    assert status.partial and ep.breaker.state == "open"
+    n = len(client.downloads)
+    with collect() as status: assert provider.history(SYMS) == {}
+    assert len(client.downloads) == n and set(status.missing.values()) == {"circuit open"}
+    clock.t += 61
+    with collect() as status: assert sorted(provider.history(SYMS)) == SYMS
+    assert not status.partial and ep.breaker.state == "closed"
+
+def test_bad_symbol_is_not_retried_nor_held_against_upstream(endpoint):
+    ep = endpoint("info", threshold=2)
+    client = StandIn(info_script=["missing"] * 5)
+    provider = YahooProvider(client=client)
+    for _ in range(5):
+        with collect() as status: assert provider.info(["GONE.NS"]) == {"GONE.NS": {}}
+        assert not status.partial
+    assert client.info_calls == ["GONE.NS"] * 5 and ep.breaker.state == "closed"
+
+def test_throttled_info_is_not_cached_as_blank(endpoint, tmp_path, monkeypatch):
+    endpoint("info", retries=1)
+    client = StandIn(info_script=["429", "429"])
+    monkeypatch.setattr(data_provider, "_provider", YahooProvider(client=client))
+    store = FundamentalsStore(str(tmp_path / "f.sqlite"), info_fetch=_default_info_fetch, retry_seconds=-1)
+    store.request = lambda symbols, kind: None
+    assert store.refresh_info(["A.NS"]) == {}  # throttled twice: nothing stored
+    assert store.info(["A.NS"]) == {"A.NS": {"trailingPE": 12.5, "returnOnEquity": 0.2}}  # retried, then stored
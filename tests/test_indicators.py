@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+from benchmark import synthetic_ohlcv
+from indicators import daily_feature_table
+
+# Per-symbol pandas references, written the way pandas_ta computes its defaults
+
+
+def rma(s, n):
+    return s.ewm(alpha=1 / n, min_periods=n).mean()
+
+def rsi(close, n=14):
+    d = close.diff()
+    return 100 * rma(d.clip(lower=0), n) / (rma(d.clip(lower=0), n) + rma(d.clip(upper=0), n).abs())
+
+def atr(h, l, c, n=14):
+    pc = c.shift()
+    tr = pd.concat([h - l, (h - pc).abs(), (pc - l).abs()], axis=1).max(axis=1)
+    tr.iloc[:1] = np.nan
+    return rma(tr, n)
+
+def adx(h, l, c, n=14):
+    up = h - h.shift(); dn = l.shift() - l
+    pos = ((up > dn) & (up > 0)) * up; neg = ((dn > up) & (dn > 0)) * dn
+    k = 100 / atr(h, l, c, n)
+    dmp = k * rma(pos, n); dmn = k * rma(neg, n)
+    return rma(100 * (dmp - dmn).abs() / (dmp + dmn), n)
+
+def supertrend_dir(h, l, c, n=7, mult=3.0):
+    hl2 = (h + l) / 2; matr = mult * atr(h, l, c, n)
+    upper = (hl2 + matr).to_numpy().copy(); lower = (hl2 - matr).to_numpy().copy(); close = c.to_numpy()
+    d = [1] * len(c)
+    for i in range(1, len(c)):
+        if close[i] > upper[i - 1]: d[i] = 1
+        elif close[i] < lower[i - 1]: d[i] = -1
+        else:
+            d[i] = d[i - 1]
+            if d[i] > 0 and lower[i] < lower[i - 1]: lower[i] = lower[i - 1]
+            if d[i] < 0 and upper[i] > upper[i - 1]: upper[i] = upper[i - 1]
+    return d[-1]
+
+def psar_last(h, l, c, af0=0.02, max_af=0.2):
+    h = h.to_numpy(); l = l.to_numpy()
+    up, dn = h[1] - h[0], l[0] - l[1]
+    falling = dn > up and dn > 0
+    sar = c.iloc[0]; ep = l[0] if falling else h[0]; af = af0
+    for i in range(1, len(h)):
+        nxt = sar + af * (ep - sar)
+        if falling:
+            reverse = h[i] > nxt
+            if l[i] < ep: ep = l[i]; af = min(af + af0, max_af)
+            nxt = max(h[i - 1], h[i - 2], nxt)  # i == 1 reads h[-1], as pandas_ta does
+        else:
+            reverse = l[i] < nxt
+            if h[i] > ep: ep = h[i]; af = min(af + af0, max_af)
+            nxt = min(l[i - 1], l[i - 2], nxt)
+        if reverse:
+            nxt = ep; af = af0; falling = not falling
+            ep = l[i] if falling else h[i]
+        sar = nxt
+    return sar
+
+def reference(df):
+    h, l, c, v = df["High"], df["Low"], df["Close"], df["Volume"]
+    return {
+        "close": c.iloc[-1], "prev_close": c.iloc[-2], "close_20": c.iloc[-20], "open": df["Open"].iloc[-1],
+        "sma20": c.rolling(20).mean().iloc[-1], "sma200": c.rolling(200).mean().iloc[-1], "rsi": rsi(c).iloc[-1],
+        "volume": v.iloc[-1], "vol_avg": v.rolling(10).mean().iloc[-1],
+        "adx": np.nan_to_num(adx(h, l, c).iloc[-1]), "atr": np.nan_to_num(atr(h, l, c).iloc[-1]),
+        "st_dir": supertrend_dir(h, l, c), "sar": psar_last(h, l, c),
+        "high_max": h.max(), "low_min": l.min(),
+    }
+
+
+def _universe():
+    frames = {}
+    for i in range(60):  # ragged: shorter rows are NaN-padded on the left
+        n = [30, 50, 80, 250][i % 4] if i < 56 else [199, 200, 251, 120][i % 4]
+        idx = pd.bdate_range(end="2026-10-16", periods=n)
+        frames[f"S{i}.NS"] = synthetic_ohlcv(idx, seed=1000 + i, vol=0.02)
+    flat = synthetic_ohlcv(pd.bdate_range(end="2026-10-16", periods=60), seed=99)
+    flat.iloc[-30:] = flat.iloc[-30][["Open", "High", "Low", "Close", "Volume"]].to_numpy()  # no movement: RSI 0/0
+    frames["FLAT.NS"] = flat
+    return frames
+
+
+def test_latest_features_match_per_symbol_reference():
+    frames = _universe()
+    table = daily_feature_table(frames)
+    assert list(table.index) == list(frames)
+    for sym, df in frames.items():
+        want = reference(df)
+        got = table.loc[sym]
+        for col, v in want.items():
+            np.testing.assert_allclose(got[col], v, rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=f"{sym} {col}")
+
+def test_a_symbol_does_not_depend_on_its_neighbours():
+    frames = _universe()
+    together = daily_feature_table(frames)
+    for sym in ["S1.NS", "S5.NS"]:
+        alone = daily_feature_table({sym: frames[sym]})
+        pd.testing.assert_series_equal(alone.loc[sym], together.loc[sym])
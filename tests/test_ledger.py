@@ -0,0 +1,61 @@
+import sqlite3
+import pytest
+from ledger import Ledger, SheetsSyncer, NotSeeded
+
+URL = "https://sheet/abc"
+
+
+class FakeSheets:
+    """Stand-in for the GSheets connection: records writes, can be made to fail."""
+
+    def __init__(self): self.writes = []; self.down = False
+
+    def update(self, spreadsheet, worksheet, data):
+        if self.down: raise ConnectionError("quota")
+        self.writes.append((spreadsheet, worksheet, data.copy()))
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return Ledger(str(tmp_path / "ledger.sqlite"))
+
+def _sheet_state(cash=5000.0):
+    return {"balance": cash, "holdings": {"TCS.NS": {"qty": 2, "buy_price": 100.0, "category": "Swing", "date": "01-01-2024"}}}
+
+
+def test_trades_refused_and_nothing_synced_until_seeded(ledger):
+    sheets = FakeSheets(); syncer = SheetsSyncer(ledger, sheets)
+    with pytest.raises(NotSeeded): ledger.buy(URL, "INFY.NS", 1, 10.0, "Swing")
+    with pytest.raises(NotSeeded): ledger.reset(URL)
+    assert not ledger.has_account(URL) and ledger.dirty() == []
+    assert syncer.sync_once() == [] and sheets.writes == []
+
+def test_seeded_trades_are_mirrored_once(ledger):
+    sheets = FakeSheets(); syncer = SheetsSyncer(ledger, sheets)
+    assert ledger.seed(URL, _sheet_state())
+    assert ledger.dirty() == []  # the sheet already holds the seed
+    assert ledger.buy(URL, "INFY.NS", 10, 100.0, "Swing")
+    assert not ledger.buy(URL, "INFY.NS", 1000, 100.0, "Swing")  # no cash
+    assert ledger.sell(URL, "TCS.NS", 150.0)
+    assert syncer.sync_once() == [] and ledger.dirty() == []
+    (_, ws1, holdings), (_, ws2, balance) = sheets.writes
+    assert (ws1, ws2) == ("Portfolio", "Balance")
+    assert list(holdings["Symbol"]) == ["INFY.NS"] and balance.iloc[0, 0] == 5000.0 - 1000.0 + 300.0
+
+def test_failed_push_stays_dirty(ledger):
+    sheets = FakeSheets(); syncer = SheetsSyncer(ledger, sheets)
+    ledger.seed(URL, _sheet_state()); ledger.buy(URL, "INFY.NS", 1, 10.0, "Swing")
+    sheets.down = True
+    assert syncer.sync_once() == [URL] and ledger.dirty() == [URL]
+    sheets.down = False
+    assert syncer.sync_once() == [] and ledger.dirty() == []
+
+def test_account_made_without_seed_is_replaced_by_seed(ledger):
+    # Older versions created the account with the default cash when the sheet read failed
+    con = sqlite3.connect(ledger.path)
+    con.execute("INSERT INTO accounts (account, cash, version) VALUES (?, 1000000.0, 3)", (URL,))
+    con.execute("INSERT INTO positions VALUES (?, 'X.NS', 1, 1.0, 'Swing', '01-01-2024')", (URL,))
+    con.commit(); con.close()
+    assert not ledger.has_account(URL) and ledger.dirty() == []
+    assert ledger.seed(URL, _sheet_state())
+    assert ledger.portfolio(URL) == _sheet_state() and ledger.dirty() == []
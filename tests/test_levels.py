@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from levels import PivotTracker
+
+argrelextrema = pytest.importorskip("scipy.signal").argrelextrema
+
+
+def _bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    idx = pd.date_range("2024-01-01", periods=n, freq="D", tz="Asia/Kolkata")
+    return idx, close - rng.uniform(0, 1, n), close + rng.uniform(0, 1, n)
+
+
+def _expected(lows, highs):
+    return argrelextrema(lows, np.less, order=5)[0], argrelextrema(highs, np.greater, order=5)[0]
+
+
+def _check(tracker, idx, lows, highs):
+    got = tracker.update(idx, lows, highs)
+    for g, e in zip(got, _expected(lows, highs)): np.testing.assert_array_equal(g, e)
+
+
+def test_rolling_frames_match_argrelextrema():
+    idx, lows, highs = _bars(400)
+    tracker = PivotTracker()
+    for end in range(250, 400):  # one new bar per scan, window of 250 rolling forward
+        s = slice(end - 250, end)
+        _check(tracker, idx[s], lows[s], highs[s])
+
+def test_forming_bar_moves_between_scans():
+    idx, lows, highs = _bars(260, seed=1)
+    tracker = PivotTracker()
+    for bump in (0.0, -50.0, 50.0, 0.0):
+        lows2, highs2 = lows.copy(), highs.copy()
+        lows2[-1] += bump; highs2[-1] += bump
+        _check(tracker, idx, lows2, highs2)
+
+def test_correction_to_an_older_bar_rebuilds():
+    idx, lows, highs = _bars(260, seed=2)
+    tracker = PivotTracker()
+    _check(tracker, idx, lows, highs)
+    lows2 = lows.copy(); lows2[50] = lows.min() - 10  # e.g. a split adjustment far behind the anchor
+    _check(tracker, idx, lows2, highs)
+    highs2 = highs.copy(); highs2[120] = highs.max() + 10
+    _check(tracker, idx, lows2, highs2)
+
+@pytest.mark.parametrize("n", range(1, 14))
+def test_short_frames_have_no_duplicates(n):
+    for seed in range(20):
+        idx, lows, highs = _bars(n, seed=seed)
+        tracker = PivotTracker()
+        _check(tracker, idx, lows, highs)
+        _check(tracker, idx, lows, highs)  # again, from the stored state
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from ohlcv_cache import CachedProvider, OHLCVCache
+
+IST = "Asia/Kolkata"
+SESSION = pd.date_range("2026-10-16 09:15", "2026-10-16 15:15", freq="15min", tz=IST)
+
+
+class StandInUpstream:
+    """15m bars up to the clock; the forming bar's High/Close are still moving (final value - 1)."""
+
+    def __init__(self, clock): self.clock = clock; self.calls = []
+
+    def history(self, symbols, period="5d", interval="15m", start=None):
+        self.calls.append(start)
+        now = pd.Timestamp(self.clock(), unit="s", tz="UTC")
+        idx = SESSION[SESSION <= now]
+        if start is not None: idx = idx[idx >= pd.Timestamp(start)]
+        final = 100 + np.arange(len(SESSION), dtype=float)[SESSION.get_indexer(idx)]
+        df = pd.DataFrame({"Open": final, "High": final + 1, "Low": final - 1, "Close": final, "Volume": 1000.0}, index=idx)
+        forming = idx + pd.Timedelta(minutes=15) > now
+        df.loc[forming, ["High", "Close"]] -= 1
+        return {s: df.copy() for s in symbols}
+
+    def info(self, symbols): return {}
+
+
+def test_forming_bar_is_served_but_not_stored_then_replaced_once_closed(clock, tmp_path):
+    clock.at("2026-10-16 10:07")
+    upstream = StandInUpstream(clock); cache = OHLCVCache(str(tmp_path / "ohlcv.sqlite"))
+    provider = CachedProvider(upstream, cache, clock=clock)
+
+    df = provider.history(["A.NS"], period="5d", interval="15m")["A.NS"]
+    assert df.index[-1] == pd.Timestamp("2026-10-16 10:00", tz=IST)
+    assert df["Close"].iloc[-1] == 102.0  # forming value, served as is
+    assert cache.load("A.NS", "15m").index[-1] == pd.Timestamp("2026-10-16 09:45", tz=IST)  # ...but not stored
+
+    clock.at("2026-10-16 10:16")  # the 10:00 bar has closed
+    df = provider.history(["A.NS"], period="5d", interval="15m")["A.NS"]
+    assert upstream.calls[-1] == pd.Timestamp("2026-10-16 09:45", tz=IST)  # warm: asked from the last stored bar
+    stored = cache.load("A.NS", "15m")
+    assert stored.index[-1] == pd.Timestamp("2026-10-16 10:00", tz=IST)
+    assert (stored["Close"].iloc[-1], stored["High"].iloc[-1]) == (103.0, 104.0)  # the final bar, not the 10:07 one
+    assert df.loc[pd.Timestamp("2026-10-16 10:00", tz=IST), "Close"] == 103.0
+    assert df.index[-1] == pd.Timestamp("2026-10-16 10:15", tz=IST) and df["Close"].iloc[-1] == 103.0  # new forming bar
+    assert not df.index.duplicated().any()
+
+def test_bar_closing_exactly_now_is_stored(clock, tmp_path):
+    clock.at("2026-10-16 10:15")
+    cache = OHLCVCache(str(tmp_path / "ohlcv.sqlite"))
+    CachedProvider(StandInUpstream(clock), cache, clock=clock).history(["A.NS"], period="5d", interval="15m")
+    assert cache.load("A.NS", "15m").index[-1] == pd.Timestamp("2026-10-16 10:00", tz=IST)  # 10:00 + 15m <= 10:15
@@ -0,0 +1,29 @@
+import numpy as np
+import streaming
+from conftest import SESSION_BARS
+from scanner_core import run_scan
+from streaming import StreamRegistry
+
+
+def _session_of_scans(market, workers, monkeypatch, tmp_path):
+    """A serial warm-up scan, then two consecutive scans one 15m bar apart."""
+    monkeypatch.setattr(streaming, "_registry", StreamRegistry(str(tmp_path / f"state{workers}.json")))
+    market.cursor = 7 * SESSION_BARS - 5
+    run_scan(market.symbols, workers=1)
+    out = []
+    for cursor in (10 * SESSION_BARS + 10, 10 * SESSION_BARS + 11):
+        market.cursor = cursor; out.append(run_scan(market.symbols, workers=workers))
+    return out, {s: st.to_dict() for s, st in streaming.get_registry().states.items()}
+
+
+def _rows(results):
+    return [{k: (v.tolist() if isinstance(v, np.ndarray) else v) for k, v in r.items() if not k.startswith("DF_")} for r in results]
+
+
+def test_parallel_scans_match_serial_scans(market, monkeypatch, tmp_path):
+    serial, serial_state = _session_of_scans(market, 1, monkeypatch, tmp_path)
+    parallel, parallel_state = _session_of_scans(market, 2, monkeypatch, tmp_path)
+    for a, b in zip(serial, parallel):
+        assert len(a) == len(market.symbols) and _rows(a) == _rows(b)
+    # ...and the parent carries the same intraday state forward either way
+    assert parallel_state == serial_state
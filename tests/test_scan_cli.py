@@ -0,0 +1,24 @@
+import json
+import numpy as np
+from scan_cli import write_rows, json_safe
+
+
+def _strict(text):
+    def refuse(c): raise ValueError(f"bare {c} in JSON output")
+    return json.loads(text, parse_constant=refuse)
+
+
+ROWS = [{"Symbol": "A.NS", "PE": float("nan"), "ROE": np.float64("inf"), "RSI": 61.5, "Min_Idx": [3, 9],
+         "Frame_Versions": {"daily": (np.float32("nan"), 250)}}]
+
+
+def test_json_output_has_no_bare_nan(tmp_path):
+    path = str(tmp_path / "scan.json")
+    write_rows(ROWS, path)
+    with open(path) as fh: rows = _strict(fh.read())
+    assert rows == [{"Symbol": "A.NS", "PE": None, "ROE": None, "RSI": 61.5, "Min_Idx": [3, 9],
+                     "Frame_Versions": {"daily": [None, 250]}}]
+
+def test_jsonl_line_is_strict_json():
+    line = json.dumps(json_safe(ROWS[0]), default=str, allow_nan=False)
+    assert _strict(line)["PE"] is None
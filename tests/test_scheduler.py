@@ -0,0 +1,61 @@
+import pandas as pd
+import scheduler
+from scheduler import AutoScanner, IST, get_auto_scanner
+
+
+class StandInFeed:
+    """Every symbol has the same latest bar, which moves when `bar` does."""
+
+    def __init__(self): self.bar = pd.Timestamp("2024-01-02 09:30", tz=IST); self.asked = []
+
+    def __call__(self, symbols):
+        self.asked.append(list(symbols))
+        return {s: self.bar for s in symbols}
+
+
+def _scanner(clock, feed, scanned):
+    clock.at("2024-01-02 09:31")
+    def scan(symbols):
+        scanned.append(list(symbols))
+        return [{"Symbol": s, "Signal_Quality": "⚪ Neutral"} for s in symbols]
+    return AutoScanner(["A.NS", "B.NS", "C.NS"], scan=scan, feed=feed, clock=clock, batch_size=10, idle_stop=600)
+
+
+def test_holdings_outside_universe_are_scanned_first_for_their_session_only(clock):
+    feed = StandInFeed(); scanned = []
+    auto = _scanner(clock, feed, scanned)
+    auto.prioritize(["C.NS", "X.NS"], owner="ana")
+    assert auto.run_once() == 4
+    assert scanned == [["C.NS", "X.NS", "A.NS", "B.NS"]]
+    assert [r["Symbol"] for r in auto.rows("ana")] == ["A.NS", "B.NS", "C.NS", "X.NS"]
+    assert [r["Symbol"] for r in auto.rows("bob")] == ["A.NS", "B.NS", "C.NS"]
+
+def test_holdings_are_replaced_not_accumulated(clock):
+    feed = StandInFeed(); scanned = []
+    auto = _scanner(clock, feed, scanned)
+    auto.prioritize(["X.NS"], owner="ana")
+    auto.prioritize(["B.NS"], owner="ana")  # sold X.NS, bought B.NS
+    auto.run_once()
+    assert scanned == [["B.NS", "A.NS", "C.NS"]]
+
+def test_idle_sessions_and_scheduler_expire_on_the_injected_clock(clock):
+    feed = StandInFeed(); scanned = []
+    auto = _scanner(clock, feed, scanned)
+    auto.prioritize(["X.NS"], owner="ana"); auto.prioritize(["Y.NS"], owner="bob")
+    clock.t += 500; auto.touch("ana")
+    clock.t += 200
+    assert auto.held() == ["X.NS"]
+    clock.t += 601
+    assert auto.step() is False and auto.held() == []
+
+def test_idle_scheduler_leaves_the_registry(clock, monkeypatch):
+    monkeypatch.setattr(scheduler, "_schedulers", {})
+    feed = StandInFeed(); scanned = []
+    clock.at("2024-01-02 09:31")
+    kw = dict(scan=lambda symbols: scanned.append(symbols) or [], feed=feed, clock=clock, idle_stop=600)
+    auto = get_auto_scanner(["A.NS", "B.NS"], **kw)
+    auto._thread.join(5)  # the fake clock runs through 600s of bar waits at once
+    assert not auto._thread.is_alive() and scheduler._schedulers == {}
+    again = get_auto_scanner(["A.NS", "B.NS"], **kw)
+    assert again is not auto and scheduler._schedulers == {("A.NS", "B.NS"): again}
+    again.stop(); again._thread.join(5)
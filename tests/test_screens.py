@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from screens import compile_screen, RuleError
+
+
+class StandInTable:
+    """The two things a Screen needs from ScanResultTable: column() and len()."""
+
+    def __init__(self, **cols): self.cols = {k: np.asarray(v) for k, v in cols.items()}
+    def column(self, name): return self.cols[name]
+    def __len__(self): return len(next(iter(self.cols.values())))
+
+
+NAN = float("nan")
+TABLE = StandInTable(RSI=[70.0, NAN, 40.0], ADX=[30.0, 30.0, NAN], F_Weekly_Up=[True, True, False])
+
+
+@pytest.mark.parametrize("rule, rows", [
+    ("rsi > 60", [0]),
+    ("rsi != 50", [0, 2]),
+    ("rsi != rsi", []),
+    ("rsi == rsi", [0, 2]),
+    ("not rsi < 60", [0, 1]),  # "not" of a False comparison is True
+    ("30 < rsi < adx + 50", [0]),
+    ("rsi > 60 or weekly_up", [0, 1]),
+])
+def test_missing_values_compare_false(rule, rows):
+    assert list(compile_screen(rule).rows(TABLE)) == rows
+
+@pytest.mark.parametrize("rule", ["rsi", "__import__('os')", "rsi > 'a'", "weekly_up > 1", ""])
+def test_bad_rules_are_refused(rule):
+    with pytest.raises(RuleError): compile_screen(rule)
@@ -0,0 +1,234 @@
+import time
+import random
+import threading
+from contextlib import contextmanager
+from metrics import record
+
+# ==========================================
+# 🚥 UPSTREAM FETCH SCHEDULER
+# ==========================================
+# Every Yahoo call goes through the Endpoint of its kind ("history", "info",
+# "financials"), which:
+#   - spends a token-bucket budget: at most `rate` calls/s, bursts of `burst`
+#   - caps calls in flight with an adaptive limit: a throttle (HTTP 429 / rate
+#     limit) halves it, answers slower than `target_seconds` lower it by one,
+#     `window` fast answers in a row raise it by one (up to max_concurrency)
+#   - retries throttles and transient errors (network, timeouts) with
+#     full-jitter exponential backoff; other errors (bad symbol, parse error)
+#     are the request's own fault: raised at once, not held against upstream
+#   - trips a circuit breaker after `threshold` throttled/transient attempts in
+#     a row: calls fail fast (CircuitOpen) for `cooldown` seconds, then one
+#     probe decides
+# What still does not come back is reported per symbol with a reason to every
+# collect() block open on the calling thread, so a scan can say "partial
+# result" instead of silently dropping rows.
+# Clock, sleep and randomness are injectable: a stand-in fetch that raises
+# Throttled is enough to drive it without the network.
+
+LIMITS = {
+    "history": dict(rate=2.0, burst=4, concurrency=4, max_concurrency=8, target_seconds=10.0),
+    "info": dict(rate=4.0, burst=8, concurrency=4, max_concurrency=8, target_seconds=4.0),
+    "financials": dict(rate=1.0, burst=2, concurrency=2, max_concurrency=4, target_seconds=6.0),
+}
+UPSTREAM_REASONS = ("throttled", "circuit open", "error")  # "no data" is the symbol's own business
+
+
+class Throttled(Exception):
+    """Upstream asked us to slow down."""
+
+
+class CircuitOpen(RuntimeError):
+    pass
+
+
+def is_throttle(exc):
+    if isinstance(exc, Throttled): return True
+    return "RateLimit" in type(exc).__name__ or is_throttle_text(str(exc))
+
+def is_throttle_text(text):
+    text = str(text).lower()
+    return "too many requests" in text or "rate limit" in text or "429" in text
+
+def is_transient(exc):
+    """Worth retrying: throttles and network trouble (requests/curl errors are OSErrors)."""
+    return is_throttle(exc) or isinstance(exc, OSError) or "Timeout" in type(exc).__name__
+
+
+class TokenBucket:
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate; self.burst = burst; self.clock = clock
+        self.tokens = float(burst); self.at = clock()
+        self._lock = threading.Lock()
+
+    def take(self):
+        """0.0 when a token was taken, else the seconds until the next one."""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.at) * self.rate); self.at = now
+            if self.tokens >= 1:
+                self.tokens -= 1; return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def drain(self):
+        with self._lock: self.tokens = 0.0; self.at = self.clock()
+
+
+class AdaptiveLimit:
+    """Calls in flight: multiplicative decrease on throttling, additive increase on fast answers."""
+
+    def __init__(self, start, hi, lo=1, target_seconds=None, window=10):
+        self.limit = start; self.lo = lo; self.hi = max(hi, start)
+        self.target = target_seconds; self.window = window
+        self.active = 0; self._streak = 0
+        self._cv = threading.Condition()
+
+    def acquire(self):
+        with self._cv:
+            self._cv.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    def release(self, outcome, seconds=0.0):
+        with self._cv:
+            self.active -= 1
+            if outcome == "throttled":
+                self.limit = max(self.lo, self.limit // 2); self._streak = 0
+            elif outcome == "ok" and self.target is not None and seconds > self.target:
+                self.limit = max(self.lo, self.limit - 1); self._streak = 0
+            elif outcome == "ok":
+                self._streak += 1
+                if self._streak >= self.window: self.limit = min(self.hi, self.limit + 1); self._streak = 0
+            self._cv.notify_all()
+
+
+class CircuitBreaker:
+    def __init__(self, name, threshold=5, cooldown=60.0, clock=time.monotonic):
+        self.name = name; self.threshold = threshold; self.cooldown = cooldown; self.clock = clock
+        self.state = "closed"; self.failures = 0; self.opened_at = None; self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open" and self.clock() - self.opened_at >= self.cooldown:
+                self.state = "half_open"; self._probing = False
+            if self.state == "closed": return True
+            if self.state == "half_open" and not self._probing:
+                self._probing = True; return True
+            return False
+
+    def retry_in(self):
+        with self._lock:
+            return 0.0 if self.state != "open" else max(0.0, self.cooldown - (self.clock() - self.opened_at))
+
+    def success(self):
+        with self._lock: self.state = "closed"; self.failures = 0; self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.threshold):
+                self.state = "open"; self.opened_at = self.clock(); self._probing = False
+                record(f"fetch.{self.name}.circuit_open")
+
+
+class Endpoint:
+    def __init__(self, name, rate=2.0, burst=4, concurrency=4, max_concurrency=8, target_seconds=None,
+                 retries=3, backoff=1.0, max_backoff=30.0, threshold=5, cooldown=60.0,
+                 clock=time.monotonic, sleep=time.sleep, rand=random.random):
+        self.name = name; self.retries = retries; self.backoff = backoff; self.max_backoff = max_backoff
+        self.clock = clock; self.sleep = sleep; self.rand = rand
+        self.bucket = TokenBucket(rate, burst, clock)
+        self.limit = AdaptiveLimit(concurrency, max_concurrency, target_seconds=target_seconds)
+        self.breaker = CircuitBreaker(name, threshold, cooldown, clock)
+
+    def delay(self, attempt):
+        """Full jitter: uniform in [0, min(max_backoff, backoff * 2**attempt)]."""
+        return self.rand() * min(self.max_backoff, self.backoff * 2 ** attempt)
+
+    def call(self, fn, *args, **kwargs):
+        """fn(*args, **kwargs) within the budget, retried; raises CircuitOpen or the last error."""
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow():
+                record(f"fetch.{self.name}.rejected")
+                raise CircuitOpen(f"{self.name}: upstream degraded, retrying in {self.breaker.retry_in():.0f}s")
+            wait = self.bucket.take()
+            while wait:
+                self.sleep(wait); wait = self.bucket.take()
+            self.limit.acquire()
+            t0 = self.clock()
+            try: out = fn(*args, **kwargs); outcome = "ok"
+            except Exception as e:
+                err = e; outcome = "throttled" if is_throttle(e) else "error" if is_transient(e) else "failed"
+            self.limit.release(outcome, self.clock() - t0)
+            if outcome == "ok":
+                self.breaker.success(); return out
+            if outcome == "failed":
+                self.breaker.success()  # upstream answered; retrying the same request gives the same error
+                record(f"fetch.{self.name}.failed"); raise err
+            self.breaker.failure()
+            record(f"fetch.{self.name}.{outcome}")
+            if outcome == "throttled": self.bucket.drain()  # no burst straight after a 429
+            if attempt < self.retries:
+                record(f"fetch.{self.name}.retry"); self.sleep(self.delay(attempt))
+        raise err
+
+    def state(self):
+        return {"endpoint": self.name, "circuit": self.breaker.state, "failures": self.breaker.failures,
+                "retry_in_s": round(self.breaker.retry_in()), "in_flight": self.limit.active,
+                "limit": self.limit.limit, "tokens": round(self.bucket.tokens, 1)}
+
+
+_endpoints = {}
+_endpoints_lock = threading.Lock()
+
+def get_endpoint(name):
+    with _endpoints_lock:
+        if name not in _endpoints: _endpoints[name] = Endpoint(name, **LIMITS.get(name, {}))
+        return _endpoints[name]
+
+def endpoint_states():
+    with _endpoints_lock: eps = list(_endpoints.values())
+    return [ep.state() for ep in eps]
+
+
+# --- PARTIAL RESULTS ---
+class FetchStatus:
+    """What the provider calls inside one collect() block could not deliver."""
+
+    def __init__(self):
+        self.requested = set(); self.missing = {}  # (what, symbol) -> reason
+
+    def add(self, what, symbols, missing):
+        for s in symbols:
+            self.requested.add(s)
+            if s in missing: self.missing[(what, s)] = missing[s]
+            else: self.missing.pop((what, s), None)  # a later call in the block got it
+
+    def symbols(self, upstream_only=True):
+        return {s for (_, s), r in self.missing.items() if r in UPSTREAM_REASONS or not upstream_only}
+
+    @property
+    def partial(self):
+        return any(r in UPSTREAM_REASONS for r in self.missing.values())
+
+    def summary(self):
+        if not self.partial: return ""
+        by = {}
+        for (_, s), r in self.missing.items():
+            if r in UPSTREAM_REASONS: by.setdefault(r, set()).add(s)
+        parts = ", ".join(f"{len(v)} {r}" for r, v in sorted(by.items()))
+        return f"Partial result: {len(self.symbols())} of {len(self.requested)} symbols missing or stale ({parts})"
+
+
+_local = threading.local()
+
+@contextmanager
+def collect():
+    status = FetchStatus()
+    stack = _local.__dict__.setdefault("stack", [])
+    stack.append(status)
+    try: yield status
+    finally: stack.remove(status)
+
+def report(what, symbols, missing):
+    """Provider side: {symbol: reason} for the symbols of a call that came back without data."""
+    for status in getattr(_local, "stack", ()): status.add(what, symbols, missing)
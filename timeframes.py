@@ -0,0 +1,28 @@
+import pandas as pd
+
+# ==========================================
+# 🕰️ MULTI-TIMEFRAME RESAMPLING
+# ==========================================
+# Higher timeframes are derived locally from the base intervals we already
+# hold (1d and 15m), so each symbol is downloaded once per base interval.
+# Bars are labelled by their start time, the same way Yahoo labels them.
+
+OHLCV_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+# rule, resample kwargs
+TIMEFRAMES = {
+    "1wk": ("W-MON", {"label": "left", "closed": "left"}),   # weeks start Monday
+    "1mo": ("MS", {}),
+    "1h": ("60min", {"offset": "15min"}),                     # NSE session opens 09:15
+}
+
+def resample_ohlcv(df, rule, **kwargs):
+    if df is None or df.empty: return df
+    agg = {c: a for c, a in OHLCV_AGG.items() if c in df.columns}
+    out = df.resample(rule, **kwargs).agg(agg)
+    # Buckets with no trades (holidays, overnight) carry no bar
+    return out.dropna(subset=["Close"])
+
+def to_weekly(daily): return resample_ohlcv(daily, TIMEFRAMES["1wk"][0], **TIMEFRAMES["1wk"][1])
+def to_monthly(daily): return resample_ohlcv(daily, TIMEFRAMES["1mo"][0], **TIMEFRAMES["1mo"][1])
+def to_hourly(intra): return resample_ohlcv(intra, TIMEFRAMES["1h"][0], **TIMEFRAMES["1h"][1])